@@ -0,0 +1,260 @@
+"""
+Benchmark suite for the hair recommendation agent.
+
+Measures every task type and get_personalized_recommendations over
+synthetic catalogs of several sizes, cold (median first call over several
+freshly built agents) and warm (repeated calls), and writes the results as
+JSON:
+
+    PYTHONPATH=src python benchmarks/run.py --output results.json
+
+Compare a run against a stored baseline, exiting with status 1 when any
+benchmark got slower than the threshold allows. Only warm timings are
+checked unless --check-cold is given, as cold timings are much noisier:
+
+    PYTHONPATH=src python benchmarks/run.py --baseline baseline.json
+    PYTHONPATH=src python benchmarks/run.py --baseline baseline.json --current results.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from agent_core_framework import AgentTask
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data import RuleIndex, style_profiles
+from synthetic import synthetic_rules
+
+DEFAULT_SIZES = [50, 1000, 10000, 100000]
+RECOMMENDATION_PAYLOAD = {
+    "face_shape": "oval",
+    "hair_type": "wavy",
+    "personal_style": "bohemian",
+    "age_group": "adult",
+    "gender": "female",
+    "hair_length": "medium"
+}
+
+
+@contextlib.contextmanager
+def patched_style_profiles(rules: Dict[str, Any]) -> Iterator[None]:
+    """Point get_personalized_recommendations at synthetic rule data"""
+    names = {
+        "FACE_SHAPE_RECOMMENDATIONS": rules["face_shape_rules"],
+        "HAIR_TYPE_RECOMMENDATIONS": rules["hair_type_rules"],
+        "STYLE_PROFILES": rules["style_profiles"],
+        "HAIR_STYLES_DETAILED": rules["styles_detailed"]
+    }
+    original = {name: getattr(style_profiles, name) for name in names}
+    for name, value in names.items():
+        setattr(style_profiles, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(style_profiles, name, value)
+
+
+def measure(make_call: Callable[[], Callable[[], Any]], iterations: int, cold_runs: int) -> Dict[str, float]:
+    """
+    Cold and warm timings, in milliseconds, of the calls made by make_call.
+
+    make_call sets up fresh state, such as a new agent, and returns the call
+    to time. Cold is the median first call over cold_runs fresh setups; warm
+    samples repeat the call on the last of them.
+    """
+    cold_samples = []
+    for _ in range(cold_runs):
+        call = make_call()
+        start = time.perf_counter()
+        call()
+        cold_samples.append((time.perf_counter() - start) * 1000)
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+
+    return {
+        "cold_ms": statistics.median(cold_samples),
+        "cold_runs": cold_runs,
+        "warm": {
+            "iterations": iterations,
+            "min_ms": samples[0],
+            "mean_ms": statistics.fmean(samples),
+            "p50_ms": samples[len(samples) // 2],
+            "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        }
+    }
+
+
+def check(response: Any) -> Any:
+    """Fail the run rather than time an error response"""
+    if not response.success:
+        raise RuntimeError(f"Benchmark task failed: {response.error}")
+    return response
+
+
+def benchmark_size(size: int, iterations: int, cold_runs: int) -> List[Dict[str, Any]]:
+    """Results for one catalog; catalog_size is the requested size, 0 for the shipped rules"""
+    rules = synthetic_rules(size) if size else None
+
+    start = time.perf_counter()
+    index = RuleIndex(**rules) if rules else RuleIndex()
+    agent = HairRecommendationAgent(rule_index=index)
+    setup_ms = (time.perf_counter() - start) * 1000
+
+    # A style some face shape does not avoid, so every task accepts it
+    style = agent.query_styles(face_shape="oval", face_tiers=("excellent", "good", "fair"))[0]
+    tasks = {
+        "get_hairstyle_recommendations": AgentTask(
+            type="get_hairstyle_recommendations", payload=RECOMMENDATION_PAYLOAD
+        ),
+        "analyze_style_compatibility": AgentTask(
+            type="analyze_style_compatibility",
+            payload={"style_name": style, "face_shape": "oval", "hair_type": "wavy"}
+        ),
+        "get_trending_styles": AgentTask(type="get_trending_styles", payload={"season": "spring"}),
+        # Every style against a 2x2 grid, so the work grows with the catalog
+        # while the response stays a few values per style
+        "get_compatibility_matrix": AgentTask(
+            type="get_compatibility_matrix",
+            payload={"face_shapes": ["oval", "round"], "hair_types": ["wavy", "straight"]}
+        ),
+        # Cold includes building the neighbour index
+        "get_similar_styles": AgentTask(type="get_similar_styles", payload={"style_name": style})
+    }
+
+    def fresh_agent_call(task: AgentTask) -> Callable[[], Callable[[], Any]]:
+        def make_call() -> Callable[[], Any]:
+            fresh = HairRecommendationAgent(rule_index=index)
+            return lambda: check(fresh.process(task))
+        return make_call
+
+    results = []
+    for name, task in tasks.items():
+        timings = measure(fresh_agent_call(task), iterations, cold_runs)
+        results.append(dict(benchmark=name, catalog_size=size, setup_ms=setup_ms, **timings))
+
+    def personalized_call() -> Callable[[], Any]:
+        # Dropped so each cold run rebuilds the query engine
+        style_profiles.refresh_style_query()
+        return lambda: style_profiles.get_personalized_recommendations(
+            "oval", "wavy", style_profile="bohemian", hair_length="medium"
+        )
+
+    with patched_style_profiles(rules) if rules else contextlib.nullcontext():
+        timings = measure(personalized_call, iterations, cold_runs)
+    style_profiles.refresh_style_query()
+    results.append(dict(benchmark="get_personalized_recommendations",
+                        catalog_size=size, setup_ms=setup_ms, **timings))
+    return results
+
+
+def run(sizes: List[int], iterations: int, cold_runs: int) -> Dict[str, Any]:
+    results = []
+    for size in sizes:
+        print(f"Benchmarking catalog size {size or 'shipped'}...", file=sys.stderr)
+        results.extend(benchmark_size(size, iterations, cold_runs))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "sizes": sizes,
+            "iterations": iterations,
+            "cold_runs": cold_runs
+        },
+        "results": results
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+            min_delta_ms: float, check_cold: bool = False) -> List[Dict[str, Any]]:
+    """
+    Rows comparing matching benchmarks, flagged when slower than allowed.
+    Cold timings are only flagged with check_cold.
+    """
+    reference = {(row["benchmark"], row["catalog_size"]): row for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        base = reference.get((row["benchmark"], row["catalog_size"]))
+        if base is None:
+            continue
+        for metric, before, after in [("cold_ms", base["cold_ms"], row["cold_ms"]),
+                                      ("warm_p50_ms", base["warm"]["p50_ms"], row["warm"]["p50_ms"])]:
+            rows.append({
+                "benchmark": row["benchmark"],
+                "catalog_size": row["catalog_size"],
+                "metric": metric,
+                "baseline": before,
+                "current": after,
+                "ratio": after / before if before else float("inf"),
+                "regression": ((check_cold or metric != "cold_ms")
+                               and after > before * (1 + threshold) and after - before > min_delta_ms)
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<36}{'styles':>8}  {'metric':<12}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['benchmark']:<36}{row['catalog_size']:>8}  {row['metric']:<12}"
+              f"{row['baseline']:>12.3f}{row['current']:>12.3f}{row['ratio']:>8.2f}{flag}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the hair recommendation agent")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated synthetic catalog sizes, 0 for the shipped rules "
+                             f"(default: {','.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--iterations", type=int, default=50, help="warm calls per benchmark (default: 50)")
+    parser.add_argument("--cold-runs", type=int, default=3,
+                        help="fresh agents whose first call gives the median cold timing (default: 3)")
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--current", help="compare this results JSON instead of running the suite")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline (default: 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many milliseconds (default: 0.05)")
+    parser.add_argument("--check-cold", action="store_true", help="also flag cold timing regressions")
+    args = parser.parse_args(argv)
+
+    if args.current:
+        with open(args.current, encoding="utf-8") as handle:
+            current = json.load(handle)
+    else:
+        current = run([int(size) for size in args.sizes.split(",")], args.iterations, args.cold_runs)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(current, handle, indent=2)
+    elif not args.baseline:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        rows = compare(baseline, current, args.threshold, args.min_delta_ms, args.check_cold)
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Cold start benchmark for the hair recommendation agent.
+
+Each scenario runs in a fresh interpreter under ``python -X importtime`` and
+times everything from importing the package to the first recommendation
+response. agent_core_framework is imported before the clock starts; it is
+a dependency outside this package and reported separately:
+
+    PYTHONPATH=src python benchmarks/startup.py
+    PYTHONPATH=src python benchmarks/startup.py --runs 10 --output startup.json
+
+Scenarios:
+
+    eager     HairRecommendationAgent()
+    lazy      HairRecommendationAgent(lazy=True)
+    snapshot  lazy, loading a precompiled rule snapshot
+    table     lazy, with a rule snapshot and a precomputed table
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+SCENARIOS = {
+    "eager": {},
+    "lazy": {"lazy": True},
+    "snapshot": {"lazy": True, "snapshot_path": "{snapshot}"},
+    "table": {"lazy": True, "snapshot_path": "{snapshot}", "table_path": "{table}"}
+}
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from agent_core_framework import AgentTask
+framework = time.perf_counter()
+from hair_recommendation_agent import HairRecommendationAgent
+agent = HairRecommendationAgent(**json.loads(sys.argv[1]))
+response = agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                   payload={"face_shape": "oval", "hair_type": "wavy"}))
+finished = time.perf_counter()
+assert response.success, response.error
+print(json.dumps({
+    "framework_ms": (framework - started) * 1000,
+    "first_recommendation_ms": (finished - framework) * 1000,
+    "numpy_loaded": "numpy" in sys.modules
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every top-level import"""
+    totals: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is shown by indentation; keep only imports made directly
+        if not name[1:].startswith(" "):
+            totals[name.strip()] = int(cumulative)
+    return totals
+
+
+def run_scenario(kwargs: Dict[str, Any], runs: int) -> Dict[str, Any]:
+    samples = []
+    imports: Dict[str, List[int]] = {}
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, json.dumps(kwargs)],
+            capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(completed.stdout))
+        for name, micros in parse_importtime(completed.stderr).items():
+            imports.setdefault(name, []).append(micros)
+
+    package_imports = {
+        name: statistics.median(values) / 1000 for name, values in imports.items()
+        if name.startswith("hair_recommendation_agent") or name in ("numpy", "asyncio")
+    }
+    return {
+        "framework_ms": statistics.median(sample["framework_ms"] for sample in samples),
+        "first_recommendation_ms": statistics.median(sample["first_recommendation_ms"] for sample in samples),
+        "first_recommendation_min_ms": min(sample["first_recommendation_ms"] for sample in samples),
+        "numpy_loaded": samples[0]["numpy_loaded"],
+        "imports_ms": dict(sorted(package_imports.items(), key=lambda item: -item[1]))
+    }
+
+
+def run(runs: int) -> Dict[str, Any]:
+    from hair_recommendation_agent.agent import HairRecommendationAgent
+    from hair_recommendation_agent.snapshot import save_snapshot
+    from hair_recommendation_agent.table import build_table
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {"snapshot": os.path.join(directory, "rules.snapshot"),
+                 "table": os.path.join(directory, "recommendations.bin")}
+        save_snapshot(paths["snapshot"])
+        agent = HairRecommendationAgent()
+        build_table(paths["table"], agent._engine, agent._get_weight_vector())
+
+        for name, kwargs in SCENARIOS.items():
+            print(f"Measuring {name} start...", file=sys.stderr)
+            kwargs = {key: value.format(**paths) if isinstance(value, str) else value
+                      for key, value in kwargs.items()}
+            results[name] = run_scenario(kwargs, runs)
+
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "runs": runs},
+        "scenarios": results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark agent import and first-request time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per scenario (default: 5)")
+    parser.add_argument("--output", help="write results JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+    print(f"{'scenario':<10}{'framework':>12}{'first rec':>12}  numpy  slowest imports")
+    for name, row in results["scenarios"].items():
+        slowest = ", ".join(f"{module} {ms:.1f}" for module, ms in list(row["imports_ms"].items())[:3])
+        print(f"{name:<10}{row['framework_ms']:>10.1f}ms{row['first_recommendation_ms']:>10.1f}ms"
+              f"  {'yes' if row['numpy_loaded'] else 'no ':<5}  {slowest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
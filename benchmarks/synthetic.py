@@ -0,0 +1,75 @@
+"""Deterministic synthetic rule data for benchmarking large catalogs."""
+import random
+from typing import Any, Dict
+
+from hair_recommendation_agent.data import (
+    FACE_SHAPE_RECOMMENDATIONS,
+    HAIR_TYPE_RECOMMENDATIONS,
+    STYLE_PROFILES,
+    AGE_GROUP_RECOMMENDATIONS,
+    GENDER_RECOMMENDATIONS
+)
+
+FACE_SHAPE_TIERS = ["excellent", "good", "fair", "avoid", None]
+HAIR_TYPE_TIERS = ["perfect", "good", "requires_styling", None, None]
+LENGTHS = ["short", "medium", "long"]
+MAINTENANCE = ["low", "medium", "high"]
+
+
+def synthetic_rules(size: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Rule data with ``size`` styles, using the shipped face shapes, hair types,
+    profiles, age groups and genders. Returns keyword arguments for RuleIndex.
+    """
+    rng = random.Random(seed)
+    styles = [f"style_{i:06d}" for i in range(size)]
+
+    face_shape_rules = {shape: {tier: [] for tier in FACE_SHAPE_TIERS if tier} for shape in FACE_SHAPE_RECOMMENDATIONS}
+    hair_type_rules = {hair: {tier: [] for tier in HAIR_TYPE_TIERS if tier} for hair in HAIR_TYPE_RECOMMENDATIONS}
+    style_profiles = {
+        name: dict(profile, recommended_styles=[]) for name, profile in STYLE_PROFILES.items()
+    }
+    age_group_rules = {group: [] for group in AGE_GROUP_RECOMMENDATIONS}
+    gender_rules = {gender: [] for gender in GENDER_RECOMMENDATIONS}
+    styles_detailed = {}
+
+    for style in styles:
+        fits = []
+        for shape, tiers in face_shape_rules.items():
+            tier = rng.choice(FACE_SHAPE_TIERS)
+            if tier:
+                tiers[tier].append(style)
+                if tier != "avoid":
+                    fits.append(shape)
+        hair_types = []
+        for hair, tiers in hair_type_rules.items():
+            tier = rng.choice(HAIR_TYPE_TIERS)
+            if tier:
+                tiers[tier].append(style)
+                hair_types.append(hair)
+        profiles = rng.sample(list(style_profiles), rng.randint(0, 3))
+        for profile in profiles:
+            style_profiles[profile]["recommended_styles"].append(style)
+        if rng.random() < 0.2:
+            age_group_rules[rng.choice(list(age_group_rules))].append(style)
+        if rng.random() < 0.2:
+            gender_rules[rng.choice(list(gender_rules))].append(style)
+
+        styles_detailed[style] = {
+            "description": f"Synthetic style {style}",
+            "face_shapes": fits,
+            "hair_types": hair_types,
+            "maintenance": rng.choice(MAINTENANCE),
+            "styling_time": f"{rng.randint(5, 20)}-{rng.randint(21, 40)} minutes",
+            "hair_lengths": sorted(rng.sample(LENGTHS, rng.randint(1, 3)), key=LENGTHS.index),
+            "style_profiles": profiles
+        }
+
+    return {
+        "face_shape_rules": face_shape_rules,
+        "hair_type_rules": hair_type_rules,
+        "style_profiles": style_profiles,
+        "styles_detailed": styles_detailed,
+        "age_group_rules": age_group_rules,
+        "gender_rules": gender_rules
+    }
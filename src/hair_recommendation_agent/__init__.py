@@ -1,9 +1,18 @@
-from .agent import HairRecommendationAgent
-
 __all__ = ["HairRecommendationAgent"]
 
-try:
-    from importlib.metadata import version
-    __version__ = version("hair-recommendation-agent")
-except ImportError:
-    __version__ = "0.1.0-dev"
\ No newline at end of file
+
+def __getattr__(name):
+    # Resolved on first access so that importing the package, or a submodule
+    # such as table or bulk, does not pay for the agent's dependencies
+    if name == "HairRecommendationAgent":
+        from .agent import HairRecommendationAgent as value
+    elif name == "__version__":
+        try:
+            from importlib.metadata import version
+            value = version("hair-recommendation-agent")
+        except ImportError:
+            value = "0.1.0-dev"
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
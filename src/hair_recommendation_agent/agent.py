@@ -1,20 +1,119 @@
+import threading
+import time
+import warnings
+from contextvars import ContextVar
 from agent_core_framework import BaseAgent, AgentTask, AgentResponse
-from typing import Dict, Any, List
-from .data import FACE_SHAPE_RECOMMENDATIONS, HAIR_TYPE_RECOMMENDATIONS, STYLE_PROFILES, HAIR_STYLES_DETAILED
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Sequence, Tuple, Union
+from .data import RuleIndex, StyleQuery
+from .data.trend_rules import TRENDING_STYLES, TREND_REASONS, SEASONAL_ADVICE, SEASONAL_TRENDS
+from .cache import LRUCache
+from .instrumentation import StageHook, StageTiming
+from .metrics import MetricsRegistry
+from .responses import PrerenderedTrending, copy_data
+from .snapshot import RuleSnapshot, compile_snapshot, load_snapshot
+from .schema import (
+    RecommendationRequest,
+    COMPONENTS,
+    DEFAULT_LIMIT,
+    MIN_SCORE,
+    FACE_SHAPE_TIER_SCORES,
+    FACE_SHAPE_NEUTRAL_SCORE,
+    HAIR_TYPE_TIER_SCORES,
+    HAIR_TYPE_NEUTRAL_SCORE,
+    ScoreBreakdown,
+    decode_cursor,
+    encode_cursor,
+    normalize_weights
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+    from .scoring import ScoringEngine
+    from .normalization import TextMatch, TextNormalizer
+    from .session import RecommendationSession
+    from .similarity import SimilarityIndex
+    from .table import RecommendationTable
+
+# Rule snapshot pinned by the request running in the current context, as an
+# (agent, snapshot) pair, so every step of a request uses the same rules
+_PINNED_RULES: ContextVar[Optional[tuple]] = ContextVar("pinned_rules", default=None)
 
 
 class HairRecommendationAgent(BaseAgent):
     """
     Specialized agent for advanced hairstyle recommendations
     using rule-based systems and scoring algorithms
+
+    Thread safety: one instance can be shared by many threads and by an
+    asyncio event loop and its executor workers. The compiled rules form an
+    immutable RuleSnapshot; each request pins the current snapshot when it
+    starts and uses it to the end, and the result cache is internally locked
+    and keyed by rule fingerprint. reload_rules() and refresh_rules() compile
+    a new snapshot on the calling thread and publish it with one attribute
+    assignment, so they can run while requests are in flight: those requests
+    finish on the old rules and later ones see the new rules.
+
+    Numpy and the scoring module are imported when live scoring is first
+    needed, so an agent answering from a precomputed table never loads them.
     """
 
-    def __init__(self):
+    # Recommendation requests over catalogs up to this size are scored
+    # directly on the event loop by aprocess() instead of in the executor
+    inline_max_styles = 1000
+
+    # process_batch() scores recommendation requests in chunks whose
+    # (requests x styles) score matrix holds at most this many values
+    batch_max_cells = 1 << 22
+
+    # Accessor building each value derived from a rule snapshot, by
+    # RuleSnapshot.derived() key, for warming new snapshots before a swap
+    _derived_accessors = {
+        "normalizer": "_normalizer",
+        "similarity": "_similarity_index",
+        "style_query": "_style_query",
+        "trending": "_trending"
+    }
+
+    # Free-text inputs resolve to the closest rule key when they match it at
+    # least this well; otherwise they are used as given
+    text_match_threshold = 0.6
+    # Style names share many words ("bob", "bangs"), so a style only
+    # resolves on a closer match
+    style_match_threshold = 0.8
+
+    def __init__(self, cache_size: int = 0, cache_ttl: Optional[float] = None,
+                 table_path: Optional[str] = None, executor: Optional["Executor"] = None,
+                 rule_index: Optional[RuleIndex] = None, snapshot_path: Optional[str] = None,
+                 lazy: bool = False, rules_source: Optional[str] = None):
+        """
+        Args:
+            cache_size: Maximum number of recommendation results to keep in an
+                LRU cache. The cache is disabled when 0.
+            cache_ttl: Optional lifetime in seconds of cached results.
+            table_path: Optional precomputed recommendation table, built with
+                ``python -m hair_recommendation_agent.table build``. Ignored
+                when missing or built from different rule data.
+            executor: Executor used by aprocess() and aprocess_many() for
+                scoring work. Defaults to the event loop's default executor.
+            rule_index: Compiled rule data to use instead of the data package.
+            snapshot_path: Optional rule snapshot, built with
+                ``python -m hair_recommendation_agent.snapshot build``, loaded
+                instead of compiling the rules. Ignored when missing, and
+                with a RuntimeWarning when invalid or built from another
+                rule source or an older version of it.
+            lazy: Defer loading and compiling the rule data until the first
+                request needs it, for short-lived processes.
+            rules_source: Optional JSON file or SQLite database to load the
+                rules from instead of the data package (see data.sources).
+                Also used by reload_rules().
+        """
         super().__init__("HairRecommendation", "1.0.0")
         self.supported_tasks = [
             "get_hairstyle_recommendations",
             "analyze_style_compatibility",
-            "get_trending_styles"
+            "get_trending_styles",
+            "get_compatibility_matrix",
+            "get_similar_styles"
         ]
 
         # Recommendation weights
@@ -22,6 +121,8 @@ class HairRecommendationAgent(BaseAgent):
             'face_shape': 0.4,
             'hair_type': 0.3,
             'personal_style': 0.2,
+            'age_suitability': 0.2,
+            'gender_suitability': 0.2,
             'trend_factor': 0.1
         }
 
@@ -40,7 +141,212 @@ class HairRecommendationAgent(BaseAgent):
             "mature": (56, 100)
         }
 
+        # Rule data compiled into lookup maps and dense score arrays,
+        # loaded by _get_rules() on first use
+        self._lazy = lazy
+        self._snapshot_path = snapshot_path
+        self._rules_source = rules_source
+        self._table_path = table_path
+        self._rules: Optional[RuleSnapshot] = None
+        # Serializes rule loading and reloads; request threads only take it
+        # while a lazy agent loads its first snapshot
+        self._rules_lock = threading.Lock()
+        if rule_index is not None:
+            self._rules = self._prepare_rules(RuleSnapshot(rule_index))
+
+        # Optional cache of recommendation response data. Values are copied
+        # in and out, so callers may change the data they receive.
+        self._cache = LRUCache(cache_size, cache_ttl) if cache_size else None
+        self._executor = executor
+
+        # Per-stage timing hooks; replaced as a whole so readers never lock
+        self._stage_hooks: tuple = ()
+
+        # Request counters, latency histograms and gauges
+        self.metrics = MetricsRegistry(self.supported_tasks)
+        # Read from the published rules only, so scraping never loads them
+        self.metrics.add_gauge("catalog_styles", "Hairstyles in the compiled catalog, 0 until it is loaded.",
+                               lambda: len(self._rules.styles) if self._rules is not None else 0)
+        self.metrics.add_gauge("cache_entries", "Recommendation results held in the cache.",
+                               lambda: len(self._cache) if self._cache is not None else 0)
+
+        if not lazy:
+            self._get_rules()
+
+    def _get_rules(self) -> RuleSnapshot:
+        """Rule snapshot of the current request, else the latest one, loaded on first use"""
+        pinned = _PINNED_RULES.get()
+        if pinned is not None and pinned[0] is self:
+            return pinned[1]
+        rules = self._rules
+        if rules is None:
+            with self._rules_lock:
+                rules = self._rules
+                if rules is None:
+                    rules = self._rules = self._prepare_rules(self._load_rules())
+        return rules
+
+    def _load_rules(self) -> RuleSnapshot:
+        if self._snapshot_path:
+            try:
+                return load_snapshot(self._snapshot_path, self._rules_source)
+            except OSError:
+                pass
+            except ValueError as e:
+                warnings.warn(f"Ignoring rule snapshot: {str(e)}", RuntimeWarning, stacklevel=2)
+        return compile_snapshot(self._rules_source)
+
+    def _prepare_rules(self, rules: RuleSnapshot) -> RuleSnapshot:
+        """Attach the matching precomputed table and, unless lazy, build the engine"""
+        if self._table_path:
+            rules.table = self._load_table(self._table_path, rules.fingerprint)
+        if not self._lazy:
+            rules.engine
+        return rules
+
+    def _call_with_rules(self, rules: RuleSnapshot, func, *args):
+        """Run func with rules pinned as the snapshot of the current request"""
+        token = _PINNED_RULES.set((self, rules))
+        try:
+            return func(*args)
+        finally:
+            _PINNED_RULES.reset(token)
+
+    @property
+    def _index(self) -> RuleIndex:
+        return self._get_rules().index
+
+    @property
+    def _engine(self) -> "ScoringEngine":
+        return self._get_rules().engine
+
+    def reload_rules(self, source: Optional[str] = None) -> bool:
+        """
+        Compile rules and atomically swap them in, without blocking requests.
+
+        Args:
+            source: JSON file or SQLite database to load the rules from, which
+                also becomes the source of later reloads. Defaults to the
+                agent's current source, or the data package.
+
+        Returns True when the rules changed. Requests already running finish
+        on the previous rules; cached results of the previous rules are
+        dropped and the precomputed table is reopened for the new rules. The
+        scoring engine and the indexes the previous rules had built (similar
+        styles, trending responses, text normalizer, style query) are rebuilt
+        on the calling thread before the swap. Raises OSError or ValueError,
+        keeping the current rules, when the source cannot be loaded.
+        """
+        with self._rules_lock:
+            source = self._rules_source if source is None else source
+            rules = compile_snapshot(source)
+            self._rules_source = source
+            current = self._rules
+            if current is not None and rules.fingerprint == current.fingerprint:
+                return False
+            # Compile everything before publishing so no request pays for it:
+            # the engine and every derived value the current rules have built
+            rules = self._prepare_rules(rules)
+            if current is not None:
+                if current.engine_loaded:
+                    rules.engine
+                for key in current.derived_keys():
+                    accessor = self._derived_accessors.get(key)
+                    if accessor is not None:
+                        self._call_with_rules(rules, getattr(self, accessor))
+            self._rules = rules
+
+        if self._cache is not None:
+            self._cache.clear()
+        return True
+
+    def refresh_rules(self) -> bool:
+        """
+        Recompile the rules from their source, the data package by default,
+        after it has been modified.
+
+        Returns True when the rules changed, in which case cached
+        recommendation results are invalidated. The StyleQuery behind
+        data.style_profiles.get_personalized_recommendations is dropped too.
+        """
+        from .data.style_profiles import refresh_style_query
+
+        refresh_style_query()
+        return self.reload_rules()
+
+    def _load_table(self, path: str, fingerprint: str) -> Optional["RecommendationTable"]:
+        """Open a precomputed table, None when it is missing, invalid or stale"""
+        # Imported here so the table module can also run as a script
+        from .table import RecommendationTable
+
+        try:
+            table = RecommendationTable(path)
+        except (OSError, ValueError):
+            return None
+        if table.fingerprint != fingerprint:
+            table.close()
+            return None
+        return table
+
+    def add_stage_hook(self, hook: StageHook) -> None:
+        """
+        Register a callable receiving a StageTiming for every processing stage.
+
+        Stages are listed in instrumentation.STAGES. Timing is skipped
+        entirely while no hook is registered. Hooks run on the thread
+        processing the request and must not raise.
+        """
+        # Requests read the tuple without locking; only the updates race
+        with self._rules_lock:
+            self._stage_hooks = self._stage_hooks + (hook,)
+
+    def remove_stage_hook(self, hook: StageHook) -> None:
+        with self._rules_lock:
+            self._stage_hooks = tuple(registered for registered in self._stage_hooks if registered is not hook)
+
+    def _end_stage(self, stage: str, started: float, styles: int) -> None:
+        self._emit_stage(StageTiming(stage, time.perf_counter() - started, styles))
+
+    def _emit_stage(self, timing: StageTiming) -> None:
+        for hook in self._stage_hooks:
+            hook(timing)
+
+    def _run_stage(self, stage: str, styles: int, func, *args):
+        if not self._stage_hooks:
+            return func(*args)
+        started = time.perf_counter()
+        result = func(*args)
+        self._end_stage(stage, started, styles)
+        return result
+
     def process(self, task: AgentTask) -> AgentResponse:
+        started = time.perf_counter()
+        response = self._call_with_rules(self._get_rules(), self._dispatch, task)
+        elapsed = time.perf_counter() - started
+        self.metrics.observe(task.type, elapsed, response.success)
+        if self._stage_hooks:
+            self._emit_stage(StageTiming("dispatch", elapsed, 0))
+        return response
+
+    def render_metrics(self) -> str:
+        """Request metrics in the Prometheus text exposition format"""
+        return self.metrics.render_prometheus()
+
+    def _observe_many(self, tasks: Sequence[AgentTask], responses: List[AgentResponse],
+                      started: float) -> None:
+        """
+        Record the recommendation tasks of a batch, each with an equal share
+        of the batch time. Other task types were recorded by process().
+        """
+        answered = [response for task, response in zip(tasks, responses)
+                    if task.type == "get_hairstyle_recommendations"]
+        if not answered:
+            return
+        share = (time.perf_counter() - started) / len(answered)
+        for response in answered:
+            self.metrics.observe("get_hairstyle_recommendations", share, response.success)
+
+    def _dispatch(self, task: AgentTask) -> AgentResponse:
         try:
             if task.type == "get_hairstyle_recommendations":
                 return self._get_hairstyle_recommendations(task.payload)
@@ -48,6 +354,10 @@ class HairRecommendationAgent(BaseAgent):
                 return self._analyze_style_compatibility(task.payload)
             elif task.type == "get_trending_styles":
                 return self._get_trending_styles(task.payload)
+            elif task.type == "get_compatibility_matrix":
+                return self._get_compatibility_matrix(task.payload)
+            elif task.type == "get_similar_styles":
+                return self._get_similar_styles(task.payload)
             else:
                 return AgentResponse(
                     success=False,
@@ -56,157 +366,689 @@ class HairRecommendationAgent(BaseAgent):
                 )
 
         except Exception as e:
-            return AgentResponse(
-                success=False,
-                error=f"Recommendation error: {str(e)}",
-                agent_name=self.name
-            )
+            return self._recommendation_error(e)
+
+    def process_batch(self, tasks: Sequence[AgentTask]) -> List[AgentResponse]:
+        """
+        Process many tasks in one call.
+
+        Recommendation requests are scored together as (requests x styles)
+        matrices of at most batch_max_cells scores each; other task types go
+        through process().
+        Responses keep the input order and errors stay per task.
+        """
+        return self._call_with_rules(self._get_rules(), self._process_batch, tasks)
+
+    def _process_batch(self, tasks: Sequence[AgentTask]) -> List[AgentResponse]:
+        started = time.perf_counter()
+        responses: List[Optional[AgentResponse]] = [None] * len(tasks)
+        pending = []
+
+        for position, task in enumerate(tasks):
+            outcome = self._respond_without_scoring(task)
+            if isinstance(outcome, AgentResponse):
+                responses[position] = outcome
+            else:
+                pending.append((position, outcome))
+
+        if pending:
+            results = self._recommend_batch([request for _, request in pending])
+            for (position, _), response in zip(pending, results):
+                responses[position] = response
+
+        self._observe_many(tasks, responses, started)
+        return responses
+
+    async def aprocess(self, task: AgentTask) -> AgentResponse:
+        """
+        Process a task from asyncio code.
+
+        Cheap tasks, cache hits, precomputed rankings and small catalogs are
+        answered inline; other scoring, and building the indexes of similar
+        styles and compatibility matrices, runs in the executor.
+        """
+        started = time.perf_counter()
+        rules = self._get_rules()
+        if self._needs_executor(task, rules):
+            import asyncio
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._call_with_rules,
+                                              rules, self.process, task)
+
+        outcome = self._call_with_rules(rules, self._respond_without_scoring, task)
+        if isinstance(outcome, AgentResponse):
+            response = outcome
+        elif (len(rules.styles) <= self.inline_max_styles
+              or self._call_with_rules(rules, self._lookup_table, outcome) is not None):
+            response = self._call_with_rules(rules, self._recommend_safely, outcome)
+        else:
+            import asyncio
+
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._executor, self._call_with_rules,
+                                                  rules, self._recommend_safely, outcome)
+
+        self._observe_many([task], [response], started)
+        return response
+
+    async def aprocess_many(self, tasks: Sequence[AgentTask], concurrency: int = 4,
+                            chunk_size: int = 256) -> List[AgentResponse]:
+        """
+        Process many tasks from asyncio code, keeping the input order.
+
+        Recommendation requests that need scoring are split into chunks of
+        chunk_size, each scored with process_batch() semantics in the
+        executor. Other tasks aprocess() would offload run there one by one.
+        At most concurrency chunks or tasks run at once.
+        """
+        import asyncio
+
+        if concurrency < 1 or chunk_size < 1:
+            raise ValueError("concurrency and chunk_size must be positive integers")
+
+        started = time.perf_counter()
+        rules = self._get_rules()
+        responses: List[Optional[AgentResponse]] = [None] * len(tasks)
+        pending = []
+        offloaded = []
+        for position, task in enumerate(tasks):
+            if self._needs_executor(task, rules):
+                offloaded.append(position)
+                continue
+            outcome = self._call_with_rules(rules, self._respond_without_scoring, task)
+            if isinstance(outcome, AgentResponse):
+                responses[position] = outcome
+            else:
+                pending.append((position, outcome))
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_task(position):
+            async with semaphore:
+                responses[position] = await loop.run_in_executor(
+                    self._executor, self._call_with_rules, rules, self.process, tasks[position]
+                )
+
+        async def run_chunk(chunk):
+            async with semaphore:
+                results = await loop.run_in_executor(
+                    self._executor, self._call_with_rules, rules, self._recommend_batch,
+                    [request for _, request in chunk]
+                )
+            for (position, _), response in zip(chunk, results):
+                responses[position] = response
+
+        await asyncio.gather(*(
+            run_chunk(pending[start:start + chunk_size])
+            for start in range(0, len(pending), chunk_size)
+        ), *map(run_task, offloaded))
+        # Offloaded tasks were recorded by process()
+        skipped = set(offloaded)
+        self._observe_many([task for position, task in enumerate(tasks) if position not in skipped],
+                           [response for position, response in enumerate(responses) if position not in skipped],
+                           started)
+        return responses
+
+    def _needs_executor(self, task: AgentTask, rules: RuleSnapshot) -> bool:
+        """
+        Whether an async task other than plain recommendation scoring is too
+        heavy for the event loop: variant rankings, similar styles and
+        compatibility matrices over large catalogs, and the first similar
+        style or matrix task, which builds its index.
+        """
+        if task.type == "get_similar_styles":
+            built = rules.has_derived("similarity")
+        elif task.type == "get_compatibility_matrix":
+            built = rules.engine_loaded
+        elif task.type == "get_hairstyle_recommendations" and 'variants' in task.payload:
+            built = True
+        else:
+            return False
+        return not built or len(rules.styles) > self.inline_max_styles
+
+    def iter_recommendations(self, payload: Dict[str, Any], offset: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield detailed recommendations one at a time, best first.
+
+        Styles are scored once when iteration starts; ranking and detail
+        records are only produced for the items actually consumed. Keep the
+        iterator to continue a listing, or pass ``offset`` (or an 'offset'
+        or 'cursor' payload field) to skip recommendations already shown
+        without building their details. The 'limit' payload field is ignored.
+        """
+        request = self._parse_recommendation_request(payload)
+        if request is None:
+            raise ValueError("Face shape and hair type are required")
+        if offset is None:
+            offset = payload.get('offset', request.offset)
+        if isinstance(offset, bool) or not isinstance(offset, int) or offset < 0:
+            raise ValueError("offset must be a non-negative integer")
+
+        return self._iter_recommendations(request, offset, self._get_rules())
+
+    def _iter_recommendations(self, request: RecommendationRequest, offset: int,
+                              rules: RuleSnapshot) -> Iterator[Dict]:
+        from .scoring import iter_ranked
+
+        # The whole listing uses the rules current when it was requested;
+        # they are pinned per step since a generator runs in its consumer's context
+        scores, candidates = self._call_with_rules(rules, self._score_request, request)
+        for index, score in iter_ranked(scores, candidates, start=offset):
+            records = self._call_with_rules(rules, self._materialize_recommendations, request, [index], [score])
+            yield records[0]
+
+    def session(self, payload: Optional[Dict[str, Any]] = None) -> "RecommendationSession":
+        """
+        Start a recommendation session for inputs that change between calls.
+
+        Each update re-scores only what its changed fields affect; see
+        RecommendationSession.
+        """
+        from .session import RecommendationSession
+        return RecommendationSession(self, payload)
 
     def get_info(self) -> Dict[str, Any]:
         base_info = super().get_info()
+        # Only the published rules: an info probe must not load a lazy
+        # agent's rules or build its indexes
+        rules = self._rules
+        client = getattr(self, "client", None)
         base_info.update({
-            "api_client": self.client.__class__.__name__,
-            "api_client_base_url": getattr(self.client, "base_url", None),
+            "api_client": client.__class__.__name__ if client is not None else None,
+            "api_client_base_url": getattr(client, "base_url", None),
+            "cache": self._cache.stats() if self._cache is not None else None,
+            "rules_loaded": rules is not None,
+            "precomputed_table": rules.table.path if rules is not None and rules.table is not None else None,
+            "rule_issues": len(rules.index.issues) if rules is not None else None,
+            "rules_fingerprint": rules.fingerprint if rules is not None else None,
+            "rules_source": rules.source if rules is not None else self._rules_source,
+            "metrics": self.metrics.snapshot(),
+            "text_normalizer": (self._normalizer().stats()
+                                if rules is not None and rules.has_derived("normalizer") else None),
             "note": "Accepts free-form descriptive hair_style and hair_color strings, and also supports structured fields: face_shape, hair_type, personal_style, age_group, gender, hair_length"
         })
         return base_info
 
     def _get_hairstyle_recommendations(self, payload: Dict[str, Any]) -> AgentResponse:
         """Get advanced hairstyle recommendations with scoring"""
-        face_shape = payload.get('face_shape')
-        hair_type = payload.get('hair_type')
-        personal_style = payload.get('personal_style', 'versatile')
-        age_group = payload.get('age_group', 'adult')
-        gender = payload.get('gender', 'unisex')
-        hair_length = payload.get('hair_length')
+        if 'variants' in payload:
+            return self._recommend_variants(payload)
+        request = self._parse_recommendation_request(payload)
 
         # Validate inputs
-        if not face_shape or not hair_type:
-            return AgentResponse(
-                success=False,
-                error="Face shape and hair type are required",
-                agent_name=self.name
-            )
+        if request is None:
+            return self._missing_recommendation_fields()
+
+        data = self._get_cached_recommendations(request)
+        if data is not None:
+            return AgentResponse(success=True, data=data, agent_name=self.name)
+
+        return self._recommend(request)
+
+    def _respond_without_scoring(self, task: AgentTask) -> Union[AgentResponse, RecommendationRequest]:
+        """
+        Answer a task unless it needs live recommendation scoring.
 
+        Returns the response, or the parsed request that still has to be scored.
+        """
+        if task.type != "get_hairstyle_recommendations":
+            return self.process(task)
+        if 'variants' in task.payload:
+            # Variant requests are ranked in one pass of their own
+            return self._dispatch(task)
+
+        try:
+            request = self._parse_recommendation_request(task.payload)
+            if request is None:
+                return self._missing_recommendation_fields()
+            data = self._get_cached_recommendations(request)
+        except Exception as e:
+            return self._recommendation_error(e)
+
+        if data is not None:
+            return AgentResponse(success=True, data=data, agent_name=self.name)
+        return request
+
+    def _recommend(self, request: RecommendationRequest) -> AgentResponse:
+        """Score, materialize and cache recommendations for one request"""
         # Generate scored recommendations
-        recommendations = self._generate_scored_recommendations(
-            face_shape, hair_type, personal_style, age_group, gender, hair_length
+        recommendations = self._generate_scored_recommendations(*request)
+        data = self._build_recommendation_data(request, recommendations)
+        self._set_cached_recommendations(request, data)
+        return AgentResponse(success=True, data=data, agent_name=self.name)
+
+    def _recommend_variants(self, payload: Dict[str, Any]) -> AgentResponse:
+        """
+        Rank a request under every weight variant of the payload in one pass.
+
+        The served variant is answered like a request with its weights; with
+        include_shadow_rankings the rankings of the other variants are added.
+        """
+        if payload.get('weights') is not None:
+            raise ValueError("Pass either weights or variants, not both")
+        # The cursor belongs to the served variant's ranking, so it is read
+        # once that variant's weights are known
+        request = self._parse_recommendation_request({key: value for key, value in payload.items()
+                                                      if key != 'cursor'})
+        if request is None:
+            return self._missing_recommendation_fields()
+
+        variants = payload['variants']
+        if not isinstance(variants, dict) or not variants:
+            raise ValueError("variants must be a non-empty object of weights keyed by variant name")
+        defaults = self._get_weight_vector()
+        weights = {name: normalize_weights(variant, defaults) for name, variant in variants.items()}
+        served = payload.get('served_variant', next(iter(variants)))
+        if served not in weights:
+            raise ValueError(f"Unknown served_variant: {served}")
+        include_shadow = payload.get('include_shadow_rankings', False)
+        if not isinstance(include_shadow, bool):
+            raise ValueError("include_shadow_rankings must be a boolean")
+
+        served_request = self._apply_cursor(request._replace(weights=weights[served]), payload)
+        request = request._replace(offset=served_request.offset)
+        names = list(weights)
+        ranked = self._rank_variants(request, [defaults if weights[name] is None else weights[name]
+                                               for name in names])
+        recommendations = self._materialize_recommendations(served_request, *ranked[names.index(served)])
+        data = self._build_recommendation_data(served_request, recommendations)
+        data["variant"] = served
+        if include_shadow:
+            styles = self._get_rules().styles
+            data["shadow_rankings"] = {
+                name: [{"style_name": styles[index], "confidence_score": round(score, 2)}
+                       for index, score in zip(*ranking)]
+                for name, ranking in zip(names, ranked) if name != served
+            }
+        return AgentResponse(success=True, data=data, agent_name=self.name)
+
+    def _recommend_safely(self, request: RecommendationRequest) -> AgentResponse:
+        try:
+            return self._recommend(request)
+        except Exception as e:
+            return self._recommendation_error(e)
+
+    def _recommend_batch(self, requests: List[RecommendationRequest]) -> List[AgentResponse]:
+        """Score requests together, keeping errors per request"""
+        try:
+            ranked = self._rank_batch(requests)
+        except Exception:
+            # Fall back to one-by-one scoring so failures stay per request
+            return [self._recommend_safely(request) for request in requests]
+
+        responses = []
+        for request, (indices, scores) in zip(requests, ranked):
+            try:
+                recommendations = self._materialize_recommendations(request, indices, scores)
+                data = self._build_recommendation_data(request, recommendations)
+                self._set_cached_recommendations(request, data)
+                responses.append(AgentResponse(success=True, data=data, agent_name=self.name))
+            except Exception as e:
+                responses.append(self._recommendation_error(e))
+        return responses
+
+    def _recommendation_error(self, error: Exception) -> AgentResponse:
+        return AgentResponse(
+            success=False,
+            error=f"Recommendation error: {str(error)}",
+            agent_name=self.name
         )
 
+    def _parse_recommendation_request(self, payload: Dict[str, Any]) -> Optional[RecommendationRequest]:
+        """Extract recommendation inputs, None when required fields are missing"""
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        resolved: List[tuple] = []
+        face_shape = self._resolve_input('face_shape', payload.get('face_shape'), resolved)
+        hair_type = self._resolve_input('hair_type', payload.get('hair_type'), resolved)
+        if not hair_type and isinstance(payload.get('hair_style'), str):
+            # A description such as "long wavy hair" stands in for a missing
+            # hair type; being another field, it is reported even when exact
+            match = self._match_input('hair_type', payload['hair_style'])
+            if match is not None:
+                hair_type = match.value
+                resolved.append(('hair_style', payload['hair_style'], match.value, match.confidence))
+
+        request = None
+        if face_shape and hair_type:
+            limit = payload.get('limit', DEFAULT_LIMIT)
+            if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+                raise ValueError("limit must be a positive integer")
+            include_components = payload.get('include_components', False)
+            if not isinstance(include_components, bool):
+                raise ValueError("include_components must be a boolean")
+            weights = payload.get('weights')
+            if weights is not None:
+                weights = normalize_weights(weights, self._get_weight_vector())
+
+            request = RecommendationRequest(
+                face_shape=face_shape,
+                hair_type=hair_type,
+                personal_style=self._resolve_input('personal_style', payload.get('personal_style', 'versatile'),
+                                                   resolved),
+                age_group=self._resolve_input('age_group', payload.get('age_group', 'adult'), resolved),
+                gender=self._resolve_input('gender', payload.get('gender', 'unisex'), resolved),
+                hair_length=self._resolve_input('hair_length', payload.get('hair_length'), resolved),
+                limit=limit,
+                include_components=include_components,
+                weights=weights
+            )
+            request = request._replace(resolved_inputs=tuple(resolved))
+            request = self._apply_cursor(request, payload)
+
+        if self._stage_hooks:
+            self._end_stage("validation", started, 0)
+        return request
+
+    def normalize_text(self, field: str, text: str) -> Optional["TextMatch"]:
+        """
+        Closest rule key to a free-text value, with its match confidence.
+
+        Args:
+            field: face_shape, hair_type, personal_style, age_group, gender,
+                hair_length, or style for style names.
+            text: Value as sent by a client, such as "Wavy hair".
+        """
+        return self._normalizer().match(field, text)
+
+    def _normalizer(self) -> "TextNormalizer":
+        """Free-text normalizer of the current rules, built on first use per snapshot"""
+        from .normalization import TextNormalizer
+
+        rules = self._get_rules()
+        return rules.derived("normalizer", lambda: TextNormalizer(rules.index))
+
+    def _match_input(self, field: str, text: str) -> Optional["TextMatch"]:
+        """Match of a free-text value, None below the field's threshold"""
+        match = self._normalizer().match(field, text)
+        threshold = self.style_match_threshold if field == 'style' else self.text_match_threshold
+        if match is None or match.confidence < threshold:
+            return None
+        return match
+
+    def _resolve_input(self, field: str, value: Any, resolved: Optional[List[tuple]] = None,
+                       key: Optional[str] = None) -> Any:
+        """
+        Rule key for a free-text value, or the value itself when none matches well.
+
+        Matches that are not exact are appended to resolved as (key, value,
+        rule key, confidence), key defaulting to field.
+        """
+        if not value or not isinstance(value, str):
+            return value
+        match = self._match_input(field, value)
+        if match is None:
+            return value
+        if resolved is not None and match.confidence < 1.0:
+            resolved.append((key or field, value, match.value, match.confidence))
+        return match.value
+
+    @staticmethod
+    def _resolved_inputs_data(resolved: Sequence[tuple]) -> Dict[str, Dict[str, Any]]:
+        """Response section naming the rule key each inexact input was read as"""
+        return {key: {"input": value, "value": match, "confidence": confidence}
+                for key, value, match, confidence in resolved}
+
+    def _apply_cursor(self, request: RecommendationRequest, payload: Dict[str, Any]) -> RecommendationRequest:
+        """Request starting at the rank of the payload's cursor, if any"""
+        cursor = payload.get('cursor')
+        if cursor is None:
+            return request
+        return request._replace(offset=decode_cursor(cursor, self._ranking_scope(request)))
+
+    def _ranking_scope(self, request: RecommendationRequest) -> tuple:
+        """Everything that orders the ranking of a request, for its cursors"""
+        return self._get_rules().fingerprint, request[:6], tuple(self._request_weights(request))
+
+    def _missing_recommendation_fields(self) -> AgentResponse:
         return AgentResponse(
-            success=True,
-            data={
-                "recommendations": recommendations,
-                "analysis": self._get_style_analysis(face_shape, hair_type, personal_style),
-                "compatibility_score": self._calculate_overall_compatibility(face_shape, hair_type),
-                "seasonal_trends": self._get_seasonal_trends(),
-                "professional_advice": self._get_professional_advice(face_shape, hair_type)
-            },
+            success=False,
+            error="Face shape and hair type are required",
             agent_name=self.name
         )
 
+    def _build_recommendation_data(self, request: RecommendationRequest,
+                                   recommendations: List[Dict]) -> Dict[str, Any]:
+        face_shape, hair_type, personal_style = request[:3]
+        # A full page may be followed by another; the one after the last is empty
+        next_cursor = None
+        if len(recommendations) == request.limit:
+            next_cursor = encode_cursor(request.offset + request.limit, self._ranking_scope(request))
+        data = {
+            "recommendations": recommendations,
+            "next_cursor": next_cursor,
+            "analysis": self._run_stage("style_analysis", 0, self._get_style_analysis,
+                                        face_shape, hair_type, personal_style),
+            "compatibility_score": self._calculate_overall_compatibility(face_shape, hair_type),
+            "seasonal_trends": self._run_stage("seasonal_trends", 0, self._get_seasonal_trends),
+            "professional_advice": self._run_stage("professional_advice", 0, self._get_professional_advice,
+                                                   face_shape, hair_type)
+        }
+        if request.resolved_inputs:
+            data["resolved_inputs"] = self._resolved_inputs_data(request.resolved_inputs)
+        return data
+
+    def _recommendation_cache_key(self, request: RecommendationRequest) -> tuple:
+        return self._get_rules().fingerprint, tuple(self._get_weight_vector()), request
+
+    def _get_cached_recommendations(self, request: RecommendationRequest) -> Optional[Dict[str, Any]]:
+        if self._cache is None:
+            return None
+        data = self._cache.get(self._recommendation_cache_key(request))
+        return copy_data(data) if data is not None else None
+
+    def _set_cached_recommendations(self, request: RecommendationRequest, data: Dict[str, Any]) -> None:
+        if self._cache is not None:
+            self._cache.set(self._recommendation_cache_key(request), copy_data(data))
+
     def _generate_scored_recommendations(self, face_shape: str, hair_type: str,
                                          personal_style: str, age_group: str,
-                                         gender: str, hair_length: str = None) -> List[Dict]:
+                                         gender: str, hair_length: str = None,
+                                         limit: int = DEFAULT_LIMIT,
+                                         include_components: bool = False,
+                                         weights: Optional[Tuple[float, ...]] = None,
+                                         offset: int = 0, resolved_inputs: tuple = ()) -> List[Dict]:
         """Generate recommendations with confidence scores"""
-        all_styles = self._get_all_possible_styles()
+        request = RecommendationRequest(face_shape, hair_type, personal_style, age_group, gender,
+                                        hair_length, limit, include_components, weights, offset,
+                                        resolved_inputs)
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        ranked = self._lookup_table(request)
+        if ranked is not None:
+            if self._stage_hooks:
+                self._end_stage("selection", started, len(ranked[0]))
+            return self._materialize_recommendations(request, *ranked)
+
+        # Imported on first live scoring; table-served agents never load numpy
+        from .scoring import select_top_k
+
+        scores, candidates = self._score_request(request)
+        # Only the winners are turned into detailed records
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        indices, top_scores = select_top_k(scores, candidates, limit, offset)
+        if self._stage_hooks:
+            self._end_stage("selection", started, int(candidates.sum()))
+        return self._materialize_recommendations(request, indices, top_scores)
+
+    def _score_request(self, request: RecommendationRequest) -> Tuple[Any, Any]:
+        """Scores of every style and the mask of styles eligible for a request"""
+        engine = self._engine
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        scores = engine.score(request.face_shape, request.hair_type, request.personal_style,
+                              request.age_group, request.gender, self._request_weights(request))
+        if self._stage_hooks:
+            self._end_stage("scoring", started, len(engine))
+            started = time.perf_counter()
+
+        candidates = scores > MIN_SCORE
+        # Apply hair length filter if specified
+        if request.hair_length:
+            candidates &= engine.length_mask(request.hair_length)
+        if self._stage_hooks:
+            self._end_stage("filtering", started, len(engine))
+        return scores, candidates
+
+    def _rank_batch(self, requests: List[RecommendationRequest]) -> List[tuple]:
+        """Top style indices and scores for each request of a batch"""
+        results = [self._lookup_table(request) for request in requests]
+        pending = [i for i, ranked in enumerate(results) if ranked is None]
+        if not pending:
+            return results
+
+        # Scored a chunk at a time, so the score matrix of a chunk holds at
+        # most batch_max_cells values whatever the batch size
+        rows = max(1, self.batch_max_cells // max(len(self._engine), 1))
+        for start in range(0, len(pending), rows):
+            self._rank_chunk(requests, pending[start:start + rows], results)
+        return results
+
+    def _rank_chunk(self, requests: List[RecommendationRequest], pending: List[int],
+                    results: List[Optional[tuple]]) -> None:
+        """Rank the requests at the pending positions into results"""
+        from .scoring import select_top_k
+
+        engine = self._engine
+        scoring = [requests[i] for i in pending]
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        if all(request.weights is None for request in scoring):
+            weights = self._get_weight_vector()
+        else:
+            weights = [self._request_weights(request) for request in scoring]
+        scores = engine.score_batch(scoring, weights)
+        if self._stage_hooks:
+            self._end_stage("scoring", started, scores.size)
+            started = time.perf_counter()
+
+        candidates = scores > MIN_SCORE
+        candidates &= engine.length_mask_batch([request.hair_length for request in scoring])
+        if self._stage_hooks:
+            self._end_stage("filtering", started, scores.size)
+            started = time.perf_counter()
+
+        for i, row_scores, row_candidates in zip(pending, scores, candidates):
+            results[i] = select_top_k(row_scores, row_candidates, requests[i].limit, requests[i].offset)
+        if self._stage_hooks:
+            self._end_stage("selection", started, int(candidates.sum()))
+
+    def _rank_variants(self, request: RecommendationRequest,
+                       weights: List[Sequence[float]]) -> List[tuple]:
+        """Top style indices and scores of a request under each weight vector"""
+        from .scoring import select_top_k
+
+        engine = self._engine
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        scores = engine.score_variants(request.face_shape, request.hair_type, request.personal_style,
+                                       request.age_group, request.gender, weights)
+        if self._stage_hooks:
+            self._end_stage("scoring", started, scores.size)
+            started = time.perf_counter()
+
+        candidates = scores > MIN_SCORE
+        if request.hair_length:
+            candidates &= engine.length_mask(request.hair_length)
+        if self._stage_hooks:
+            self._end_stage("filtering", started, scores.size)
+            started = time.perf_counter()
+
+        results = [select_top_k(row_scores, row_candidates, request.limit, request.offset)
+                   for row_scores, row_candidates in zip(scores, candidates)]
+        if self._stage_hooks:
+            self._end_stage("selection", started, int(candidates.sum()))
+        return results
+
+    def _lookup_table(self, request: RecommendationRequest) -> Optional[tuple]:
+        """Precomputed ranking for a request, None when it must be scored live"""
+        table = self._get_rules().table
+        if table is None or table.weights != tuple(self._request_weights(request)):
+            return None
+        return table.lookup(request)
+
+    def _materialize_recommendations(self, request: RecommendationRequest,
+                                     indices: Sequence[int], scores: Sequence[float]) -> List[Dict]:
+        """Build the detailed recommendation records for ranked styles"""
+        hair_type, personal_style = request.hair_type, request.personal_style
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        styles = self._get_rules().styles
         scored_recommendations = []
-
-        for style in all_styles:
-            score = self._calculate_style_score(style, face_shape, hair_type,
-                                                personal_style, age_group, gender)
-
-            # Apply hair length filter if specified
-            if hair_length and not self._check_hair_length_compatibility(style, hair_length):
-                continue
-
-            if score > 0.3:  # Minimum threshold
-                scored_recommendations.append({
-                    "style_name": style,
-                    "display_name": self._format_style_name(style),
-                    "confidence_score": round(score, 2),
-                    "face_shape_match": self._get_face_shape_match(style, face_shape),
-                    "hair_type_compatibility": self._get_hair_type_compatibility(style, hair_type),
-                    "style_alignment": self._get_style_alignment(style, personal_style),
-                    "maintenance_level": self._get_maintenance_level(style),
-                    "styling_time": self._get_styling_time(style, hair_type),
-                    "professional_rating": self._get_professional_rating(style, face_shape),
-                    "description": self._get_style_description(style)
-                })
-
-        # Sort by confidence score
-        scored_recommendations.sort(key=lambda x: x['confidence_score'], reverse=True)
-        return scored_recommendations[:8]  # Return top 8
+        for index, score in zip(indices, scores):
+            style = styles[index]
+            breakdown = self._score_breakdown(style, *request[:5])
+            recommendation = {
+                "style_name": style,
+                "display_name": self._format_style_name(style),
+                "confidence_score": round(score, 2),
+                "face_shape_match": self._face_shape_match_label(breakdown.face_shape),
+                "hair_type_compatibility": self._hair_type_compatibility_label(breakdown.hair_type),
+                "style_alignment": self._style_alignment_label(breakdown.personal_style, personal_style),
+                "maintenance_level": self._get_maintenance_level(style),
+                "styling_time": self._get_styling_time(style, hair_type),
+                "professional_rating": self._professional_rating_label(breakdown.face_shape),
+                "description": self._get_style_description(style)
+            }
+            if request.include_components:
+                recommendation["score_components"] = breakdown.as_dict()
+            scored_recommendations.append(recommendation)
+        if self._stage_hooks:
+            self._end_stage("materialization", started, len(scored_recommendations))
+        return scored_recommendations
+
+    def _get_weight_vector(self) -> List[float]:
+        """Component weights in scoring engine order"""
+        return [self.weights.get(key, 0.2) for key in COMPONENTS]
+
+    def _request_weights(self, request: RecommendationRequest) -> Sequence[float]:
+        """Weights a request is scored with"""
+        return self._get_weight_vector() if request.weights is None else request.weights
 
     def _calculate_style_score(self, style: str, face_shape: str, hair_type: str,
                                personal_style: str, age_group: str, gender: str) -> float:
         """Calculate overall score for a hairstyle"""
-        scores = {
-            'face_shape': self._get_face_shape_score(style, face_shape),
-            'hair_type': self._get_hair_type_score(style, hair_type),
-            'personal_style': self._get_personal_style_score(style, personal_style),
-            'age_suitability': self._get_age_suitability(style, age_group),
-            'gender_suitability': self._get_gender_suitability(style, gender)
-        }
-
+        started = time.perf_counter() if self._stage_hooks else 0.0
         # Weighted average
-        total_score = sum(scores[key] * self.weights.get(key, 0.2) for key in scores)
-        return min(1.0, total_score)
+        total_score = self._score_breakdown(style, face_shape, hair_type, personal_style,
+                                            age_group, gender).total(self._get_weight_vector())
+        if self._stage_hooks:
+            self._end_stage("scoring", started, 1)
+        return total_score
+
+    def _score_breakdown(self, style: str, face_shape: str, hair_type: str,
+                         personal_style: str, age_group: str, gender: str) -> ScoreBreakdown:
+        """Compute every score component of a style once"""
+        return ScoreBreakdown(
+            self._get_face_shape_score(style, face_shape),
+            self._get_hair_type_score(style, hair_type),
+            self._get_personal_style_score(style, personal_style),
+            self._get_age_suitability(style, age_group),
+            self._get_gender_suitability(style, gender)
+        )
 
     def _get_face_shape_score(self, style: str, face_shape: str) -> float:
         """Calculate face shape compatibility score"""
-        recommendations = FACE_SHAPE_RECOMMENDATIONS.get(face_shape, {})
-
-        if style in recommendations.get('excellent', []):
-            return 1.0
-        elif style in recommendations.get('good', []):
-            return 0.8
-        elif style in recommendations.get('fair', []):
-            return 0.6
-        elif style in recommendations.get('avoid', []):
-            return 0.2
-        else:
-            return 0.4  # Neutral
+        tier = self._index.face_tiers.get(face_shape, {}).get(style)
+        return FACE_SHAPE_TIER_SCORES.get(tier, FACE_SHAPE_NEUTRAL_SCORE)
 
     def _get_hair_type_score(self, style: str, hair_type: str) -> float:
         """Calculate hair type compatibility score"""
-        compatibility = HAIR_TYPE_RECOMMENDATIONS.get(hair_type, {})
-
-        if style in compatibility.get('perfect', []):
-            return 1.0
-        elif style in compatibility.get('good', []):
-            return 0.8
-        elif style in compatibility.get('requires_styling', []):
-            return 0.5
-        else:
-            return 0.3
+        tier = self._index.hair_tiers.get(hair_type, {}).get(style)
+        return HAIR_TYPE_TIER_SCORES.get(tier, HAIR_TYPE_NEUTRAL_SCORE)
 
     def _get_personal_style_score(self, style: str, personal_style: str) -> float:
         """Calculate personal style alignment score"""
         if personal_style == 'versatile':
             return 0.7  # Neutral score for versatile style
 
-        profile = STYLE_PROFILES.get(personal_style, {})
-        if style in profile.get('recommended_styles', []):
+        profiles = self._index.style_profiles.get(style)
+        if not profiles:
+            return 0.4
+        elif personal_style in profiles:
             return 1.0
         else:
-            # Check if style is compatible with any profile
-            for profile_name, profile_data in STYLE_PROFILES.items():
-                if style in profile_data.get('recommended_styles', []):
-                    return 0.6  # Somewhat compatible
-            return 0.4
+            return 0.6  # Somewhat compatible
 
     def _get_age_suitability(self, style: str, age_group: str) -> float:
         """Calculate age suitability score"""
-        # Default implementation - can be enhanced with age-specific rules
-        age_appropriate_styles = {
-            "teen": ["beach_waves", "side_swept_bangs", "messy_bun", "curtain_bangs"],
-            "young_adult": ["long_layers", "textured_bob", "blunt_bob", "soft_layers"],
-            "adult": ["soft_layers", "blunt_bob", "long_layers", "curtain_bangs"],
-            "mature": ["soft_layers", "blunt_bob", "pixie_cut", "wispy_bangs"]
-        }
-
-        if style in age_appropriate_styles.get(age_group, []):
+        if style in self._index.age_styles.get(age_group, ()):
             return 1.0
         else:
             return 0.7  # Most styles are generally appropriate
@@ -216,21 +1058,17 @@ class HairRecommendationAgent(BaseAgent):
         if gender == 'unisex':
             return 0.8
 
-        gender_specific_styles = {
-            "female": ["blunt_bob", "long_layers", "curtain_bangs", "beach_waves"],
-            "male": ["textured_crop", "fade_cut", "side_swept_bangs", "soft_layers"]
-        }
-
-        if style in gender_specific_styles.get(gender, []):
+        if style in self._index.gender_styles.get(gender, ()):
             return 1.0
         else:
             return 0.6  # Many styles are unisex
 
     def _analyze_style_compatibility(self, payload: Dict[str, Any]) -> AgentResponse:
         """Analyze compatibility of a specific hairstyle"""
-        style = payload.get('style_name')
-        face_shape = payload.get('face_shape')
-        hair_type = payload.get('hair_type')
+        resolved: List[tuple] = []
+        style = self._resolve_input('style', payload.get('style_name'), resolved, 'style_name')
+        face_shape = self._resolve_input('face_shape', payload.get('face_shape'), resolved)
+        hair_type = self._resolve_input('hair_type', payload.get('hair_type'), resolved)
 
         if not style or not face_shape or not hair_type:
             return AgentResponse(
@@ -238,15 +1076,38 @@ class HairRecommendationAgent(BaseAgent):
                 error="Style name, face shape and hair type are required",
                 agent_name=self.name
             )
+        include_components = payload.get('include_components', False)
+        if not isinstance(include_components, bool):
+            return AgentResponse(
+                success=False,
+                error="include_components must be a boolean",
+                agent_name=self.name
+            )
+        weights = self._get_weight_vector()
+        if payload.get('weights') is not None:
+            try:
+                weights = normalize_weights(payload['weights'], weights) or weights
+            except ValueError as e:
+                return AgentResponse(success=False, error=str(e), agent_name=self.name)
+
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        breakdown = self._score_breakdown(style, face_shape, hair_type, "versatile", "adult", "unisex")
+        overall_score = breakdown.total(weights)
+        if self._stage_hooks:
+            self._end_stage("scoring", started, 1)
 
         analysis = {
             "style_analysis": self._get_detailed_style_analysis(style),
-            "face_shape_compatibility": self._get_face_shape_match(style, face_shape),
+            "face_shape_compatibility": self._face_shape_match_label(breakdown.face_shape),
             "hair_type_requirements": self._get_hair_requirements(style, hair_type),
             "daily_maintenance": self._get_daily_maintenance(style, hair_type),
-            "professional_opinion": self._get_professional_opinion(style, face_shape, hair_type),
-            "overall_score": self._calculate_style_score(style, face_shape, hair_type, "versatile", "adult", "unisex")
+            "professional_opinion": self._professional_opinion_label(breakdown.face_shape, breakdown.hair_type),
+            "overall_score": overall_score
         }
+        if include_components:
+            analysis["score_components"] = breakdown.as_dict()
+        if resolved:
+            analysis["resolved_inputs"] = self._resolved_inputs_data(resolved)
 
         return AgentResponse(
             success=True,
@@ -254,19 +1115,206 @@ class HairRecommendationAgent(BaseAgent):
             agent_name=self.name
         )
 
-    def _get_trending_styles(self, payload: Dict[str, Any]) -> AgentResponse:
-        """Get currently trending hairstyles"""
-        season = payload.get('season', 'all')
+    def _get_compatibility_matrix(self, payload: Dict[str, Any]) -> AgentResponse:
+        """
+        Compatibility of every requested style with every requested face shape
+        and hair type, as analyze_style_compatibility rates a single style.
+
+        Styles default to every scored style, face shapes and hair types to
+        every value the rules know. Requested styles may be any style the
+        rules name, avoided ones included. The result is columnar:
+        overall_score is indexed [face shape][hair type][style], and the face
+        shape match and hair type requirements are codes into their lists of
+        labels, indexed [face shape][style] and [hair type][style].
+        """
+        import numpy as np
+
+        engine = self._engine
+        known = engine.input_values()
+        try:
+            styles = self._input_list(payload, 'styles', 'style', engine.styles)
+            face_shapes = self._input_list(payload, 'face_shapes', 'face_shape', known['face_shape'])
+            hair_types = self._input_list(payload, 'hair_types', 'hair_type', known['hair_type'])
+            weights = self._get_weight_vector()
+            if payload.get('weights') is not None:
+                weights = normalize_weights(payload['weights'], weights) or weights
+        except ValueError as e:
+            return AgentResponse(success=False, error=str(e), agent_name=self.name)
+        # Styles the engine does not score, such as styles every face shape
+        # avoids, are rated like analyze_style_compatibility rates them
+        index = self._index
+        scored = [position for position, style in enumerate(styles) if style in engine.style_index]
+        unscored = [position for position, style in enumerate(styles) if style not in engine.style_index]
+        unknown = [styles[position] for position in unscored if not index.names_style(styles[position])]
+        if unknown:
+            return AgentResponse(
+                success=False,
+                error=f"Unknown styles: {', '.join(unknown[:10])}",
+                agent_name=self.name
+            )
+
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        columns = np.fromiter((engine.style_index[styles[position]] for position in scored), dtype=np.intp,
+                              count=len(scored))
+        face = engine.component_matrix('face_shape', face_shapes)[:, columns]
+        hair = engine.component_matrix('hair_type', hair_types)[:, columns]
+        # Personal style, age and gender rows of the neutral profile
+        others = np.stack([row[columns] for row in engine.component_rows('', '', "versatile", "adult", "unisex")[2:]])
+        if unscored:
+            # Widen to every requested style; unscored columns are filled below
+            widened = []
+            for matrix in (face, hair, others):
+                full = np.empty((matrix.shape[0], len(styles)))
+                full[:, scored] = matrix
+                widened.append(full)
+            face, hair, others = widened
+        for position in unscored:
+            style = styles[position]
+            breakdown = self._score_breakdown(style, '', '', "versatile", "adult", "unisex")
+            face[:, position] = [self._get_face_shape_score(style, face_shape) for face_shape in face_shapes]
+            hair[:, position] = [self._get_hair_type_score(style, hair_type) for hair_type in hair_types]
+            others[:, position] = [breakdown.personal_style, breakdown.age_suitability, breakdown.gender_suitability]
+        # Accumulate in component order so every cell equals the single-style score
+        total = face[:, None, :] * weights[0] + hair[None, :, :] * weights[1]
+        for row, weight in zip(others, weights[2:]):
+            total += row * weight
+        np.minimum(total, 1.0, out=total)
+        if self._stage_hooks:
+            self._end_stage("scoring", started, total.size)
+            started = time.perf_counter()
+
+        # Labels depend on few distinct values, so each is built once
+        scores, inverse = np.unique(face.ravel(), return_inverse=True)
+        face_labels = self._encode_labels([self._face_shape_match_label(float(score)) for score in scores])
+        face_codes = np.asarray(face_labels[1], dtype=np.intp)[inverse].reshape(face.shape)
+
+        catalog = index.catalog
+        records = [catalog.record(style) for style in styles]
+        masks: Any = [record.hair_type_mask for record in records]
+        if len(catalog.bits['hair_types']) < 63:
+            masks = np.asarray(masks, dtype=np.int64)
+        high = np.fromiter((record.maintenance == 'high' for record in records), dtype=np.intp, count=len(styles))
+        requirements: Dict[tuple, int] = {}
+        requirement_codes = []
+        for hair_type in hair_types:
+            bit = catalog.bit('hair_types', hair_type)
+            if isinstance(masks, np.ndarray):
+                adapt = (masks & bit == 0).astype(np.intp)
+            else:
+                adapt = np.fromiter(((mask & bit) == 0 for mask in masks), dtype=np.intp, count=len(styles))
+            cases = adapt * 2 + high
+            lookup = np.zeros(4, dtype=np.intp)
+            for case in np.unique(cases).tolist():
+                labels = tuple(self._hair_requirements(hair_type, bool(case & 2), bool(case & 1)))
+                lookup[case] = requirements.setdefault(labels, len(requirements))
+            requirement_codes.append(lookup[cases].tolist())
+        if self._stage_hooks:
+            self._end_stage("materialization", started, total.size)
+
+        return AgentResponse(
+            success=True,
+            data={
+                "styles": list(styles),
+                "face_shapes": list(face_shapes),
+                "hair_types": list(hair_types),
+                "overall_score": total.tolist(),
+                "face_shape_match": {"labels": face_labels[0], "codes": face_codes.tolist()},
+                "hair_type_requirements": {"labels": [list(labels) for labels in requirements],
+                                           "codes": requirement_codes}
+            },
+            agent_name=self.name
+        )
 
-        trending_styles = {
-            "spring": ["curtain_bangs", "soft_layers", "beach_waves", "wispy_bangs"],
-            "summer": ["textured_bob", "messy_bun", "side_swept_bangs", "curly_shag"],
-            "fall": ["blunt_bob", "long_layers", "curtain_bangs", "soft_waves"],
-            "winter": ["layered_shag", "blunt_bob", "sleek_pony", "defined_curls"],
-            "all": ["curtain_bangs", "textured_bob", "soft_layers", "beach_waves"]
+    def _get_similar_styles(self, payload: Dict[str, Any]) -> AgentResponse:
+        """Styles most similar to a given style, for "more like this" suggestions"""
+        resolved: List[tuple] = []
+        style = self._resolve_input('style', payload.get('style_name'), resolved, 'style_name')
+        if not style:
+            return AgentResponse(success=False, error="Style name is required", agent_name=self.name)
+        limit = payload.get('limit', DEFAULT_LIMIT)
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+            return AgentResponse(success=False, error="limit must be a positive integer", agent_name=self.name)
+
+        started = time.perf_counter() if self._stage_hooks else 0.0
+        try:
+            similar = self._similarity_index().similar(style, limit)
+        except ValueError as e:
+            return AgentResponse(success=False, error=str(e), agent_name=self.name)
+        if self._stage_hooks:
+            self._end_stage("selection", started, len(similar))
+
+        data = {
+            "style_name": style,
+            "similar_styles": [{
+                "style_name": name,
+                "display_name": self._format_style_name(name),
+                "similarity": round(similarity, 2),
+                "description": self._get_style_description(name)
+            } for name, similarity in similar]
         }
+        if resolved:
+            data["resolved_inputs"] = self._resolved_inputs_data(resolved)
+        return AgentResponse(success=True, data=data, agent_name=self.name)
+
+    def _similarity_index(self) -> "SimilarityIndex":
+        """Style neighbour index of the current rules, built on first use per snapshot"""
+        from .similarity import SimilarityIndex
+
+        rules = self._get_rules()
+        return rules.derived("similarity", lambda: SimilarityIndex(rules.index, rules.styles))
+
+    def _input_list(self, payload: Dict[str, Any], key: str, field: str, default: List[str]) -> List[str]:
+        """List of free-text values of a field, resolved to rule keys"""
+        values = payload.get(key)
+        if values is None:
+            return default
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise ValueError(f"{key} must be a list of strings")
+        return [self._resolve_input(field, value) for value in values]
+
+    @staticmethod
+    def _encode_labels(labels: List[str]) -> Tuple[List[str], List[int]]:
+        """Distinct labels and the code of each input label"""
+        codes: Dict[str, int] = {}
+        encoded = [codes.setdefault(label, len(codes)) for label in labels]
+        return list(codes), encoded
 
-        styles = trending_styles.get(season, trending_styles["all"])
+    def _get_trending_styles(self, payload: Dict[str, Any]) -> AgentResponse:
+        """Get currently trending hairstyles"""
+        season = payload.get('season', 'all')
+        return AgentResponse(success=True, data=self._trending().data(season), agent_name=self.name)
+
+    def trending_json(self, season: str = 'all') -> bytes:
+        """
+        Data of the get_trending_styles response for season as UTF-8 JSON
+        bytes, pre-serialized so an HTTP layer can write it directly.
+        """
+        return self._trending().json(season)
+
+    def query_styles(self, **constraints: Any) -> List[str]:
+        """
+        Catalog styles meeting every constraint, for faceted search.
+
+        Takes the arguments of StyleQuery.mask: face_shape, hair_type (with
+        face_tiers and hair_tiers), style_profile, hair_length and catalog
+        fields such as maintenance. Raises ValueError for unknown fields.
+        """
+        return self._style_query().find(**constraints)
+
+    def _style_query(self) -> StyleQuery:
+        """Faceted style query of the current rules, built on first use per snapshot"""
+        rules = self._get_rules()
+        return rules.derived("style_query", lambda: StyleQuery(rules.index))
+
+    def _trending(self) -> PrerenderedTrending:
+        """Trending responses of the current rules, rendered once per snapshot"""
+        rules = self._get_rules()
+        return rules.derived("trending", lambda: self._call_with_rules(
+            rules, PrerenderedTrending, self._render_trending_styles, TRENDING_STYLES
+        ))
+
+    def _render_trending_styles(self, season: str) -> Dict[str, Any]:
+        styles = TRENDING_STYLES.get(season, TRENDING_STYLES["all"])
 
         detailed_trends = []
         for style in styles:
@@ -277,24 +1325,16 @@ class HairRecommendationAgent(BaseAgent):
                 "popularity_reason": self._get_trend_reason(style, season)
             })
 
-        return AgentResponse(
-            success=True,
-            data={
-                "season": season,
-                "trending_styles": detailed_trends,
-                "seasonal_advice": self._get_seasonal_advice(season)
-            },
-            agent_name=self.name
-        )
+        return {
+            "season": season,
+            "trending_styles": detailed_trends,
+            "seasonal_advice": self._get_seasonal_advice(season)
+        }
 
     # Helper methods
     def _get_all_possible_styles(self) -> List[str]:
         """Get all available hairstyles"""
-        all_styles = set()
-        for shapes in FACE_SHAPE_RECOMMENDATIONS.values():
-            for category in ['excellent', 'good', 'fair']:
-                all_styles.update(shapes.get(category, []))
-        return list(all_styles)
+        return list(self._get_rules().styles)
 
     def _format_style_name(self, style: str) -> str:
         """Format style name for display"""
@@ -302,7 +1342,10 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_face_shape_match(self, style: str, face_shape: str) -> str:
         """Get face shape match description"""
-        score = self._get_face_shape_score(style, face_shape)
+        return self._face_shape_match_label(self._get_face_shape_score(style, face_shape))
+
+    @staticmethod
+    def _face_shape_match_label(score: float) -> str:
         if score >= 0.8:
             return "Excellent compatibility"
         elif score >= 0.6:
@@ -314,7 +1357,10 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_hair_type_compatibility(self, style: str, hair_type: str) -> str:
         """Get hair type compatibility description"""
-        score = self._get_hair_type_score(style, hair_type)
+        return self._hair_type_compatibility_label(self._get_hair_type_score(style, hair_type))
+
+    @staticmethod
+    def _hair_type_compatibility_label(score: float) -> str:
         if score >= 0.8:
             return "Perfect for your hair type"
         elif score >= 0.6:
@@ -326,25 +1372,31 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_style_alignment(self, style: str, personal_style: str) -> str:
         """Get style alignment description"""
+        return self._style_alignment_label(self._get_personal_style_score(style, personal_style), personal_style)
+
+    @staticmethod
+    def _style_alignment_label(score: float, personal_style: str) -> str:
         if personal_style == 'versatile':
             return "Versatile style"
 
-        profile_styles = STYLE_PROFILES.get(personal_style, {}).get('recommended_styles', [])
-        if style in profile_styles:
+        # Only styles listing the personal style in their profiles score 1.0
+        if score == 1.0:
             return f"Perfect for {personal_style} style"
         else:
             return "Adaptable style"
 
     def _get_maintenance_level(self, style: str) -> str:
         """Get maintenance level description"""
-        style_info = HAIR_STYLES_DETAILED.get(style, {})
-        maintenance = style_info.get('maintenance', 'medium')
+        maintenance = self._index.catalog.record(style).maintenance
+        if maintenance is None:
+            maintenance = 'medium'
         return self.maintenance_levels.get(maintenance, "Moderate maintenance")
 
     def _get_styling_time(self, style: str, hair_type: str) -> str:
         """Get estimated styling time"""
-        style_info = HAIR_STYLES_DETAILED.get(style, {})
-        base_time = style_info.get('styling_time', '10-15 minutes')
+        base_time = self._index.catalog.record(style).styling_time
+        if base_time is None:
+            base_time = '10-15 minutes'
 
         # Adjust based on hair type
         if hair_type in ['curly', 'coily']:
@@ -356,7 +1408,10 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_professional_rating(self, style: str, face_shape: str) -> str:
         """Get professional rating"""
-        score = self._get_face_shape_score(style, face_shape)
+        return self._professional_rating_label(self._get_face_shape_score(style, face_shape))
+
+    @staticmethod
+    def _professional_rating_label(score: float) -> str:
         if score >= 0.9:
             return "⭐️⭐️⭐️⭐️⭐️ (Excellent)"
         elif score >= 0.7:
@@ -368,14 +1423,16 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_style_description(self, style: str) -> str:
         """Get style description"""
-        style_info = HAIR_STYLES_DETAILED.get(style, {})
-        return style_info.get('description', 'Modern and versatile style')
+        description = self._index.catalog.record(style).description
+        return 'Modern and versatile style' if description is None else description
 
     def _check_hair_length_compatibility(self, style: str, hair_length: str) -> bool:
         """Check if style is compatible with hair length"""
-        style_info = HAIR_STYLES_DETAILED.get(style, {})
-        compatible_lengths = style_info.get('hair_lengths', [])
-        return hair_length in compatible_lengths if compatible_lengths else True
+        catalog = self._index.catalog
+        compatible_lengths = catalog.record(style).hair_length_mask
+        if not compatible_lengths:
+            return True
+        return bool(compatible_lengths & catalog.bit('hair_lengths', hair_length))
 
     def _get_style_analysis(self, face_shape: str, hair_type: str, personal_style: str) -> Dict:
         """Get overall style analysis"""
@@ -392,12 +1449,8 @@ class HairRecommendationAgent(BaseAgent):
         return 0.85  # Can be enhanced with more complex logic
 
     def _get_seasonal_trends(self) -> Dict:
-        """Get seasonal trends"""
-        return {
-            "current_trends": ["curtain_bangs", "textured_bob", "soft_layers"],
-            "emerging_trends": ["micro_bangs", "wolf_cut", "butterfly_layers"],
-            "classic_styles": ["blunt_bob", "long_layers", "pixie_cut"]
-        }
+        """Get seasonal trends, copied so responses never share the rule lists"""
+        return {category: list(styles) for category, styles in SEASONAL_TRENDS.items()}
 
     def _get_professional_advice(self, face_shape: str, hair_type: str) -> str:
         """Get professional advice"""
@@ -414,24 +1467,30 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_detailed_style_analysis(self, style: str) -> Dict:
         """Get detailed analysis for a specific style"""
-        style_info = HAIR_STYLES_DETAILED.get(style, {})
+        record = self._index.catalog.record(style)
         return {
-            "description": style_info.get('description', 'Versatile style'),
-            "best_for": f"{', '.join(style_info.get('face_shapes', []))} face shapes",
-            "maintenance": style_info.get('maintenance', 'medium'),
+            "description": 'Versatile style' if record.description is None else record.description,
+            "best_for": f"{', '.join(record.face_shapes or ())} face shapes",
+            "maintenance": 'medium' if record.maintenance is None else record.maintenance,
             "styling_tips": self._get_styling_tips(style),
             "products_recommended": self._get_recommended_products(style)
         }
 
     def _get_hair_requirements(self, style: str, hair_type: str) -> List[str]:
         """Get hair requirements for a style"""
+        catalog = self._index.catalog
+        record = catalog.record(style)
+        return self._hair_requirements(hair_type,
+                                       not record.hair_type_mask & catalog.bit('hair_types', hair_type),
+                                       record.maintenance == 'high')
+
+    @staticmethod
+    def _hair_requirements(hair_type: str, needs_adaptation: bool, high_maintenance: bool) -> List[str]:
         requirements = []
-        style_info = HAIR_STYLES_DETAILED.get(style, {})
-
-        if hair_type not in style_info.get('hair_types', []):
+        if needs_adaptation:
             requirements.append(f"May require adaptation for {hair_type} hair")
 
-        if style_info.get('maintenance') == 'high':
+        if high_maintenance:
             requirements.append("Needs regular professional maintenance")
 
         return requirements if requirements else ["Low special requirements"]
@@ -443,8 +1502,8 @@ class HairRecommendationAgent(BaseAgent):
             "medium": "Occasional use of styling tools",
             "high": "Daily styling routine with products"
         }
-        style_info = HAIR_STYLES_DETAILED.get(style, {})
-        base_maintenance = maintenance_map.get(style_info.get('maintenance', 'medium'))
+        maintenance = self._index.catalog.record(style).maintenance
+        base_maintenance = maintenance_map.get('medium' if maintenance is None else maintenance)
 
         if hair_type in ['curly', 'coily']:
             return f"{base_maintenance} + definition products"
@@ -452,9 +1511,11 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_professional_opinion(self, style: str, face_shape: str, hair_type: str) -> str:
         """Get professional opinion"""
-        face_score = self._get_face_shape_score(style, face_shape)
-        hair_score = self._get_hair_type_score(style, hair_type)
+        return self._professional_opinion_label(self._get_face_shape_score(style, face_shape),
+                                                self._get_hair_type_score(style, hair_type))
 
+    @staticmethod
+    def _professional_opinion_label(face_score: float, hair_score: float) -> str:
         if face_score >= 0.8 and hair_score >= 0.8:
             return "✅ Professional recommendation: Excellent choice"
         elif face_score >= 0.6 and hair_score >= 0.6:
@@ -482,19 +1543,8 @@ class HairRecommendationAgent(BaseAgent):
 
     def _get_trend_reason(self, style: str, season: str) -> str:
         """Get reason why style is trending"""
-        reasons = {
-            "curtain_bangs": "Versatile and flattering for multiple face shapes",
-            "textured_bob": "Modern and easy to maintain",
-            "soft_layers": "Adds movement without compromising length"
-        }
-        return reasons.get(style, "Popular style for its versatility and ease")
+        return TREND_REASONS.get(style, "Popular style for its versatility and ease")
 
     def _get_seasonal_advice(self, season: str) -> str:
         """Get seasonal styling advice"""
-        advice_map = {
-            "spring": "Fresh styles that allow movement",
-            "summer": "Cuts that keep hair away from the face",
-            "fall": "Layers that add volume for cooler weather",
-            "winter": "Styles that protect from cold and dryness"
-        }
-        return advice_map.get(season, "Adapt your style to weather conditions")
\ No newline at end of file
+        return SEASONAL_ADVICE.get(season, "Adapt your style to weather conditions")
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Bulk scoring of customer profiles.
+
+Reads one get_hairstyle_recommendations payload per JSONL line from a file or
+stdin, scores the lines in chunks on a pool of worker processes, each holding
+one warm agent, and writes one JSON result per line:
+
+    python -m hair_recommendation_agent.bulk profiles.jsonl -o results.jsonl
+
+Memory use is bounded by the chunk size and the number of chunks in flight,
+whatever the input size.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import IO, Iterator, List, Optional, Sequence, Tuple
+from .responses import to_json
+
+# Agent of the current worker process
+_agent = None
+
+
+def _init_worker(cache_size: int, table_path: Optional[str]) -> None:
+    global _agent
+    from .agent import HairRecommendationAgent
+
+    _agent = HairRecommendationAgent(cache_size=cache_size, table_path=table_path)
+
+
+def _score_chunk(lines: List[Tuple[int, str]]) -> List[str]:
+    """Score numbered input lines, returning serialized result lines"""
+    from agent_core_framework import AgentTask
+
+    results: List[Optional[dict]] = [None] * len(lines)
+    tasks = []
+    positions = []
+    for position, (number, line) in enumerate(lines):
+        try:
+            payload = json.loads(line)
+            if not isinstance(payload, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            results[position] = {"line": number, "success": False, "error": f"Invalid JSON: {str(e)}"}
+            continue
+        tasks.append(AgentTask(type="get_hairstyle_recommendations", payload=payload))
+        positions.append(position)
+
+    for position, task, response in zip(positions, tasks, _agent.process_batch(tasks)):
+        result = {"line": lines[position][0]}
+        if "id" in task.payload:
+            result["id"] = task.payload["id"]
+        result["success"] = response.success
+        if response.success:
+            result["data"] = response.data
+        else:
+            result["error"] = response.error
+        results[position] = result
+
+    return [to_json(result) for result in results]
+
+
+def _read_chunks(source: IO[str], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Numbered non-blank lines, chunk_size at a time"""
+    numbered = ((number, line) for number, line in enumerate(source, start=1) if line.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(source: IO[str], sink: IO[str], workers: int = 0, chunk_size: int = 1000,
+        ordered: bool = True, cache_size: int = 0, table_path: Optional[str] = None) -> int:
+    """
+    Score every profile of source and write results to sink.
+
+    With workers=0 the lines are scored in the current process. Returns the
+    number of result lines written.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    written = 0
+    chunks = _read_chunks(source, chunk_size)
+
+    if workers < 1:
+        _init_worker(cache_size, table_path)
+        for chunk in chunks:
+            for line in _score_chunk(chunk):
+                sink.write(line + "\n")
+                written += 1
+        return written
+
+    # Two chunks per worker keep every process busy without reading ahead further
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache_size, table_path)) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(_score_chunk, chunk))
+            while len(in_flight) >= max_in_flight:
+                written += _drain(in_flight, sink, ordered)
+        while in_flight:
+            written += _drain(in_flight, sink, ordered)
+    return written
+
+
+def _drain(in_flight: deque, sink: IO[str], ordered: bool) -> int:
+    """Write the results of at least one finished chunk"""
+    if ordered:
+        done = [in_flight.popleft()]
+    else:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            in_flight.remove(future)
+
+    written = 0
+    for future in done:
+        for line in future.result():
+            sink.write(line + "\n")
+            written += 1
+    return written
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m hair_recommendation_agent.bulk",
+        description="Score JSONL customer profiles with hairstyle recommendations"
+    )
+    parser.add_argument("input", nargs="?", default="-",
+                        help="JSONL file of recommendation payloads (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes, 0 to score in this process (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="profiles per worker task (default: 1000)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results as chunks finish instead of in input order")
+    parser.add_argument("--cache-size", type=int, default=0, help="per-worker result cache size (default: 0)")
+    parser.add_argument("--table", help="precomputed recommendation table to load in each worker")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        run(source, sink, workers=args.workers, chunk_size=args.chunk_size, ordered=not args.unordered,
+            cache_size=args.cache_size, table_path=args.table)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,34 @@
-from .face_shape_rules import FACE_SHAPE_RECOMMENDATIONS
-from .hair_type_rules import HAIR_TYPE_RECOMMENDATIONS
-from .style_profiles import STYLE_PROFILES, HAIR_STYLES_DETAILED
-
-__all__ = [
-    'FACE_SHAPE_RECOMMENDATIONS',
-    'HAIR_TYPE_RECOMMENDATIONS',
-    'STYLE_PROFILES',
-    'HAIR_STYLES_DETAILED'
-]
\ No newline at end of file
+import importlib
+
+# Public names and the modules defining them, imported on first access
+_EXPORTS = {
+    'FACE_SHAPE_RECOMMENDATIONS': 'face_shape_rules',
+    'HAIR_TYPE_RECOMMENDATIONS': 'hair_type_rules',
+    'STYLE_PROFILES': 'style_profiles',
+    'HAIR_STYLES_DETAILED': 'style_profiles',
+    'AGE_GROUP_RECOMMENDATIONS': 'demographic_rules',
+    'GENDER_RECOMMENDATIONS': 'demographic_rules',
+    'TRENDING_STYLES': 'trend_rules',
+    'TREND_REASONS': 'trend_rules',
+    'SEASONAL_ADVICE': 'trend_rules',
+    'SEASONAL_TRENDS': 'trend_rules',
+    'RuleIndex': 'rule_index',
+    'StyleCatalog': 'catalog',
+    'StyleRecord': 'catalog',
+    'StyleQuery': 'style_query'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,139 @@
+from collections import abc
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+# List-valued fields of HAIR_STYLES_DETAILED entries, each stored as an
+# interned tuple plus a bitmask over the values seen in the catalog
+LIST_FIELDS = ("face_shapes", "hair_types", "hair_lengths", "style_profiles")
+SCALAR_FIELDS = ("description", "maintenance", "styling_time")
+
+# Key order of the entries built by the mapping view
+FIELD_ORDER = ("description", "face_shapes", "hair_types", "maintenance",
+               "styling_time", "hair_lengths", "style_profiles")
+
+
+class StyleRecord:
+    """
+    One catalog style.
+
+    Fields missing from the source entry are None, and their masks are 0.
+    Equal strings and tuples are shared between records.
+    """
+
+    __slots__ = (
+        "style_id", "name", "description", "maintenance", "styling_time",
+        "face_shapes", "hair_types", "hair_lengths", "style_profiles",
+        "face_shape_mask", "hair_type_mask", "hair_length_mask", "style_profile_mask",
+        "extra"
+    )
+
+    def __init__(self, style_id: int, name: str):
+        self.style_id = style_id
+        self.name = name
+        self.description: Optional[str] = None
+        self.maintenance: Optional[str] = None
+        self.styling_time: Optional[str] = None
+        self.face_shapes: Optional[Tuple[str, ...]] = None
+        self.hair_types: Optional[Tuple[str, ...]] = None
+        self.hair_lengths: Optional[Tuple[str, ...]] = None
+        self.style_profiles: Optional[Tuple[str, ...]] = None
+        self.face_shape_mask = 0
+        self.hair_type_mask = 0
+        self.hair_length_mask = 0
+        self.style_profile_mask = 0
+        # Any other keys of the source entry, kept for the dict view
+        self.extra: Optional[Dict[str, Any]] = None
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+
+# Mask slot of each list field
+_MASKS = {
+    "face_shapes": "face_shape_mask",
+    "hair_types": "hair_type_mask",
+    "hair_lengths": "hair_length_mask",
+    "style_profiles": "style_profile_mask"
+}
+
+# Returned for styles missing from the catalog, so callers need no None checks
+MISSING_STYLE = StyleRecord(-1, "")
+
+
+class StyleCatalog(abc.Mapping):
+    """
+    Compact, read-only form of HAIR_STYLES_DETAILED.
+
+    Every style gets an integer ID and a StyleRecord; list fields also get
+    bitmasks so membership tests are a single AND. As a Mapping it presents
+    the original dict-of-dicts view, building each entry on access.
+    """
+
+    def __init__(self, styles_detailed: Mapping[str, Dict[str, Any]]):
+        self.records: List[StyleRecord] = []
+        self.ids: Dict[str, int] = {}
+        # Bit of every value seen in each list field, in first-seen order
+        self.bits: Dict[str, Dict[str, int]] = {field: {} for field in LIST_FIELDS}
+
+        strings: Dict[str, str] = {}
+        tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        for name, info in styles_detailed.items():
+            record = StyleRecord(len(self.records), strings.setdefault(name, name))
+            for field, value in info.items():
+                if field in SCALAR_FIELDS and isinstance(value, str):
+                    setattr(record, field, strings.setdefault(value, value))
+                elif field in LIST_FIELDS and isinstance(value, (list, tuple)):
+                    values = tuple(strings.setdefault(item, item) for item in value)
+                    setattr(record, field, tuples.setdefault(values, values))
+                    setattr(record, _MASKS[field], self._mask(field, values))
+                else:
+                    if record.extra is None:
+                        record.extra = {}
+                    record.extra[field] = value
+            self.ids[record.name] = record.style_id
+            self.records.append(record)
+
+    def _mask(self, field: str, values: Tuple[str, ...]) -> int:
+        bits = self.bits[field]
+        mask = 0
+        for value in values:
+            bit = bits.get(value)
+            if bit is None:
+                bit = bits[value] = 1 << len(bits)
+            mask |= bit
+        return mask
+
+    def record(self, style: str) -> StyleRecord:
+        """Record of a style, MISSING_STYLE when it is not in the catalog"""
+        style_id = self.ids.get(style)
+        return MISSING_STYLE if style_id is None else self.records[style_id]
+
+    def bit(self, field: str, value: str) -> int:
+        """Bit of a list field value, 0 when no style uses it"""
+        return self.bits[field].get(value, 0)
+
+    def __getitem__(self, style: str) -> Dict[str, Any]:
+        style_id = self.ids.get(style)
+        if style_id is None:
+            raise KeyError(style)
+        record = self.records[style_id]
+        entry: Dict[str, Any] = {}
+        for field in FIELD_ORDER:
+            value = getattr(record, field)
+            if value is not None:
+                entry[field] = list(value) if field in _MASKS else value
+        if record.extra:
+            entry.update(record.extra)
+        return entry
+
+    def __contains__(self, style: object) -> bool:
+        return style in self.ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.records)
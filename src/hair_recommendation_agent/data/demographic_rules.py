@@ -0,0 +1,11 @@
+AGE_GROUP_RECOMMENDATIONS = {
+    "teen": ["beach_waves", "side_swept_bangs", "messy_bun", "curtain_bangs"],
+    "young_adult": ["long_layers", "textured_bob", "blunt_bob", "soft_layers"],
+    "adult": ["soft_layers", "blunt_bob", "long_layers", "curtain_bangs"],
+    "mature": ["soft_layers", "blunt_bob", "pixie_cut", "wispy_bangs"]
+}
+
+GENDER_RECOMMENDATIONS = {
+    "female": ["blunt_bob", "long_layers", "curtain_bangs", "beach_waves"],
+    "male": ["textured_crop", "fade_cut", "side_swept_bangs", "soft_layers"]
+}
@@ -0,0 +1,146 @@
+import hashlib
+import json
+from typing import Dict, FrozenSet, List, Mapping, Optional
+from .face_shape_rules import FACE_SHAPE_RECOMMENDATIONS
+from .hair_type_rules import HAIR_TYPE_RECOMMENDATIONS
+from .style_profiles import STYLE_PROFILES, HAIR_STYLES_DETAILED
+from .demographic_rules import AGE_GROUP_RECOMMENDATIONS, GENDER_RECOMMENDATIONS
+from .catalog import StyleCatalog
+
+# Tiers from best to worst; a style listed in several tiers takes the best one
+FACE_SHAPE_TIERS = ("excellent", "good", "fair", "avoid")
+HAIR_TYPE_TIERS = ("perfect", "good", "requires_styling")
+
+
+def rules_fingerprint(*rules: Dict) -> str:
+    """Stable hash of rule data, used to detect when compiled forms go stale"""
+    encoded = json.dumps(rules, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class RuleIndex:
+    """
+    Lookup-oriented view of the rule data, built once.
+
+    Face shape and hair type rules become style -> tier maps, style profiles
+    get a reverse style -> profiles index and the age and gender lists become
+    sets, so every per-style rule lookup is a dictionary access. Style details
+    are kept as a compact StyleCatalog, which also serves as the
+    ``styles_detailed`` mapping. Problems in the rule data found while
+    building are collected in ``issues``.
+    """
+
+    def __init__(self,
+                 face_shape_rules: Optional[Dict] = None,
+                 hair_type_rules: Optional[Dict] = None,
+                 style_profiles: Optional[Dict] = None,
+                 styles_detailed: Optional[Dict] = None,
+                 age_group_rules: Optional[Dict] = None,
+                 gender_rules: Optional[Dict] = None,
+                 strict: bool = False):
+        """
+        Args:
+            strict: Raise ValueError instead of collecting rule data issues.
+        """
+        face_shape_rules = FACE_SHAPE_RECOMMENDATIONS if face_shape_rules is None else face_shape_rules
+        hair_type_rules = HAIR_TYPE_RECOMMENDATIONS if hair_type_rules is None else hair_type_rules
+        style_profiles = STYLE_PROFILES if style_profiles is None else style_profiles
+        styles_detailed = HAIR_STYLES_DETAILED if styles_detailed is None else styles_detailed
+        age_group_rules = AGE_GROUP_RECOMMENDATIONS if age_group_rules is None else age_group_rules
+        gender_rules = GENDER_RECOMMENDATIONS if gender_rules is None else gender_rules
+
+        self.fingerprint = rules_fingerprint(face_shape_rules, hair_type_rules, style_profiles,
+                                             styles_detailed, age_group_rules, gender_rules)
+        self.issues: List[str] = []
+        # Styles already reported as missing, so each is reported once
+        self._missing_styles = set()
+        self.catalog = StyleCatalog(styles_detailed)
+        self.styles_detailed: Mapping[str, Dict] = self.catalog
+        self.profiles: Dict[str, Dict] = style_profiles
+
+        self.face_tiers: Dict[str, Dict[str, str]] = {
+            face_shape: self._compile_tiers('FACE_SHAPE_RECOMMENDATIONS', face_shape, tiers, FACE_SHAPE_TIERS)
+            for face_shape, tiers in face_shape_rules.items()
+        }
+        self.hair_tiers: Dict[str, Dict[str, str]] = {
+            hair_type: self._compile_tiers('HAIR_TYPE_RECOMMENDATIONS', hair_type, tiers, HAIR_TYPE_TIERS)
+            for hair_type, tiers in hair_type_rules.items()
+        }
+
+        style_profile_lists: Dict[str, List[str]] = {}
+        self.profile_styles: Dict[str, FrozenSet[str]] = {}
+        for profile, profile_data in style_profiles.items():
+            recommended = profile_data.get('recommended_styles', [])
+            self.profile_styles[profile] = frozenset(recommended)
+            for style in recommended:
+                style_profile_lists.setdefault(style, []).append(profile)
+                self._check_detailed(style, f"STYLE_PROFILES['{profile}']")
+        self.style_profiles: Dict[str, FrozenSet[str]] = {
+            style: frozenset(profiles) for style, profiles in style_profile_lists.items()
+        }
+
+        self.age_styles: Dict[str, FrozenSet[str]] = {
+            age_group: frozenset(styles) for age_group, styles in age_group_rules.items()
+        }
+        self.gender_styles: Dict[str, FrozenSet[str]] = {
+            gender: frozenset(styles) for gender, styles in gender_rules.items()
+        }
+        for name, rules in [('AGE_GROUP_RECOMMENDATIONS', age_group_rules),
+                            ('GENDER_RECOMMENDATIONS', gender_rules)]:
+            for key, styles in rules.items():
+                for style in styles:
+                    self._check_detailed(style, f"{name}['{key}']")
+
+        self._check_style_details(styles_detailed)
+
+        if strict and self.issues:
+            raise ValueError("Invalid rule data:\n" + "\n".join(self.issues))
+
+    def names_style(self, style: str) -> bool:
+        """Whether any rule names the style, 'avoid' tiers included"""
+        return (style in self.catalog or style in self.style_profiles
+                or any(style in tiers for tiers in self.face_tiers.values())
+                or any(style in tiers for tiers in self.hair_tiers.values())
+                or any(style in styles for styles in self.age_styles.values())
+                or any(style in styles for styles in self.gender_styles.values()))
+
+    def candidate_styles(self) -> List[str]:
+        """Styles some face shape rates above 'avoid', in rule order"""
+        candidates = {}
+        for tiers in self.face_tiers.values():
+            for style, tier in tiers.items():
+                if tier != 'avoid':
+                    candidates.setdefault(style, None)
+        return list(candidates)
+
+    def _compile_tiers(self, name: str, key: str, tiers: Dict[str, List[str]],
+                       order: tuple) -> Dict[str, str]:
+        for tier in tiers:
+            if tier not in order:
+                self.issues.append(f"{name}['{key}'] has unknown tier '{tier}'")
+
+        tier_map: Dict[str, str] = {}
+        for tier in order:
+            for style in tiers.get(tier, []):
+                if style in tier_map:
+                    self.issues.append(
+                        f"'{style}' is listed as both '{tier_map[style]}' and '{tier}' in {name}['{key}']"
+                    )
+                    continue
+                tier_map[style] = tier
+                self._check_detailed(style, f"{name}['{key}']['{tier}']")
+        return tier_map
+
+    def _check_detailed(self, style: str, source: str) -> None:
+        if style not in self.styles_detailed and style not in self._missing_styles:
+            self._missing_styles.add(style)
+            self.issues.append(f"'{style}' is referenced by {source} but missing from HAIR_STYLES_DETAILED")
+
+    def _check_style_details(self, styles_detailed: Dict) -> None:
+        for style, info in styles_detailed.items():
+            for field, known in [('face_shapes', self.face_tiers),
+                                 ('hair_types', self.hair_tiers),
+                                 ('style_profiles', self.profile_styles)]:
+                for value in info.get(field, []):
+                    if value not in known:
+                        self.issues.append(f"HAIR_STYLES_DETAILED['{style}'] has unknown {field} entry '{value}'")
@@ -0,0 +1,168 @@
+"""
+External rule sources.
+
+Rules can be loaded from a JSON file or an SQLite database instead of the
+Python literals of this package, so catalog edits need no redeploy.
+
+A JSON source is an object with any of the SECTIONS keys, each holding the
+same structure as the matching constant of this package. An SQLite source
+has a table ``rules(section TEXT, key TEXT, value TEXT)`` with one row per
+entry of a section (a face shape, a style, ...), its value encoded as JSON;
+rows are read in rowid order. Sections missing from a source fall back to
+the package data.
+
+Export the package data as a starting point with:
+
+    python -m hair_recommendation_agent.data.sources export rules.json
+    python -m hair_recommendation_agent.data.sources export rules.sqlite
+"""
+import argparse
+import json
+import os
+import pathlib
+import sys
+from typing import Any, Dict, Optional, Sequence
+from .catalog import LIST_FIELDS
+
+# RuleIndex keyword argument of each section, with the package constant it replaces
+SECTIONS = {
+    "face_shape_rules": "FACE_SHAPE_RECOMMENDATIONS",
+    "hair_type_rules": "HAIR_TYPE_RECOMMENDATIONS",
+    "style_profiles": "STYLE_PROFILES",
+    "styles_detailed": "HAIR_STYLES_DETAILED",
+    "age_group_rules": "AGE_GROUP_RECOMMENDATIONS",
+    "gender_rules": "GENDER_RECOMMENDATIONS"
+}
+
+_SQLITE_HEADER = b"SQLite format 3\0"
+
+
+def load_rules(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read rule sections from a JSON file or SQLite database.
+
+    Returns keyword arguments for RuleIndex. Raises ValueError when the
+    source is malformed or a section does not have the structure of its
+    package constant.
+    """
+    with open(path, "rb") as handle:
+        sqlite = handle.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+    rules = _load_sqlite(path) if sqlite else _load_json(path)
+
+    for section, value in rules.items():
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown rule section '{section}' in {path}")
+        if not isinstance(value, dict):
+            raise ValueError(f"Rule section '{section}' in {path} must be an object")
+        for key, entry in value.items():
+            _check_entry(section, key, entry, path)
+    return rules
+
+
+def _check_entry(section: str, key: str, entry: Any, path: str) -> None:
+    name = f"{section}['{key}'] in {path}"
+    if section in ("age_group_rules", "gender_rules"):
+        _check_styles(entry, name)
+        return
+    if not isinstance(entry, dict):
+        raise ValueError(f"{name} must be an object")
+    if section in ("face_shape_rules", "hair_type_rules"):
+        for tier, styles in entry.items():
+            _check_styles(styles, f"Tier '{tier}' of {name}")
+    elif section == "style_profiles":
+        if "recommended_styles" in entry:
+            _check_styles(entry["recommended_styles"], f"'recommended_styles' of {name}")
+    elif section == "styles_detailed":
+        for field in LIST_FIELDS:
+            if field in entry:
+                _check_styles(entry[field], f"'{field}' of {name}")
+
+
+def _check_styles(value: Any, name: str) -> None:
+    # A bare string would otherwise be iterated as its characters
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{name} must be a list of strings")
+
+
+def _load_json(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            rules = json.load(handle)
+    except ValueError as e:
+        raise ValueError(f"Invalid rule file {path}: {str(e)}") from e
+    if not isinstance(rules, dict):
+        raise ValueError(f"Rule file {path} must hold a JSON object")
+    return rules
+
+
+def _load_sqlite(path: str) -> Dict[str, Any]:
+    import sqlite3
+
+    rules: Dict[str, Dict[str, Any]] = {}
+    # Read-only needs a URI; the path is escaped so '?', '#' and '%' in it stay literal
+    connection = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        rows = connection.execute("SELECT section, key, value FROM rules ORDER BY rowid").fetchall()
+    except sqlite3.Error as e:
+        raise ValueError(f"Invalid rule database {path}: {str(e)}") from e
+    finally:
+        connection.close()
+
+    for section, key, value in rows:
+        try:
+            rules.setdefault(section, {})[key] = json.loads(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid value for {section}['{key}'] in {path}: {str(e)}") from e
+    return rules
+
+
+def export_rules(path: str, rules: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    """
+    Write rule sections, the package data by default, to a JSON file or,
+    for .db, .sqlite and .sqlite3 paths, an SQLite database.
+    """
+    if rules is None:
+        from .. import data
+
+        rules = {section: getattr(data, name) for section, name in SECTIONS.items()}
+
+    temporary = f"{path}.tmp"
+    if os.path.splitext(path)[1] in (".db", ".sqlite", ".sqlite3"):
+        import sqlite3
+
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        connection = sqlite3.connect(temporary)
+        try:
+            with connection:
+                connection.execute("CREATE TABLE rules (section TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                                   "PRIMARY KEY (section, key))")
+                connection.executemany("INSERT INTO rules (section, key, value) VALUES (?, ?, ?)", [
+                    (section, key, json.dumps(value)) for section, entries in rules.items()
+                    for key, value in entries.items()
+                ])
+        finally:
+            connection.close()
+    else:
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(rules, handle, indent=2)
+    os.replace(temporary, path)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m hair_recommendation_agent.data.sources",
+        description="Export the packaged rule data as an external rule source"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the package rules to a JSON or SQLite file")
+    export.add_argument("output", help="path of the .json or .sqlite file to write")
+    args = parser.parse_args(argv)
+
+    export_rules(args.output)
+    print(f"Wrote rules to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
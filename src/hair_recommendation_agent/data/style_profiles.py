@@ -1,5 +1,5 @@
-from hair_recommendation_agent.data.face_shape_rules import FACE_SHAPE_RECOMMENDATIONS
-from hair_recommendation_agent.data.hair_type_rules import HAIR_TYPE_RECOMMENDATIONS
+from .face_shape_rules import FACE_SHAPE_RECOMMENDATIONS
+from .hair_type_rules import HAIR_TYPE_RECOMMENDATIONS
 
 STYLE_PROFILES = {
     "professional": {
@@ -127,30 +127,51 @@ HAIR_STYLES_DETAILED = {
 }
 
 
-def get_personalized_recommendations(face_shape, hair_type, style_profile=None, hair_length=None):
-    """Get integrated recommendations based on multiple criteria"""
+# Query engine of the rule constants above and the rule objects it was built from
+_query = None
+_query_rules = None
+
+
+def refresh_style_query():
+    """
+    Drop the StyleQuery of the rule constants, so the next query sees
+    constants edited in place. Replacing a constant needs no refresh.
+    """
+    global _query, _query_rules
+    _query = _query_rules = None
 
-    face_recs = FACE_SHAPE_RECOMMENDATIONS.get(face_shape, {})
-    hair_recs = HAIR_TYPE_RECOMMENDATIONS.get(hair_type, {})
 
-    # Excellent styles for face shape
-    excellent_face = set(face_recs.get("excellent", []))
+def _style_query():
+    """StyleQuery of the rule constants, rebuilt when one of them is replaced or refreshed"""
+    global _query, _query_rules
+    rules = (FACE_SHAPE_RECOMMENDATIONS, HAIR_TYPE_RECOMMENDATIONS, STYLE_PROFILES, HAIR_STYLES_DETAILED)
+    query, built_from = _query, _query_rules
+    if query is None or any(rule is not built for rule, built in zip(rules, built_from)):
+        from .rule_index import RuleIndex
+        from .style_query import StyleQuery
 
-    # Perfect styles for hair type
-    perfect_hair = set(hair_recs.get("perfect", []))
+        query = StyleQuery(RuleIndex(*rules))
+        _query, _query_rules = query, rules
+    return query
 
-    # Intersection - best recommendations
-    best_matches = list(excellent_face.intersection(perfect_hair))
 
-    # Filter by style profile if provided
-    if style_profile and style_profile in STYLE_PROFILES:
-        profile_styles = set(STYLE_PROFILES[style_profile]["recommended_styles"])
-        best_matches = [style for style in best_matches if style in profile_styles]
+def get_personalized_recommendations(face_shape, hair_type, style_profile=None, hair_length=None):
+    """Get integrated recommendations based on multiple criteria"""
+
+    face_recs = FACE_SHAPE_RECOMMENDATIONS.get(face_shape, {})
+    hair_recs = HAIR_TYPE_RECOMMENDATIONS.get(hair_type, {})
 
-    # Filter by hair length if provided
-    if hair_length:
-        best_matches = [style for style in best_matches
-                        if hair_length in HAIR_STYLES_DETAILED.get(style, {}).get("hair_lengths", [])]
+    # Styles excellent for the face shape and perfect for the hair type,
+    # filtered by style profile and hair length if provided. Without rules
+    # for both (a missing face shape or hair type included) nothing matches.
+    best_matches = []
+    if face_recs and hair_recs:
+        best_matches = _style_query().find(
+            face_shape=face_shape,
+            hair_type=hair_type,
+            style_profile=style_profile if style_profile and style_profile in STYLE_PROFILES else None,
+            hair_length=hair_length or None
+        )
 
     return {
         "best_matches": best_matches,
@@ -0,0 +1,143 @@
+from collections import abc
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Union
+from .catalog import LIST_FIELDS, SCALAR_FIELDS
+from .rule_index import RuleIndex, FACE_SHAPE_TIERS, HAIR_TYPE_TIERS
+
+# Constraint values: one value, or several of which a style must match any
+Values = Union[Hashable, Iterable[Hashable]]
+
+# Positions of the set bits of every byte value, for decoding masks bytewise
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+
+class StyleQuery:
+    """
+    Faceted style search over bitmasks.
+
+    Every style gets a bit position, catalog styles first, then styles only
+    referenced by the rules. Each face shape tier, hair type tier, style
+    profile and catalog field value is precompiled into an integer mask of
+    the styles it covers, so any combination of constraints is a few bitwise
+    ANDs. Tiers come from the RuleIndex, where a style listed in several
+    tiers keeps the best one.
+    """
+
+    def __init__(self, index: RuleIndex):
+        catalog = index.catalog
+        self.styles: List[str] = list(catalog)
+        self._bits: Dict[str, int] = dict(catalog.ids)
+
+        self.face_tiers: Dict[str, Dict[str, int]] = {
+            face_shape: self._tier_masks(tiers, FACE_SHAPE_TIERS) for face_shape, tiers in index.face_tiers.items()
+        }
+        self.hair_tiers: Dict[str, Dict[str, int]] = {
+            hair_type: self._tier_masks(tiers, HAIR_TYPE_TIERS) for hair_type, tiers in index.hair_tiers.items()
+        }
+        self.profiles: Dict[str, int] = {
+            # Rule lists rather than sets, so bits of rule-only styles do not depend on hash order
+            profile: self._mask(index.profiles[profile].get('recommended_styles', []))
+            for profile in index.profile_styles
+        }
+
+        # Styles with each value of each catalog field, extra fields included
+        self.fields: Dict[str, Dict[Hashable, int]] = {field: {} for field in SCALAR_FIELDS + LIST_FIELDS}
+        for record in catalog.records:
+            bit = 1 << record.style_id
+            values = [(field, getattr(record, field)) for field in SCALAR_FIELDS + LIST_FIELDS]
+            values.extend((record.extra or {}).items())
+            for field, value in values:
+                if value is None:
+                    continue
+                masks = self.fields.setdefault(field, {})
+                for item in value if isinstance(value, (list, tuple)) else (value,):
+                    if isinstance(item, abc.Hashable):
+                        masks[item] = masks.get(item, 0) | bit
+
+        self.all = (1 << len(self.styles)) - 1
+
+    def _bit(self, style: str) -> int:
+        position = self._bits.get(style)
+        if position is None:
+            position = self._bits[style] = len(self.styles)
+            self.styles.append(style)
+        return 1 << position
+
+    def _mask(self, styles: Iterable[str]) -> int:
+        mask = 0
+        for style in styles:
+            mask |= self._bit(style)
+        return mask
+
+    def _tier_masks(self, tier_map: Dict[str, str], tiers: tuple) -> Dict[str, int]:
+        masks = dict.fromkeys(tiers, 0)
+        for style, tier in tier_map.items():
+            masks[tier] |= self._bit(style)
+        return masks
+
+    def field_mask(self, field: str, values: Values) -> int:
+        """Styles whose field has any of values; unknown values match nothing"""
+        masks = self.fields.get(field)
+        if masks is None:
+            raise ValueError(f"Unknown style field '{field}'")
+        if isinstance(values, str) or not isinstance(values, abc.Iterable):
+            values = (values,)
+        mask = 0
+        for value in values:
+            mask |= masks.get(value, 0)
+        return mask
+
+    def mask(self, face_shape: Optional[str] = None, hair_type: Optional[str] = None,
+             style_profile: Optional[str] = None, hair_length: Optional[str] = None,
+             face_tiers: Iterable[str] = ("excellent",), hair_tiers: Iterable[str] = ("perfect",),
+             **fields: Values) -> int:
+        """
+        Mask of the styles meeting every given constraint.
+
+        Args:
+            face_shape: Keep styles rated in one of face_tiers for this face shape.
+            hair_type: Keep styles rated in one of hair_tiers for this hair type.
+            style_profile: Keep styles recommended for this profile.
+            hair_length: Keep styles listing this hair length.
+            fields: Catalog fields, such as maintenance, and the value or
+                values to keep.
+        """
+        mask = self.all
+        if face_shape is not None:
+            tiers = self.face_tiers.get(face_shape, {})
+            mask &= self._any_tier(tiers, face_tiers)
+        if hair_type is not None:
+            tiers = self.hair_tiers.get(hair_type, {})
+            mask &= self._any_tier(tiers, hair_tiers)
+        if style_profile is not None:
+            mask &= self.profiles.get(style_profile, 0)
+        if hair_length is not None:
+            mask &= self.field_mask('hair_lengths', hair_length)
+        for field, values in fields.items():
+            mask &= self.field_mask(field, values)
+        return mask
+
+    @staticmethod
+    def _any_tier(masks: Dict[str, int], tiers: Iterable[str]) -> int:
+        mask = 0
+        for tier in tiers:
+            mask |= masks.get(tier, 0)
+        return mask
+
+    def find(self, **constraints: Any) -> List[str]:
+        """Styles meeting the constraints of mask(), in bit order"""
+        return self.decode(self.mask(**constraints))
+
+    def decode(self, mask: int) -> List[str]:
+        """Styles of a mask, in bit order"""
+        styles = []
+        data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+        for offset, byte in enumerate(data):
+            if byte:
+                base = offset * 8
+                styles.extend(self.styles[base + bit] for bit in _BYTE_BITS[byte])
+        return styles
+
+    @staticmethod
+    def count(mask: int) -> int:
+        """Number of styles in a mask"""
+        return bin(mask).count("1")
@@ -0,0 +1,26 @@
+TRENDING_STYLES = {
+    "spring": ["curtain_bangs", "soft_layers", "beach_waves", "wispy_bangs"],
+    "summer": ["textured_bob", "messy_bun", "side_swept_bangs", "curly_shag"],
+    "fall": ["blunt_bob", "long_layers", "curtain_bangs", "soft_waves"],
+    "winter": ["layered_shag", "blunt_bob", "sleek_pony", "defined_curls"],
+    "all": ["curtain_bangs", "textured_bob", "soft_layers", "beach_waves"]
+}
+
+TREND_REASONS = {
+    "curtain_bangs": "Versatile and flattering for multiple face shapes",
+    "textured_bob": "Modern and easy to maintain",
+    "soft_layers": "Adds movement without compromising length"
+}
+
+SEASONAL_ADVICE = {
+    "spring": "Fresh styles that allow movement",
+    "summer": "Cuts that keep hair away from the face",
+    "fall": "Layers that add volume for cooler weather",
+    "winter": "Styles that protect from cold and dryness"
+}
+
+SEASONAL_TRENDS = {
+    "current_trends": ["curtain_bangs", "textured_bob", "soft_layers"],
+    "emerging_trends": ["micro_bangs", "wolf_cut", "butterfly_layers"],
+    "classic_styles": ["blunt_bob", "long_layers", "pixie_cut"]
+}
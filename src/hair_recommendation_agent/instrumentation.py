@@ -0,0 +1,53 @@
+import threading
+from typing import Callable, Dict, NamedTuple
+
+# Stages reported to stage hooks, in processing order
+STAGES = (
+    "dispatch",
+    "validation",
+    "scoring",
+    "filtering",
+    "selection",
+    "materialization",
+    "style_analysis",
+    "seasonal_trends",
+    "professional_advice"
+)
+
+
+class StageTiming(NamedTuple):
+    """Duration of one processing stage and the number of styles it touched"""
+    stage: str
+    seconds: float
+    styles: int
+
+
+StageHook = Callable[[StageTiming], None]
+
+
+class StageRecorder:
+    """
+    Stage hook that aggregates call counts, time and styles per stage.
+
+    Register it with ``agent.add_stage_hook(recorder)``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def __call__(self, timing: StageTiming) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(timing.stage, {"calls": 0, "seconds": 0.0, "styles": 0})
+            totals["calls"] += 1
+            totals["seconds"] += timing.seconds
+            totals["styles"] += timing.styles
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Totals per stage, in processing order"""
+        with self._lock:
+            return {stage: dict(self._totals[stage]) for stage in STAGES if stage in self._totals}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
@@ -0,0 +1,145 @@
+import math
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Quantiles reported by snapshots and the Prometheus summaries
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Label used for task types outside the agent's supported tasks, which keeps
+# the number of label values bounded
+OTHER_TASK_TYPE = "other"
+
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR-style) histogram of durations.
+
+    Durations are recorded in whole microseconds. Values below
+    2 ** precision_bits get one bucket each; above that every power of two
+    is split into 2 ** (precision_bits - 1) equal buckets, so reported
+    quantiles are within 2 ** (1 - precision_bits) of the recorded value
+    (under 1.6% with the default 7 bits) whatever the magnitude. Not
+    thread-safe; MetricsRegistry serializes access.
+    """
+
+    def __init__(self, precision_bits: int = 7):
+        if precision_bits < 2:
+            raise ValueError("precision_bits must be at least 2")
+        self._bits = precision_bits
+        self._linear = 1 << precision_bits
+        self._half = self._linear >> 1
+        self._counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        micros = max(0, int(seconds * 1e6))
+        if micros < self._linear:
+            bucket = micros
+        else:
+            shift = micros.bit_length() - self._bits
+            bucket = shift * self._half + (micros >> shift)
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def _upper_bound(self, bucket: int) -> int:
+        """Largest value, in microseconds, falling in bucket"""
+        if bucket < self._linear:
+            return bucket
+        shift = (bucket - self._linear) // self._half + 1
+        mantissa = bucket - shift * self._half
+        return ((mantissa + 1) << shift) - 1
+
+    def quantile(self, q: float) -> float:
+        """Duration in seconds below which a fraction q of the recorded values fall"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bucket in sorted(self._counts):
+            seen += self._counts[bucket]
+            if seen >= rank:
+                return min(self._upper_bound(bucket) / 1e6, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics of an agent.
+
+    Holds request and error counters and a latency histogram per task type,
+    plus gauges read from callbacks when rendered. Safe to update from many
+    threads.
+    """
+
+    def __init__(self, task_types: Sequence[str], namespace: str = "hair_recommendation"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._task_types = tuple(task_types) + (OTHER_TASK_TYPE,)
+        self._requests = dict.fromkeys(self._task_types, 0)
+        self._errors = dict.fromkeys(self._task_types, 0)
+        self._latency = {task_type: LatencyHistogram() for task_type in self._task_types}
+        self._gauges: List[Tuple[str, str, Callable[[], float]]] = []
+
+    def add_gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Register a gauge whose value is read when metrics are rendered"""
+        self._gauges.append((name, help_text, read))
+
+    def observe(self, task_type: str, seconds: float, success: bool) -> None:
+        """Record one processed task"""
+        if task_type not in self._requests:
+            task_type = OTHER_TASK_TYPE
+        with self._lock:
+            self._requests[task_type] += 1
+            if not success:
+                self._errors[task_type] += 1
+            self._latency[task_type].record(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Counters and latency quantiles per task type that has seen requests"""
+        with self._lock:
+            snapshot = {}
+            for task_type in self._task_types:
+                if not self._requests[task_type]:
+                    continue
+                histogram = self._latency[task_type]
+                entry = {"requests": self._requests[task_type], "errors": self._errors[task_type]}
+                for q in QUANTILES:
+                    entry[f"p{int(q * 100)}"] = histogram.quantile(q)
+                snapshot[task_type] = entry
+            return snapshot
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        prefix = self.namespace
+        lines = [
+            f"# HELP {prefix}_requests_total Tasks processed, by task type.",
+            f"# TYPE {prefix}_requests_total counter"
+        ]
+        with self._lock:
+            for task_type in self._task_types:
+                lines.append(f'{prefix}_requests_total{{task_type="{task_type}"}} {self._requests[task_type]}')
+
+            lines.append(f"# HELP {prefix}_errors_total Tasks answered with success=False, by task type.")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for task_type in self._task_types:
+                lines.append(f'{prefix}_errors_total{{task_type="{task_type}"}} {self._errors[task_type]}')
+
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} Task processing time, by task type.")
+            lines.append(f"# TYPE {name} summary")
+            for task_type in self._task_types:
+                histogram = self._latency[task_type]
+                for q in QUANTILES:
+                    lines.append(f'{name}{{task_type="{task_type}",quantile="{q}"}} {histogram.quantile(q):.6f}')
+                lines.append(f'{name}_sum{{task_type="{task_type}"}} {histogram.total:.6f}')
+                lines.append(f'{name}_count{{task_type="{task_type}"}} {histogram.count}')
+
+        for gauge, help_text, read in self._gauges:
+            lines.append(f"# HELP {prefix}_{gauge} {help_text}")
+            lines.append(f"# TYPE {prefix}_{gauge} gauge")
+            lines.append(f"{prefix}_{gauge} {read()}")
+        return "\n".join(lines) + "\n"
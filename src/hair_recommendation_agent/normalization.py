@@ -0,0 +1,172 @@
+"""
+Free-text normalization of request inputs.
+
+Clients send values such as "Wavy", "wavy hair" or "Curtain Bangs" where the
+rules use keys such as wavy and curtain_bangs. Text is lowercased and split
+into words, and words that only name the field, such as "hair", are dropped.
+The words are then compared with every key of the field by their character
+bigrams, through an inverted index of each field's keys; bigrams keep a
+one-letter typo in a short word, such as "wavey", a close match.
+"""
+import math
+import re
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+from .cache import LRUCache
+from .data import RuleIndex
+
+# Fields whose values can be normalized; 'style' is a style name
+FIELDS = ("face_shape", "hair_type", "personal_style", "age_group", "gender", "hair_length", "style")
+
+# Words naming a field rather than a value, ignored unless a key is made of them
+FILLER_WORDS = frozenset({
+    "a", "an", "and", "face", "hair", "haircut", "hairstyle", "i", "is", "length", "look",
+    "my", "shape", "shaped", "style", "the", "type", "with"
+})
+
+_WORD = re.compile(r"[a-z0-9]+")
+_MISSING = object()
+
+
+class TextMatch(NamedTuple):
+    """Key a text resolved to and how closely it matched, from 0 to 1"""
+    value: str
+    confidence: float
+
+
+def words(text: str) -> Tuple[str, ...]:
+    """Lowercase words of a text, without filler words unless it has nothing else"""
+    found = _WORD.findall(text.lower())
+    kept = tuple(word for word in found if word not in FILLER_WORDS)
+    return kept or tuple(found)
+
+
+def bigrams(text_words: Iterable[str]) -> FrozenSet[str]:
+    """Character bigrams of each word, padded so word edges count"""
+    grams = set()
+    for word in text_words:
+        padded = f" {word} "
+        grams.update(padded[i:i + 2] for i in range(len(padded) - 1))
+    return frozenset(grams)
+
+
+class _FieldIndex:
+    """Bigram index of the keys of one field"""
+
+    def __init__(self, keys: List[str]):
+        self.keys = keys
+        self.exact: Dict[Tuple[str, ...], str] = {}
+        self.grams: List[FrozenSet[str]] = []
+        self.postings: Dict[str, List[int]] = {}
+        for position, key in enumerate(keys):
+            key_words = words(key)
+            self.exact.setdefault(key_words, key)
+            grams = bigrams(key_words)
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+        self.min_size = min((len(grams) for grams in self.grams), default=1)
+
+    def match(self, text: str, min_confidence: float) -> Optional[TextMatch]:
+        text_words = words(text)
+        key = self.exact.get(text_words)
+        if key is not None:
+            return TextMatch(key, 1.0)
+        grams = bigrams(text_words)
+        if not grams:
+            return None
+
+        # Confidence is the Dice coefficient 2 * shared / (len(grams) + len(key
+        # grams)), so a key reaching min_confidence shares at least `needed`
+        # bigrams and has one of the len(grams) - needed + 1 rarest. Only
+        # their postings are read; common bigrams such as " s" would list
+        # most keys.
+        needed = max(1, math.ceil(min_confidence * (len(grams) + self.min_size) / 2 - 1e-9))
+        if needed > len(grams):
+            return None
+        rarest = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))[:len(grams) - needed + 1]
+        candidates = {position for gram in rarest for position in self.postings.get(gram, ())}
+
+        best, best_confidence = None, 0.0
+        for position in sorted(candidates):
+            key_grams = self.grams[position]
+            confidence = 2 * len(grams & key_grams) / (len(grams) + len(key_grams))
+            # Equal confidences keep key order
+            if confidence > best_confidence:
+                best, best_confidence = position, confidence
+        if best is None or best_confidence < min_confidence:
+            return None
+        return TextMatch(self.keys[best], round(best_confidence, 2))
+
+
+class TextNormalizer:
+    """
+    Resolves free text to the keys the rules use, per request field.
+
+    Keys are matched as given without any lookup. Other texts are matched by
+    bigram similarity and the result, match or not, is memoized in an LRU
+    cache, so repeated client strings cost one cache hit. A field's bigram
+    index is built on its first text that is not a key.
+
+    Args:
+        index: Rules whose keys texts resolve to.
+        memo_size: Maximum number of resolved texts to keep.
+        min_confidence: Matches below this confidence are not reported,
+            which lets a lookup skip keys that cannot reach it.
+    """
+
+    def __init__(self, index: RuleIndex, memo_size: int = 4096, min_confidence: float = 0.5):
+        if not 0 < min_confidence <= 1:
+            raise ValueError("min_confidence must be in (0, 1]")
+        self.min_confidence = min_confidence
+        lengths = {}
+        for record in index.catalog.records:
+            lengths.update(dict.fromkeys(record.hair_lengths or ()))
+        self._keys: Dict[str, List[str]] = {
+            "face_shape": list(index.face_tiers),
+            "hair_type": list(index.hair_tiers),
+            "personal_style": list(index.profiles),
+            "age_group": list(index.age_styles),
+            "gender": list(dict.fromkeys(list(index.gender_styles) + ["unisex"])),
+            "hair_length": list(lengths),
+            "style": list(dict.fromkeys(list(index.catalog) + index.candidate_styles()))
+        }
+        self._known: Dict[str, FrozenSet[str]] = {field: frozenset(keys) for field, keys in self._keys.items()}
+        self._indexes: Dict[str, _FieldIndex] = {}
+        self._lock = threading.Lock()
+        self._memo = LRUCache(memo_size)
+
+    def keys(self, field: str) -> List[str]:
+        """Keys of a field, in rule order"""
+        self._check_field(field)
+        return list(self._keys[field])
+
+    def match(self, field: str, text: str) -> Optional[TextMatch]:
+        """Closest key of a field to text, None when none reaches min_confidence"""
+        self._check_field(field)
+        if text in self._known[field]:
+            return TextMatch(text, 1.0)
+
+        memo_key = (field, text)
+        found = self._memo.get(memo_key, _MISSING)
+        if found is _MISSING:
+            found = self._index(field).match(text, self.min_confidence)
+            self._memo.set(memo_key, found)
+        return found
+
+    def _index(self, field: str) -> _FieldIndex:
+        index = self._indexes.get(field)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(field)
+                if index is None:
+                    index = self._indexes[field] = _FieldIndex(self._keys[field])
+        return index
+
+    def _check_field(self, field: str) -> None:
+        if field not in self._keys:
+            raise ValueError(f"Unknown field '{field}', expected one of: {', '.join(FIELDS)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Memo cache counters"""
+        return self._memo.stats()
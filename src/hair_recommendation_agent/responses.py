@@ -0,0 +1,95 @@
+import json
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+
+def to_json(data: Any) -> str:
+    """Compact JSON text, as written by the bulk command"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_json(data: Any) -> bytes:
+    """Compact JSON of to_json as UTF-8 bytes"""
+    return to_json(data).encode('utf-8')
+
+
+def copy_data(data: Any) -> Any:
+    """
+    Copy of JSON-like response data: dicts and lists are copied at every
+    level, other values are immutable and shared.
+    """
+    kind = type(data)
+    if kind is dict:
+        return {key: copy_data(value) for key, value in data.items()}
+    if kind is list:
+        return [copy_data(value) for value in data]
+    return data
+
+
+def _shape_copier(data: Any) -> Callable[[Any], Any]:
+    """
+    Function copying values shaped like data as copy_data does, specialised
+    to that shape: dicts and lists holding only immutable values are copied
+    with one C-level call, lists of such dicts with one call per item.
+    """
+    kind = type(data)
+    if kind is dict:
+        nested = [(key, _shape_copier(value)) for key, value in data.items() if type(value) in (dict, list)]
+        if not nested:
+            return dict.copy
+
+        def copy_dict(value: Dict) -> Dict:
+            copied = value.copy()
+            for key, copy in nested:
+                copied[key] = copy(copied[key])
+            return copied
+        return copy_dict
+    if kind is list:
+        copies = {_shape_copier(item) if type(item) in (dict, list) else None for item in data}
+        if copies <= {None}:
+            return list.copy
+        if copies == {dict.copy}:
+            return lambda value: list(map(dict.copy, value))
+        return copy_data
+    return lambda value: value
+
+
+class PrerenderedTrending:
+    """
+    get_trending_styles response data, rendered once per rule snapshot.
+
+    Known seasons are rendered up front, both as response data and as JSON
+    bytes. The bytes are immutable and shared by every caller; data() hands
+    out copies made by a copier compiled for the shape of each season's
+    data, so each response owns its dicts and changing one cannot affect
+    later responses or disagree with json(). Other seasons get the fallback
+    trending list with only the echoed season changed.
+    """
+
+    def __init__(self, render: Callable[[str], Dict[str, Any]], seasons: Iterable[str],
+                 fallback: str = "all"):
+        self._data: Dict[str, Tuple[Dict[str, Any], Callable[[Any], Any]]] = {}
+        self._json: Dict[str, bytes] = {}
+        for season in seasons:
+            # Kept as decoded from its JSON, so data() and json() always agree
+            data = json.loads(encode_json(render(season)))
+            self._data[season] = data, _shape_copier(data)
+            self._json[season] = encode_json(data)
+        self._fallback = self._data[fallback]
+        # Everything after the season field, for splicing in unknown seasons
+        self._fallback_tail = encode_json({
+            key: value for key, value in self._fallback[0].items() if key != "season"
+        })[1:]
+
+    def data(self, season: str) -> Dict[str, Any]:
+        """Response data for season, a fresh copy per call"""
+        data, copy = self._data.get(season) or self._fallback
+        copied = copy(data)
+        copied["season"] = season
+        return copied
+
+    def json(self, season: str) -> bytes:
+        """Response data for season as UTF-8 JSON bytes"""
+        encoded = self._json.get(season)
+        if encoded is None:
+            encoded = b'{"season":' + encode_json(season) + b',' + self._fallback_tail
+        return encoded
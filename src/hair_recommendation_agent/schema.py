@@ -0,0 +1,145 @@
+"""Request and score definitions shared by the scoring paths, free of numpy."""
+import base64
+import binascii
+import hashlib
+import math
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+# Component order used by every score array and weight vector
+COMPONENTS = (
+    'face_shape',
+    'hair_type',
+    'personal_style',
+    'age_suitability',
+    'gender_suitability'
+)
+
+# Tier scores, mirroring the per-style scorer methods of the agent
+FACE_SHAPE_TIER_SCORES = {"excellent": 1.0, "good": 0.8, "fair": 0.6, "avoid": 0.2}
+FACE_SHAPE_NEUTRAL_SCORE = 0.4
+HAIR_TYPE_TIER_SCORES = {"perfect": 1.0, "good": 0.8, "requires_styling": 0.5}
+HAIR_TYPE_NEUTRAL_SCORE = 0.3
+
+# Default number of recommendations returned per request
+DEFAULT_LIMIT = 8
+
+# Styles are only recommended when their score is above this threshold
+MIN_SCORE = 0.3
+
+
+class RecommendationRequest(NamedTuple):
+    """Normalized inputs of a get_hairstyle_recommendations payload"""
+    face_shape: str
+    hair_type: str
+    personal_style: str
+    age_group: str
+    gender: str
+    hair_length: Optional[str]
+    limit: int = DEFAULT_LIMIT
+    include_components: bool = False
+    # Normalized component weights, None to use the agent's weights
+    weights: Optional[Tuple[float, ...]] = None
+    # Rank of the first recommendation returned, from a pagination cursor
+    offset: int = 0
+    # (payload field, input, rule key, confidence) of each free-text input
+    # that did not match its rule key exactly
+    resolved_inputs: Tuple[Tuple[str, str, str, float], ...] = ()
+
+
+def normalize_weights(weights: Any, defaults: Sequence[float]) -> Optional[Tuple[float, ...]]:
+    """
+    Validate payload weights against the agent's weight vector.
+
+    weights is either a list of numbers in COMPONENTS order or a dict keyed
+    by component, where missing components keep their default. Weights must
+    be finite and non-negative, and are scaled to the total of defaults so
+    scores stay comparable with MIN_SCORE and the 1.0 cap. Returns
+    None when the result equals defaults. Raises ValueError when invalid.
+    """
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown components in weights: {', '.join(sorted(map(str, unknown)))}")
+        values = [weights.get(key, default) for key, default in zip(COMPONENTS, defaults)]
+    elif isinstance(weights, (list, tuple)):
+        if len(weights) != len(COMPONENTS):
+            raise ValueError(f"weights must have {len(COMPONENTS)} values, one per component")
+        values = list(weights)
+    else:
+        raise ValueError("weights must be a list or an object keyed by component")
+
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                or not math.isfinite(value) or value < 0:
+            raise ValueError("weights must be finite, non-negative numbers")
+    total = sum(values)
+    if total <= 0:
+        raise ValueError("weights must not all be zero")
+
+    scale = sum(defaults) / total
+    normalized = tuple(float(value) if scale == 1.0 else value * scale for value in values)
+    return None if normalized == tuple(defaults) else normalized
+
+
+def _scope_digest(scope: Tuple) -> str:
+    # repr of strings, None and floats is the same in every process
+    return hashlib.blake2b(repr(scope).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def encode_cursor(offset: int, scope: Tuple) -> str:
+    """
+    Opaque cursor for the page starting at rank offset of a ranking.
+
+    scope identifies the ranking: the rules and every input that orders it.
+    Equal inputs give equal cursors in every process.
+    """
+    token = f"{offset}:{_scope_digest(scope)}".encode('ascii')
+    return base64.urlsafe_b64encode(token).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Any, scope: Tuple) -> int:
+    """
+    Offset of a cursor made by encode_cursor for the same scope.
+
+    Raises ValueError when the cursor is malformed, or was made for other
+    inputs or rules that have since changed.
+    """
+    if not isinstance(cursor, str):
+        raise ValueError("cursor must be a string")
+    try:
+        token = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        offset, digest = token.split(':')
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    if digest != _scope_digest(scope):
+        raise ValueError("cursor does not match this request, or the rules have changed")
+    return offset
+
+
+class ScoreBreakdown:
+    """
+    Component scores of one style for one request, in COMPONENTS order.
+
+    Computed once per style; the total and every label of a recommendation
+    are derived from it.
+    """
+
+    __slots__ = COMPONENTS
+
+    def __init__(self, face_shape: float, hair_type: float, personal_style: float,
+                 age_suitability: float, gender_suitability: float):
+        self.face_shape = face_shape
+        self.hair_type = hair_type
+        self.personal_style = personal_style
+        self.age_suitability = age_suitability
+        self.gender_suitability = gender_suitability
+
+    def total(self, weights: Sequence[float]) -> float:
+        """Weighted score capped at 1.0, weights in COMPONENTS order"""
+        return min(1.0, sum(getattr(self, key) * weight for key, weight in zip(COMPONENTS, weights)))
+
+    def as_dict(self) -> Dict[str, float]:
+        return {key: getattr(self, key) for key in COMPONENTS}
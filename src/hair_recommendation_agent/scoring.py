@@ -0,0 +1,268 @@
+import numpy as np
+from typing import Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+from .data import RuleIndex, StyleCatalog
+from .schema import (
+    COMPONENTS,
+    FACE_SHAPE_TIER_SCORES,
+    FACE_SHAPE_NEUTRAL_SCORE,
+    HAIR_TYPE_TIER_SCORES,
+    HAIR_TYPE_NEUTRAL_SCORE,
+    DEFAULT_LIMIT,
+    RecommendationRequest
+)
+
+
+def _ranked_positions(keys: np.ndarray, end: int) -> np.ndarray:
+    """
+    Positions of the end smallest keys in ascending key order, ties in
+    position order.
+
+    A linear-time partition finds the end-th key; everything strictly
+    smaller, then ties at that boundary in position order, is then sorted.
+    """
+    if end < len(keys):
+        boundary = keys[np.argpartition(keys, end - 1)[end - 1]]
+        better = np.flatnonzero(keys < boundary)
+        ties = np.flatnonzero(keys == boundary)[:end - len(better)]
+        top = np.concatenate([better, ties])
+    else:
+        top = np.arange(len(keys))
+    return top[np.lexsort((top, keys[top]))]
+
+
+def select_top_k(scores: np.ndarray, candidates: np.ndarray, k: int,
+                 offset: int = 0) -> Tuple[List[int], List[float]]:
+    """
+    Pick the k best candidate styles after the first offset.
+
+    Returns style indices and scores in descending score order; equal scores
+    keep catalog order, so every page of a ranking is stable.
+    """
+    indices = np.flatnonzero(candidates)
+    if offset >= len(indices):
+        return [], []
+    top = indices[_ranked_positions(-scores[indices], offset + k)[offset:]]
+    return top.tolist(), scores[top].tolist()
+
+
+def iter_ranked(scores: np.ndarray, candidates: np.ndarray, start: int = 0,
+                block_size: int = DEFAULT_LIMIT) -> Iterator[Tuple[int, float]]:
+    """
+    Lazily yield (style index, score) pairs in descending score order.
+
+    Ranks are computed in blocks that double in size, each with a linear-time
+    partition, so the first items cost O(styles) however long the ranking is.
+    The first start ranks are skipped. Equal scores keep catalog order.
+    """
+    indices = np.flatnonzero(candidates)
+    keys = -scores[indices]
+    end = start
+    while end < len(indices):
+        end = min(len(indices), max(end + block_size, start + block_size))
+        block_size *= 2
+
+        order = _ranked_positions(keys, end)
+        for position in order[start:end].tolist():
+            yield int(indices[position]), -float(keys[position])
+        start = end
+
+
+class ScoringEngine:
+    """
+    Compiled, array-backed form of the recommendation rules.
+
+    Every component score is precomputed into a dense matrix indexed by
+    (input value, style), with one extra trailing row holding the score used
+    for values the rules do not know about. Scoring a request is then a
+    weighted sum of five gathered rows.
+    """
+
+    def __init__(self, index: Optional[RuleIndex] = None):
+        index = RuleIndex() if index is None else index
+        self.fingerprint = index.fingerprint
+
+        # Candidate styles: everything a face shape does not explicitly avoid
+        self.styles: List[str] = index.candidate_styles()
+        self.style_index: Dict[str, int] = {style: i for i, style in enumerate(self.styles)}
+
+        self._face_keys, self._face_scores = self._compile_tiers(
+            index.face_tiers, FACE_SHAPE_TIER_SCORES, FACE_SHAPE_NEUTRAL_SCORE
+        )
+        self._hair_keys, self._hair_scores = self._compile_tiers(
+            index.hair_tiers, HAIR_TYPE_TIER_SCORES, HAIR_TYPE_NEUTRAL_SCORE
+        )
+        self._profile_keys, self._profile_scores = self._compile_profiles(index)
+        self._age_keys, self._age_scores = self._compile_memberships(
+            index.age_styles, hit=1.0, miss=0.7
+        )
+        self._gender_keys, self._gender_scores = self._compile_memberships(
+            index.gender_styles, hit=1.0, miss=0.6, neutral={'unisex': 0.8}
+        )
+        self._length_keys, self._length_masks = self._compile_lengths(index.catalog)
+
+    def __len__(self) -> int:
+        return len(self.styles)
+
+    def input_values(self) -> Dict[str, List[str]]:
+        """Every input value the rules know about, per request field"""
+        return {
+            "face_shape": list(self._face_keys),
+            "hair_type": list(self._hair_keys),
+            "personal_style": list(self._profile_keys),
+            "age_group": list(self._age_keys),
+            "gender": list(self._gender_keys),
+            "hair_length": list(self._length_keys)
+        }
+
+    def component_rows(self, face_shape: str, hair_type: str, personal_style: str,
+                       age_group: str, gender: str) -> Tuple[np.ndarray, ...]:
+        """Gather the per-style score row of each component for one request"""
+        return (
+            self._face_scores[self._face_keys.get(face_shape, -1)],
+            self._hair_scores[self._hair_keys.get(hair_type, -1)],
+            self._profile_scores[self._profile_keys.get(personal_style, -1)],
+            self._age_scores[self._age_keys.get(age_group, -1)],
+            self._gender_scores[self._gender_keys.get(gender, -1)]
+        )
+
+    def score(self, face_shape: str, hair_type: str, personal_style: str,
+              age_group: str, gender: str, weights: Sequence[float]) -> np.ndarray:
+        """Weighted, capped score of every style for one request"""
+        rows = self.component_rows(face_shape, hair_type, personal_style, age_group, gender)
+        # Accumulate in component order so results match the scalar scorer exactly
+        total = rows[0] * weights[0]
+        for row, weight in zip(rows[1:], weights[1:]):
+            total += row * weight
+        return np.minimum(total, 1.0, out=total)
+
+    def score_variants(self, face_shape: str, hair_type: str, personal_style: str,
+                       age_group: str, gender: str, weights: Sequence[Sequence[float]]) -> np.ndarray:
+        """
+        Weighted, capped scores of one request under several weight vectors,
+        as a (variants x styles) matrix.
+
+        The component rows are gathered once and multiplied by the
+        (variants x components) weight matrix, accumulating in component
+        order so each row equals score() with the same weights.
+        """
+        rows = self.component_rows(face_shape, hair_type, personal_style, age_group, gender)
+        weights = np.asarray(weights, dtype=float)
+        total = rows[0] * weights[:, 0, None]
+        for column, row in enumerate(rows[1:], start=1):
+            total += row * weights[:, column, None]
+        return np.minimum(total, 1.0, out=total)
+
+    def component_matrix(self, component: str, values: Sequence[str]) -> np.ndarray:
+        """Score rows of one component for several input values, as a (values x styles) matrix"""
+        keys, scores = dict(zip(COMPONENTS, self._component_tables()))[component]
+        return scores[self._lookup(keys, values)]
+
+    def length_mask(self, hair_length: str) -> np.ndarray:
+        """Boolean mask of the styles compatible with a hair length"""
+        return self._length_masks[self._length_keys.get(hair_length, -1)]
+
+    def score_batch(self, requests: Sequence[RecommendationRequest],
+                    weights: Sequence) -> np.ndarray:
+        """
+        Weighted, capped scores as a (requests x styles) matrix.
+
+        weights is one weight vector shared by every request, or a sequence
+        of one vector per request.
+        """
+        weights = np.asarray(weights, dtype=float)
+        if weights.ndim == 2:
+            # One column of per-request weights, broadcast along each row
+            weights = weights.T[:, :, None]
+        total = None
+        for column, ((keys, scores), weight) in enumerate(zip(self._component_tables(), weights)):
+            rows = scores[self._lookup(keys, [request[column] for request in requests])]
+            if total is None:
+                total = rows * weight
+            else:
+                total += rows * weight
+        return np.minimum(total, 1.0, out=total)
+
+    def length_mask_batch(self, hair_lengths: Sequence[Optional[str]]) -> np.ndarray:
+        """Boolean (requests x styles) mask, all True where no length is given"""
+        masks = self._length_masks[self._lookup(self._length_keys, hair_lengths)]
+        masks[[not length for length in hair_lengths]] = True
+        return masks
+
+    def _component_tables(self) -> Tuple[Tuple[Dict[str, int], np.ndarray], ...]:
+        """Input value keys and score matrix of each component, in COMPONENTS order"""
+        return (
+            (self._face_keys, self._face_scores),
+            (self._hair_keys, self._hair_scores),
+            (self._profile_keys, self._profile_scores),
+            (self._age_keys, self._age_scores),
+            (self._gender_keys, self._gender_scores)
+        )
+
+    @staticmethod
+    def _lookup(keys: Dict[str, int], values: Sequence) -> np.ndarray:
+        return np.fromiter((keys.get(value, -1) for value in values), dtype=np.intp, count=len(values))
+
+    # Compilation helpers
+    def _compile_tiers(self, tier_maps: Dict[str, Dict[str, str]],
+                       tier_scores: Dict[str, float],
+                       neutral: float) -> Tuple[Dict[str, int], np.ndarray]:
+        keys = {key: i for i, key in enumerate(tier_maps)}
+        scores = np.full((len(keys) + 1, len(self.styles)), neutral)
+        for key, row in keys.items():
+            for style, tier in tier_maps[key].items():
+                index = self.style_index.get(style)
+                if index is not None:
+                    scores[row, index] = tier_scores[tier]
+        return keys, scores
+
+    def _compile_profiles(self, rule_index: RuleIndex) -> Tuple[Dict[str, int], np.ndarray]:
+        keys = {key: i for i, key in enumerate(rule_index.profile_styles)}
+        in_any_profile = np.array([style in rule_index.style_profiles for style in self.styles], dtype=bool)
+
+        base = np.where(in_any_profile, 0.6, 0.4)
+        scores = np.tile(base, (len(keys) + 1, 1))
+        for key, row in keys.items():
+            for style in rule_index.profile_styles[key]:
+                index = self.style_index.get(style)
+                if index is not None:
+                    scores[row, index] = 1.0
+
+        # 'versatile' is scored neutrally whatever its profile lists
+        if 'versatile' not in keys:
+            keys['versatile'] = len(keys)
+            scores = np.vstack([scores[:-1], base, scores[-1:]])
+        scores[keys['versatile']] = 0.7
+        return keys, scores
+
+    def _compile_memberships(self, rules: Dict[str, FrozenSet[str]], hit: float, miss: float,
+                             neutral: Optional[Dict[str, float]] = None
+                             ) -> Tuple[Dict[str, int], np.ndarray]:
+        neutral = neutral or {}
+        keys = {key: i for i, key in enumerate(list(rules) + [k for k in neutral if k not in rules])}
+        scores = np.full((len(keys) + 1, len(self.styles)), miss)
+        for key, row in keys.items():
+            if key in neutral:
+                scores[row] = neutral[key]
+                continue
+            for style in rules[key]:
+                index = self.style_index.get(style)
+                if index is not None:
+                    scores[row, index] = hit
+        return keys, scores
+
+    def _compile_lengths(self, catalog: StyleCatalog) -> Tuple[Dict[str, int], np.ndarray]:
+        records = [catalog.record(style) for style in self.styles]
+        lengths = {}
+        for record in records:
+            for length in record.hair_lengths or ():
+                lengths.setdefault(length, len(lengths))
+
+        # Styles without length information are compatible with every length
+        masks = np.zeros((len(lengths) + 1, len(self.styles)), dtype=bool)
+        for index, record in enumerate(records):
+            compatible = record.hair_lengths or ()
+            if not compatible:
+                masks[:, index] = True
+            for length in compatible:
+                masks[lengths[length], index] = True
+        return lengths, masks
@@ -0,0 +1,158 @@
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from agent_core_framework import AgentResponse
+from .instrumentation import StageTiming
+from .responses import copy_data
+from .schema import COMPONENTS, MIN_SCORE, RecommendationRequest
+
+if TYPE_CHECKING:
+    import numpy as np
+    from .agent import HairRecommendationAgent
+    from .snapshot import RuleSnapshot
+
+
+class RecommendationSession:
+    """
+    Recommendations for one customer whose inputs change a field at a time.
+
+    The weighted per-style score of every component is kept between calls, so
+    an update recomputes only the components whose input changed; a new hair
+    length or limit only re-runs filtering and top-k selection. Recommendation
+    records are reused while the inputs they describe stay the same; each
+    response gets its own copies. Responses equal those of
+    get_hairstyle_recommendations for the same payload. A rule reload is
+    picked up on the next call. Not thread-safe: use one session per customer.
+    """
+
+    def __init__(self, agent: "HairRecommendationAgent", payload: Optional[Dict[str, Any]] = None):
+        self._agent = agent
+        self._payload: Dict[str, Any] = dict(payload or {})
+        self._reset()
+
+    def _reset(self) -> None:
+        self._rules: Optional["RuleSnapshot"] = None
+        self._request: Optional[RecommendationRequest] = None
+        self._weights: Optional[Tuple[float, ...]] = None
+        self._weighted: List[Optional["np.ndarray"]] = [None] * len(COMPONENTS)
+        self._scores: Optional["np.ndarray"] = None
+        self._passing: Optional["np.ndarray"] = None
+        self._candidates: Optional["np.ndarray"] = None
+        # Recommendation records by style index, with their confidence score,
+        # for the inputs in _record_key
+        self._records: Dict[int, Tuple[float, Dict]] = {}
+        self._record_key: Optional[tuple] = None
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        """Current recommendation payload"""
+        return dict(self._payload)
+
+    def recommend(self) -> AgentResponse:
+        """Recommendations for the current payload"""
+        return self.update()
+
+    def update(self, **fields: Any) -> AgentResponse:
+        """
+        Change payload fields and return the new recommendations.
+
+        A field set to None is removed from the payload. A cursor is kept
+        while only it, limit or include_components change, since other
+        fields start a new ranking. When the response is an error the
+        payload is left unchanged.
+        """
+        payload = dict(self._payload, **fields)
+        if any(field not in ('cursor', 'limit', 'include_components') for field in fields):
+            payload.pop('cursor', None)
+        payload.update((field, fields[field]) for field in ('cursor',) if field in fields)
+        payload = {key: value for key, value in payload.items() if value is not None}
+
+        agent = self._agent
+        started = time.perf_counter()
+        rules = agent._get_rules()
+        try:
+            response = agent._call_with_rules(rules, self._respond, rules, payload)
+        except Exception as e:
+            # Kept scores may be half updated; start over on the next call
+            self._reset()
+            response = agent._recommendation_error(e)
+        if response.success:
+            self._payload = payload
+        elapsed = time.perf_counter() - started
+        agent.metrics.observe("get_hairstyle_recommendations", elapsed, response.success)
+        if agent._stage_hooks:
+            agent._emit_stage(StageTiming("dispatch", elapsed, 0))
+        return response
+
+    def _respond(self, rules: "RuleSnapshot", payload: Dict[str, Any]) -> AgentResponse:
+        import numpy as np
+        from .scoring import select_top_k
+
+        agent = self._agent
+        if 'variants' in payload:
+            raise ValueError("Sessions do not support variants")
+        request = agent._parse_recommendation_request(payload)
+        if request is None:
+            return agent._missing_recommendation_fields()
+        if rules is not self._rules:
+            self._reset()
+            self._rules = rules
+
+        engine = rules.engine
+        previous = self._request
+        weights = tuple(agent._request_weights(request))
+        rescored = False
+        started = time.perf_counter() if agent._stage_hooks else 0.0
+        rows = engine.component_rows(*request[:5])
+        for position, row in enumerate(rows):
+            # Rows are in the order of the request fields they score
+            if (self._weighted[position] is None or weights[position] != self._weights[position]
+                    or request[position] != previous[position]):
+                self._weighted[position] = row * weights[position]
+                rescored = True
+        self._weights = weights
+
+        if rescored:
+            # Summed in component order, as ScoringEngine.score does
+            total = self._weighted[0].copy()
+            for weighted in self._weighted[1:]:
+                total += weighted
+            self._scores = np.minimum(total, 1.0, out=total)
+            self._passing = self._scores > MIN_SCORE
+            if agent._stage_hooks:
+                agent._end_stage("scoring", started, len(engine))
+
+        if rescored or request.hair_length != previous.hair_length:
+            started = time.perf_counter() if agent._stage_hooks else 0.0
+            self._candidates = self._passing
+            if request.hair_length:
+                self._candidates = self._passing & engine.length_mask(request.hair_length)
+            if agent._stage_hooks:
+                agent._end_stage("filtering", started, len(engine))
+
+        started = time.perf_counter() if agent._stage_hooks else 0.0
+        indices, scores = select_top_k(self._scores, self._candidates, request.limit, request.offset)
+        if agent._stage_hooks:
+            agent._end_stage("selection", started, int(self._candidates.sum()))
+
+        recommendations = self._materialize(request, indices, scores)
+        data = agent._build_recommendation_data(request, recommendations)
+        self._request = request
+        return AgentResponse(success=True, data=data, agent_name=agent.name)
+
+    def _materialize(self, request: RecommendationRequest, indices: List[int],
+                     scores: List[float]) -> List[Dict]:
+        """Copies of the recommendation records, building only those not kept from earlier calls"""
+        # Labels describe the face shape, hair type and personal style; score
+        # components also describe the age group and gender
+        key = request[:3] + ((request.age_group, request.gender) if request.include_components else ())
+        if key != self._record_key:
+            self._records = {}
+            self._record_key = key
+
+        missing = [(index, score) for index, score in zip(indices, scores)
+                   if self._records.get(index, (None,))[0] != round(score, 2)]
+        if missing:
+            built = self._agent._materialize_recommendations(request, *zip(*missing))
+            for (index, score), record in zip(missing, built):
+                self._records[index] = (round(score, 2), record)
+        return [copy_data(self._records[index][1]) for index in indices]
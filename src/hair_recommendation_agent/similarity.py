@@ -0,0 +1,162 @@
+"""
+Style similarity for "more like this" lookups.
+
+Each style is described by a feature vector: its tier score under every
+face shape and hair type, its style profiles, hair lengths and maintenance
+level. Each group of features is scaled to unit length, so groups with many
+columns do not dominate, and similarity is the cosine of two vectors.
+"""
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from .data import RuleIndex
+from .schema import FACE_SHAPE_TIER_SCORES, HAIR_TYPE_TIER_SCORES
+
+
+def style_features(index: RuleIndex, styles: Sequence[str]) -> np.ndarray:
+    """Unit-length (styles x features) matrix of the styles"""
+    columns = {style: i for i, style in enumerate(styles)}
+    catalog = index.catalog
+    records = [catalog.record(style) for style in styles]
+
+    def tier_block(tier_maps: Dict[str, Dict[str, str]], scores: Dict[str, float]) -> np.ndarray:
+        # Styles a key does not rate get 0
+        block = np.zeros((len(styles), len(tier_maps)))
+        for column, tiers in enumerate(tier_maps.values()):
+            for style, tier in tiers.items():
+                row = columns.get(style)
+                if row is not None:
+                    block[row, column] = scores[tier]
+        return block
+
+    def membership_block(values: List[Sequence[str]]) -> np.ndarray:
+        keys: Dict[str, int] = {}
+        for style_values in values:
+            for value in style_values:
+                keys.setdefault(value, len(keys))
+        block = np.zeros((len(styles), len(keys)))
+        for row, style_values in enumerate(values):
+            for value in style_values:
+                block[row, keys[value]] = 1.0
+        return block
+
+    blocks = [
+        tier_block(index.face_tiers, FACE_SHAPE_TIER_SCORES),
+        tier_block(index.hair_tiers, HAIR_TYPE_TIER_SCORES),
+        membership_block([sorted(index.style_profiles.get(style, ())) for style in styles]),
+        membership_block([record.hair_lengths or () for record in records]),
+        membership_block([(record.maintenance,) if record.maintenance is not None else ()
+                          for record in records])
+    ]
+    features = np.hstack([_normalize_rows(block) for block in blocks])
+    return _normalize_rows(features)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class SimilarityIndex:
+    """
+    Nearest neighbours of every style, kept once per rule snapshot.
+
+    Only the best neighbours of each style are stored, so memory stays
+    O(styles x neighbours). Catalogs of up to eager_limit styles are indexed
+    up front, in blocks of rows whose (rows x styles) similarity matrix
+    holds at most max_cells values; beyond that a style's neighbours are
+    found by one pass over the catalog on its first lookup, as exact
+    all-pairs ranking grows with the square of the catalog. Afterwards a
+    lookup of up to that many neighbours reads one row; longer lookups score
+    the style against the catalog. Similarities are rounded to 12 decimals
+    and equal similarities keep catalog order.
+    """
+
+    def __init__(self, index: RuleIndex, styles: Sequence[str], neighbours: int = 32,
+                 max_cells: int = 1 << 22, eager_limit: int = 5000):
+        self.styles: List[str] = list(styles)
+        self.style_index: Dict[str, int] = {style: i for i, style in enumerate(self.styles)}
+        self._features = style_features(index, self.styles)
+
+        count = len(self.styles)
+        self.neighbours = min(neighbours, max(count - 1, 0))
+        # Neighbour rows found on first lookup, when not indexed up front
+        self._rows: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._neighbour_ids: Optional[np.ndarray] = None
+        self._similarities: Optional[np.ndarray] = None
+        if count <= eager_limit:
+            self._neighbour_ids = np.zeros((count, self.neighbours), dtype=np.intp)
+            self._similarities = np.zeros((count, self.neighbours))
+            block_size = max(1, max_cells // max(count, 1))
+            for start in range(0, count if self.neighbours else 0, block_size):
+                rows = np.arange(start, min(start + block_size, count))
+                self._index_block(rows)
+
+    def _index_block(self, rows: np.ndarray) -> None:
+        # Ranked on negated similarities, computed in place so a block holds
+        # one float matrix besides the partition indices
+        keys = self._similarities_to(rows)
+        np.negative(keys, out=keys)
+        positions = np.arange(len(rows))
+        keys[positions, rows] = np.inf
+        limit = self.neighbours
+
+        # Some limit best per row, then the exact tie-break where styles
+        # tie with the worst of them
+        best = np.argpartition(keys, limit - 1, axis=1)[:, :limit]
+        boundary = keys[positions[:, None], best].max(axis=1)
+        tied = np.count_nonzero(keys <= boundary[:, None], axis=1) > limit
+        for position in np.flatnonzero(tied):
+            best[position] = self._rank(rows[position], -keys[position], limit)
+
+        values = keys[positions[:, None], best]
+        order = np.lexsort((best, values), axis=1)
+        self._neighbour_ids[rows] = np.take_along_axis(best, order, axis=1)
+        self._similarities[rows] = -np.take_along_axis(values, order, axis=1)
+
+    @staticmethod
+    def _rank(row: int, similarities: np.ndarray, limit: int) -> np.ndarray:
+        """Indices of the limit most similar other styles, best first"""
+        similarities = similarities.copy()
+        similarities[row] = -np.inf
+        if limit < len(similarities) - 1:
+            # Everything at least as similar as the limit-th best, ties included
+            boundary = np.partition(-similarities, limit - 1)[limit - 1]
+            candidates = np.flatnonzero(-similarities <= boundary)
+        else:
+            candidates = np.flatnonzero(similarities > -np.inf)
+        order = np.lexsort((candidates, -similarities[candidates]))
+        return candidates[order[:limit]]
+
+    def similar(self, style: str, limit: int) -> List[Tuple[str, float]]:
+        """The limit styles most similar to style, with their cosine similarity"""
+        row = self.style_index.get(style)
+        if row is None:
+            raise ValueError(f"Unknown style: {style}")
+
+        if limit <= self.neighbours:
+            ids, scores = self._neighbours_of(row)
+            ids = ids[:limit].tolist()
+            scores = scores[:limit].tolist()
+        else:
+            similarities = self._similarities_to(row)
+            ids = self._rank(row, similarities, limit).tolist()
+            scores = similarities[ids].tolist()
+        return [(self.styles[i], score) for i, score in zip(ids, scores)]
+
+    def _similarities_to(self, rows):
+        # Rounded so that equally similar styles tie exactly whichever
+        # product computed them
+        product = self._features[rows] @ self._features.T
+        return np.round(product, 12, out=product)
+
+    def _neighbours_of(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        if self._neighbour_ids is not None:
+            return self._neighbour_ids[row], self._similarities[row]
+        found = self._rows.get(row)
+        if found is None:
+            similarities = self._similarities_to(row)
+            ids = self._rank(row, similarities, self.neighbours)
+            # Concurrent first lookups may both compute the row; both are equal
+            found = self._rows[row] = (ids, similarities[ids])
+        return found
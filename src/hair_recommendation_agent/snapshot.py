@@ -0,0 +1,234 @@
+"""
+Precompiled rule snapshots.
+
+A snapshot file holds the compiled RuleIndex and ScoringEngine of the rule
+data, so short-lived processes can skip compiling them at startup. The
+engine is stored as a separate blob and only unpickled (importing numpy)
+when scoring is first needed; requests answered from a precomputed table
+never load it.
+
+Build a snapshot with:
+
+    python -m hair_recommendation_agent.snapshot build rules.snapshot
+    python -m hair_recommendation_agent.snapshot build rules.snapshot --source rules.json
+
+Each snapshot records the state of the rule source it was built from, and
+is rejected as stale once that source changes, for example after a package
+upgrade or an edit of the rule file.
+
+Snapshots are pickles: only load files you built yourself.
+"""
+import argparse
+import os
+import pickle
+import struct
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+from .data import RuleIndex
+
+if TYPE_CHECKING:
+    from .scoring import ScoringEngine
+    from .table import RecommendationTable
+
+MAGIC = b"HRRS"
+FORMAT_VERSION = 3
+
+_PREAMBLE = struct.Struct("<4sI")
+
+# Data package modules holding the rules a snapshot compiles, for stamping
+_PACKAGE_RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+_PACKAGE_RULE_MODULES = ("face_shape_rules", "hair_type_rules", "style_profiles", "demographic_rules")
+
+
+class RuleSnapshot:
+    """
+    Compiled rule data used to answer requests.
+
+    Bundles the rule index, style catalog, scoring engine and, when the
+    agent has one for these rules, the precomputed table. A snapshot is
+    never modified once requests can see it: rule changes compile a new one.
+    The scoring engine is built, or unpickled from a snapshot file, on first
+    access of ``engine``. Concurrent first accesses may build it twice; both
+    results are identical.
+    """
+
+    def __init__(self, index: RuleIndex, engine: Optional["ScoringEngine"] = None,
+                 engine_state: Optional[bytes] = None, source: Optional[str] = None):
+        self.index = index
+        self.catalog = index.catalog
+        self.fingerprint = index.fingerprint
+        # Rule source the snapshot was compiled from, None for the data package
+        self.source = source
+        self.table: Optional["RecommendationTable"] = None
+        self._derived: Dict[str, Any] = {}
+        self._engine = engine
+        self._engine_state = engine_state
+        self._styles: Optional[List[str]] = engine.styles if engine is not None else None
+
+    @property
+    def engine(self) -> "ScoringEngine":
+        engine = self._engine
+        if engine is None:
+            if self._engine_state is not None:
+                engine = pickle.loads(self._engine_state)
+            else:
+                from .scoring import ScoringEngine
+                engine = ScoringEngine(self.index)
+            self._engine = engine
+            self._engine_state = None
+        return engine
+
+    def derived(self, key: str, build: Callable[[], Any]) -> Any:
+        """
+        Value derived from these rules, built on first use and kept with the
+        snapshot so a rule swap drops it. Concurrent first uses may build it
+        more than once; the first result stored wins.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived.setdefault(key, build())
+        return value
+
+    def has_derived(self, key: str) -> bool:
+        """Whether the value derived under key has been built"""
+        return key in self._derived
+
+    def derived_keys(self) -> List[str]:
+        """Keys of the derived values built so far"""
+        return list(self._derived)
+
+    @property
+    def engine_loaded(self) -> bool:
+        return self._engine is not None
+
+    @property
+    def styles(self) -> List[str]:
+        """Catalog styles in scoring order, available without building the engine"""
+        if self._styles is None:
+            engine = self._engine
+            self._styles = engine.styles if engine is not None else self.index.candidate_styles()
+        return self._styles
+
+
+def compile_snapshot(source: Optional[str] = None) -> RuleSnapshot:
+    """
+    Compile rules from a JSON or SQLite rule source (see data.sources), or
+    from the data package when no source is given.
+    """
+    if source is None:
+        return RuleSnapshot(RuleIndex())
+
+    from .data.sources import load_rules
+
+    return RuleSnapshot(RuleIndex(**load_rules(source)), source=source)
+
+
+def source_stamp(source: Optional[str] = None) -> Any:
+    """
+    State of a rule source, which changes whenever its rules may have: the
+    path, size and modification time of a rule file, or of each data
+    package module holding rules. Only files are checked, so it costs a few
+    stat calls; rule constants edited at runtime are not seen. A package
+    installed without its module sources is stamped with the fingerprint of
+    its rules instead.
+    """
+    if source is None:
+        try:
+            return tuple((name,) + _file_stamp(os.path.join(_PACKAGE_RULES_DIR, f"{name}.py"))
+                         for name in _PACKAGE_RULE_MODULES)
+        except OSError:
+            return RuleIndex().fingerprint
+    return (os.path.abspath(source),) + _file_stamp(source)
+
+
+def _file_stamp(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def save_snapshot(path: str, index: Optional[RuleIndex] = None, source: Optional[str] = None) -> str:
+    """
+    Compile rule data and write it to path.
+
+    The rules come from index, else from the rule source, else from the data
+    package. Snapshots of an index are not checked for staleness on load.
+    Returns the rule fingerprint.
+    """
+    # Stamped before reading, so a source changed meanwhile reads as stale
+    stamp = source_stamp(source) if index is None else None
+    snapshot = compile_snapshot(source) if index is None else RuleSnapshot(index)
+    payload = pickle.dumps({
+        "index": snapshot.index,
+        "source": snapshot.source,
+        "stamp": stamp,
+        "engine": pickle.dumps(snapshot.engine, protocol=pickle.HIGHEST_PROTOCOL)
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Write next to the target and rename, so readers never see a partial file
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION))
+        handle.write(payload)
+    os.replace(temporary, path)
+    return snapshot.fingerprint
+
+
+def load_snapshot(path: str, source: Optional[str] = None) -> RuleSnapshot:
+    """
+    Read a snapshot written by save_snapshot for a rule source, the data
+    package by default.
+
+    Raises ValueError when the file is not a valid snapshot, was built from
+    another source, or its source has changed since it was built.
+    """
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if len(data) < _PREAMBLE.size:
+        raise ValueError(f"{path} is not a rule snapshot")
+    magic, version = _PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a rule snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported rule snapshot format version {version}")
+
+    try:
+        payload = pickle.loads(data[_PREAMBLE.size:])
+    except Exception as e:
+        raise ValueError(f"Corrupt rule snapshot {path}: {str(e)}") from e
+    if (not isinstance(payload, dict) or not isinstance(payload.get("index"), RuleIndex)
+            or not isinstance(payload.get("engine"), bytes) or "stamp" not in payload
+            or not isinstance(payload.get("source"), (str, type(None)))):
+        raise ValueError(f"Corrupt rule snapshot {path}")
+
+    stamp = payload["stamp"]
+    if stamp is None:
+        # Built from an index: only known not to come from a rule file
+        current = payload["source"] is None and source is None
+    else:
+        try:
+            current = stamp == source_stamp(source)
+        except OSError:
+            current = False
+    if not current:
+        raise ValueError(f"Stale rule snapshot {path}: its rule source has changed")
+    return RuleSnapshot(payload["index"], engine_state=payload["engine"], source=payload["source"])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m hair_recommendation_agent.snapshot",
+        description="Precompile the rule data for fast agent startup"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a rule snapshot")
+    build.add_argument("output", help="path of the snapshot file to write")
+    build.add_argument("--source", help="JSON or SQLite rule source (default: the packaged rules)")
+    args = parser.parse_args(argv)
+
+    fingerprint = save_snapshot(args.output, source=args.source)
+    print(f"Wrote rule snapshot {fingerprint[:12]} to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Precomputed recommendation table.
+
+Every combination of known request inputs is ranked offline and written to
+a compact binary file holding the top-k style IDs and scores of each
+combination. The agent memory-maps the file and answers matching requests
+by index arithmetic, falling back to live scoring when the table is stale
+or does not cover a request.
+
+Build a table with:
+
+    python -m hair_recommendation_agent.table build recommendations.bin
+"""
+import argparse
+import itertools
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from .schema import RecommendationRequest, DEFAULT_LIMIT, MIN_SCORE
+
+if TYPE_CHECKING:
+    from .scoring import ScoringEngine
+
+MAGIC = b"HRRT"
+FORMAT_VERSION = 1
+FIELDS = ("face_shape", "hair_type", "personal_style", "age_group", "gender", "hair_length")
+
+# Magic, format version and JSON header length
+_PREAMBLE = struct.Struct("<4sII")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def build_table(path: str, engine: "ScoringEngine", weights: Sequence[float],
+                k: int = DEFAULT_LIMIT, chunk_size: int = 4096) -> int:
+    """
+    Rank every known input combination and write the table to path.
+
+    Returns the number of combinations written.
+    """
+    # Reading tables needs no numpy, so scoring is only imported to build one
+    from .scoring import select_top_k
+
+    if k < 1:
+        raise ValueError("k must be a positive integer")
+
+    dimensions = engine.input_values()
+    # The last hair length slot stands for requests without a length
+    axes = [dimensions[field] for field in FIELDS[:-1]] + [dimensions["hair_length"] + [None]]
+
+    style_ids = array("i")
+    scores = array("d")
+    combinations = itertools.product(*axes)
+    while True:
+        chunk = [RecommendationRequest(*values) for values in itertools.islice(combinations, chunk_size)]
+        if not chunk:
+            break
+        chunk_scores = engine.score_batch(chunk, weights)
+        candidates = chunk_scores > MIN_SCORE
+        candidates &= engine.length_mask_batch([request.hair_length for request in chunk])
+        for row_scores, row_candidates in zip(chunk_scores, candidates):
+            indices, top_scores = select_top_k(row_scores, row_candidates, k)
+            padding = k - len(indices)
+            style_ids.extend(indices + [-1] * padding)
+            scores.extend(top_scores + [0.0] * padding)
+
+    header = json.dumps({
+        "fingerprint": engine.fingerprint,
+        "weights": list(weights),
+        "k": k,
+        "byteorder": sys.byteorder,
+        "styles": engine.styles,
+        "dimensions": {field: dimensions[field] for field in FIELDS}
+    }, separators=(',', ':')).encode("utf-8")
+
+    with open(path, "wb") as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        handle.write(header)
+        handle.write(b"\0" * (_align(handle.tell()) - handle.tell()))
+        style_ids.tofile(handle)
+        handle.write(b"\0" * (_align(handle.tell()) - handle.tell()))
+        scores.tofile(handle)
+
+    return len(style_ids) // k
+
+
+class RecommendationTable:
+    """Read-only, memory-mapped view of a precomputed recommendation table"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported recommendation table: {path}")
+            header_end = _PREAMBLE.size + header_length
+            header = json.loads(self._mmap[_PREAMBLE.size:header_end].decode("utf-8"))
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"Recommendation table byte order does not match this platform: {path}")
+
+            self.fingerprint: str = header["fingerprint"]
+            self.weights: Tuple[float, ...] = tuple(header["weights"])
+            self.k: int = header["k"]
+            self.styles: List[str] = header["styles"]
+
+            self._positions: List[Dict[Optional[str], int]] = []
+            self._strides: List[int] = []
+            sizes = []
+            for field in FIELDS:
+                values = header["dimensions"][field]
+                self._positions.append({value: i for i, value in enumerate(values)})
+                sizes.append(len(values))
+            self._positions[-1][None] = sizes[-1]
+            sizes[-1] += 1
+
+            stride = self.k
+            for size in reversed(sizes):
+                self._strides.insert(0, stride)
+                stride *= size
+            entries = stride
+
+            ids_offset = _align(header_end)
+            scores_offset = _align(ids_offset + entries * 4)
+            if len(self._mmap) < scores_offset + entries * 8:
+                raise ValueError(f"Truncated recommendation table: {path}")
+            self._style_ids = memoryview(self._mmap)[ids_offset:ids_offset + entries * 4].cast("i")
+            self._scores = memoryview(self._mmap)[scores_offset:scores_offset + entries * 8].cast("d")
+        except (KeyError, TypeError, struct.error) as e:
+            self._mmap.close()
+            raise ValueError(f"Invalid recommendation table {path}: {str(e)}")
+        except ValueError:
+            self._mmap.close()
+            raise
+
+    def lookup(self, request: RecommendationRequest) -> Optional[Tuple[List[int], List[float]]]:
+        """Ranked style indices and scores, or None when the table does not cover the request"""
+        end = request.offset + request.limit
+        if end > self.k:
+            return None
+
+        offset = 0
+        # Empty hair lengths mean no length filter, as in live scoring
+        values = request[:5] + (request.hair_length or None,)
+        try:
+            for positions, stride, value in zip(self._positions, self._strides, values):
+                offset += positions[value] * stride
+        except (KeyError, TypeError):
+            return None
+
+        start = offset + request.offset
+        indices = self._style_ids[start:offset + end].tolist()
+        if -1 in indices:
+            indices = indices[:indices.index(-1)]
+        return indices, self._scores[start:start + len(indices)].tolist()
+
+    def close(self) -> None:
+        """Release the memory map"""
+        self._style_ids.release()
+        self._scores.release()
+        self._mmap.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m hair_recommendation_agent.table",
+        description="Precompute ranked recommendations for every known input combination"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a recommendation table")
+    build.add_argument("output", help="path of the table file to write")
+    build.add_argument("--limit", type=int, default=DEFAULT_LIMIT,
+                       help=f"recommendations stored per combination (default: {DEFAULT_LIMIT})")
+    args = parser.parse_args(argv)
+
+    from .agent import HairRecommendationAgent
+
+    agent = HairRecommendationAgent()
+    count = build_table(args.output, agent._engine, agent._get_weight_vector(), k=args.limit)
+    print(f"Wrote {count} combinations to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import unittest
 from hair_recommendation_agent import HairRecommendationAgent
 from agent_core_framework import AgentTask
@@ -310,6 +313,425 @@ class TestHairRecommendationAgent(unittest.TestCase):
         # Should return some recommendations even with specific constraints
         self.assertGreater(len(recommendations), 0)
 
+    def test_recommendation_limit(self):
+        """Test configurable number of recommendations"""
+        payload = {"face_shape": "oval", "hair_type": "wavy"}
+        default = self.agent.process(AgentTask(type="get_hairstyle_recommendations", payload=payload))
+        limited = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                               payload=dict(payload, limit=3)))
+        extended = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                                payload=dict(payload, limit=20)))
+
+        self.assertEqual(len(default.data["recommendations"]), 8)
+        self.assertEqual(limited.data["recommendations"], default.data["recommendations"][:3])
+        self.assertGreater(len(extended.data["recommendations"]), 8)
+        self.assertEqual(extended.data["recommendations"][:8], default.data["recommendations"])
+
+        scores = [rec["confidence_score"] for rec in extended.data["recommendations"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_recommendation_invalid_limit(self):
+        """Test that a non-positive limit is rejected"""
+        task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "oval", "hair_type": "wavy", "limit": 0}
+        )
+
+        response = self.agent.process(task)
+
+        self.assertFalse(response.success)
+        self.assertIn("limit must be a positive integer", response.error)
+
+    def test_get_info(self):
+        """Test agent information"""
+        info = self.agent.get_info()
+        self.assertEqual(info["name"], "HairRecommendation")
+        self.assertIsNone(info["cache"])
+
+    def test_recommendation_cache(self):
+        """Test cached recommendation results and statistics"""
+        agent = HairRecommendationAgent(cache_size=2)
+        task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "oval", "hair_type": "wavy"}
+        )
+
+        first = agent.process(task)
+        second = agent.process(task)
+
+        self.assertTrue(second.success)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(second.data, self.agent.process(task).data)
+        stats = agent.get_info()["cache"]
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_recommendation_cache_returns_copies(self):
+        """Test that changing a response leaves the cached result unchanged"""
+        agent = HairRecommendationAgent(cache_size=2)
+        task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "oval", "hair_type": "wavy"}
+        )
+        expected = self.agent.process(task).data
+
+        # The response that filled the cache, then responses served from it
+        for _ in range(3):
+            response = agent.process(task)
+            self.assertEqual(response.data, expected)
+            response.data["recommendations"][0]["style_name"] = "mullet"
+            response.data["recommendations"].clear()
+            response.data["analysis"].clear()
+        self.assertEqual(agent.get_info()["cache"]["hits"], 2)
+
+    def test_recommendation_cache_invalidated_on_rule_change(self):
+        """Test that changed rule data invalidates cached results"""
+        from hair_recommendation_agent.data import FACE_SHAPE_RECOMMENDATIONS
+
+        agent = HairRecommendationAgent(cache_size=4)
+        task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "oval", "hair_type": "wavy", "limit": 1}
+        )
+        agent.process(task)
+        self.assertFalse(agent.refresh_rules())
+
+        excellent = FACE_SHAPE_RECOMMENDATIONS["oval"]["excellent"]
+        original = list(excellent)
+        excellent.remove("long_layers")
+        try:
+            self.assertTrue(agent.refresh_rules())
+            self.assertEqual(agent.get_info()["cache"]["size"], 0)
+            response = agent.process(task)
+            self.assertNotEqual(response.data["recommendations"][0]["style_name"], "long_layers")
+        finally:
+            excellent[:] = original
+
+    def test_iter_recommendations(self):
+        """Test streaming recommendations in score order with offsets"""
+        payload = {"face_shape": "oval", "hair_type": "wavy"}
+        expected = self.agent.process(AgentTask(
+            type="get_hairstyle_recommendations", payload=dict(payload, limit=100)
+        )).data["recommendations"]
+
+        iterator = self.agent.iter_recommendations(payload)
+        self.assertEqual(next(iterator), expected[0])
+        self.assertEqual(list(iterator), expected[1:])
+        self.assertEqual(list(self.agent.iter_recommendations(payload, offset=5)), expected[5:])
+        self.assertEqual(list(self.agent.iter_recommendations(dict(payload, offset=3))), expected[3:])
+
+        with self.assertRaises(ValueError):
+            self.agent.iter_recommendations({"face_shape": "oval"})
+        with self.assertRaises(ValueError):
+            self.agent.iter_recommendations(payload, offset=-1)
+
+    def test_process_batch_matches_process(self):
+        """Test that batch processing returns the same results in input order"""
+        payloads = [
+            {"face_shape": "oval", "hair_type": "wavy", "personal_style": "bohemian", "hair_length": "medium"},
+            {"face_shape": "round", "hair_type": "curly", "gender": "male", "hair_length": "short"},
+            {"face_shape": "invalid_shape", "hair_type": "wavy"},
+            {"face_shape": "heart", "hair_type": "fine", "age_group": "teen", "limit": 3}
+        ]
+        tasks = [AgentTask(type="get_hairstyle_recommendations", payload=payload) for payload in payloads]
+
+        responses = self.agent.process_batch(tasks)
+
+        self.assertEqual(len(responses), len(tasks))
+        for task, response in zip(tasks, responses):
+            expected = self.agent.process(task)
+            self.assertTrue(response.success)
+            self.assertEqual(response.data, expected.data)
+
+    def test_process_batch_chunks(self):
+        """Test that batches larger than one score matrix chunk answer like single requests"""
+        timings = []
+        self.agent.add_stage_hook(timings.append)
+        self.agent.batch_max_cells = 2 * len(self.agent._engine)
+        tasks = [AgentTask(type="get_hairstyle_recommendations",
+                           payload={"face_shape": shape, "hair_type": "wavy", "weights": [1, 1, 1, 1, weight]})
+                 for shape in ("oval", "round", "square", "heart", "oblong") for weight in (0, 1)]
+
+        responses = self.agent.process_batch(tasks)
+
+        self.assertEqual(sum(1 for timing in timings if timing.stage == "scoring"), 5)
+        for task, response in zip(tasks, responses):
+            self.assertEqual(response.data, self.agent.process(task).data)
+
+    def test_process_batch_errors_stay_per_task(self):
+        """Test that invalid tasks in a batch do not affect the others"""
+        tasks = [
+            AgentTask(type="get_hairstyle_recommendations", payload={"hair_type": "wavy"}),
+            AgentTask(type="get_hairstyle_recommendations", payload={"face_shape": "oval", "hair_type": "wavy"}),
+            AgentTask(type="unsupported_task", payload={}),
+            AgentTask(type="get_trending_styles", payload={"season": "fall"})
+        ]
+
+        responses = self.agent.process_batch(tasks)
+
+        self.assertFalse(responses[0].success)
+        self.assertIn("Face shape and hair type are required", responses[0].error)
+        self.assertTrue(responses[1].success)
+        self.assertFalse(responses[2].success)
+        self.assertIn("Unsupported task", responses[2].error)
+        self.assertTrue(responses[3].success)
+        self.assertEqual(responses[3].data["season"], "fall")
+
+    def test_process_batch_empty(self):
+        """Test batch processing with no tasks"""
+        self.assertEqual(self.agent.process_batch([]), [])
+
+    def test_score_components(self):
+        """Test that score components are returned only on request and explain the score"""
+        payload = {"face_shape": "oval", "hair_type": "wavy", "personal_style": "bohemian", "gender": "female"}
+        task = AgentTask(type="get_hairstyle_recommendations", payload=payload)
+        for recommendation in self.agent.process(task).data["recommendations"]:
+            self.assertNotIn("score_components", recommendation)
+
+        task = AgentTask(type="get_hairstyle_recommendations", payload=dict(payload, include_components=True))
+        weights = self.agent._get_weight_vector()
+        for recommendation in self.agent.process(task).data["recommendations"]:
+            components = recommendation["score_components"]
+            self.assertEqual(list(components), ["face_shape", "hair_type", "personal_style",
+                                                "age_suitability", "gender_suitability"])
+            style = recommendation["style_name"]
+            self.assertEqual(components["face_shape"], self.agent._get_face_shape_score(style, "oval"))
+            self.assertEqual(recommendation["face_shape_match"], self.agent._get_face_shape_match(style, "oval"))
+            self.assertEqual(recommendation["style_alignment"], self.agent._get_style_alignment(style, "bohemian"))
+            total = min(1.0, sum(value * weight for value, weight in zip(components.values(), weights)))
+            self.assertEqual(recommendation["confidence_score"], round(total, 2))
+
+        task = AgentTask(type="get_hairstyle_recommendations", payload=dict(payload, include_components="yes"))
+        self.assertFalse(self.agent.process(task).success)
+
+    def test_request_weights(self):
+        """Test that payload weights re-rank recommendations"""
+        payload = {"face_shape": "oval", "hair_type": "wavy", "personal_style": "bohemian", "limit": 20}
+
+        def ranking(weights=None):
+            task_payload = payload if weights is None else dict(payload, weights=weights)
+            response = self.agent.process(AgentTask(type="get_hairstyle_recommendations", payload=task_payload))
+            self.assertTrue(response.success, response.error)
+            return [(item["style_name"], item["confidence_score"]) for item in response.data["recommendations"]]
+
+        default = ranking()
+        self.assertEqual(ranking([0.4, 0.3, 0.2, 0.2, 0.2]), default)
+        # Weights are normalized, so scaling them changes nothing
+        self.assertEqual(ranking([0.8, 0.6, 0.4, 0.4, 0.4]), default)
+        self.assertEqual(ranking({"face_shape": 0.4}), default)
+
+        hair_only = ranking({"face_shape": 0, "hair_type": 1, "personal_style": 0,
+                             "age_suitability": 0, "gender_suitability": 0})
+        self.assertNotEqual(hair_only, default)
+        expected = self.agent._get_hair_type_score(hair_only[0][0], "wavy")
+        self.assertEqual(hair_only[0][1], round(min(1.0, expected * 1.3), 2))
+
+        for invalid in ([1, 2], {"colour": 1}, [0, 0, 0, 0, 0], [-1, 1, 1, 1, 1], [1, 1, 1, 1, float("nan")], "heavy"):
+            response = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                                    payload=dict(payload, weights=invalid)))
+            self.assertFalse(response.success)
+            self.assertIn("weights", response.error)
+
+    def test_request_weights_in_batch(self):
+        """Test that batches mixing weights match single requests"""
+        base = {"face_shape": "square", "hair_type": "thick", "personal_style": "edgy"}
+        tasks = [AgentTask(type="get_hairstyle_recommendations", payload=payload) for payload in [
+            base, dict(base, weights=[0.1, 0.1, 0.9, 0.1, 0.1]), dict(base, weights={"hair_type": 1.2})
+        ]]
+        batch = self.agent.process_batch(tasks)
+        for task, response in zip(tasks, batch):
+            self.assertEqual(response.data, self.agent.process(task).data)
+        self.assertNotEqual(batch[0].data["recommendations"], batch[1].data["recommendations"])
+
+    def test_variants(self):
+        """Test that variants serve one ranking and report the others as shadows"""
+        base = {"face_shape": "oval", "hair_type": "wavy", "personal_style": "bohemian"}
+        variants = {"control": [0.4, 0.3, 0.2, 0.2, 0.2], "hair": {"hair_type": 1.5}, "style": [0, 0, 1, 0, 0]}
+        task = AgentTask(type="get_hairstyle_recommendations",
+                         payload=dict(base, variants=variants, served_variant="hair", include_shadow_rankings=True))
+        response = self.agent.process(task)
+        self.assertTrue(response.success, response.error)
+        self.assertEqual(response.data["variant"], "hair")
+
+        def single(weights):
+            return self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                                payload=dict(base, weights=weights))).data
+
+        served = single(variants["hair"])
+        self.assertEqual(response.data["recommendations"], served["recommendations"])
+        self.assertEqual(set(response.data["shadow_rankings"]), {"control", "style"})
+        for name in ("control", "style"):
+            expected = [{"style_name": item["style_name"], "confidence_score": item["confidence_score"]}
+                        for item in single(variants[name])["recommendations"]]
+            self.assertEqual(response.data["shadow_rankings"][name], expected)
+
+        # The first variant is served by default and shadows are opt-in
+        plain = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                             payload=dict(base, variants=variants)))
+        self.assertEqual(plain.data["variant"], "control")
+        self.assertNotIn("shadow_rankings", plain.data)
+        self.assertEqual(plain.data["recommendations"], single(None)["recommendations"])
+        self.assertEqual(self.agent.process_batch([task])[0].data, response.data)
+
+        for invalid in ({"variants": {}}, {"variants": variants, "served_variant": "missing"},
+                        {"variants": variants, "weights": [1, 1, 1, 1, 1]},
+                        {"variants": {"bad": [1, 2]}}):
+            response = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                                    payload=dict(base, **invalid)))
+            self.assertFalse(response.success)
+
+    def test_compatibility_matrix(self):
+        """Test that every matrix cell matches analyze_style_compatibility"""
+        response = self.agent.process(AgentTask(type="get_compatibility_matrix", payload={}))
+        self.assertTrue(response.success, response.error)
+        matrix = response.data
+        self.assertEqual(matrix["styles"], self.agent._get_all_possible_styles())
+        self.assertIn("oval", matrix["face_shapes"])
+        self.assertIn("wavy", matrix["hair_types"])
+
+        face_match = matrix["face_shape_match"]
+        requirements = matrix["hair_type_requirements"]
+        for f, face_shape in enumerate(matrix["face_shapes"]):
+            for h, hair_type in enumerate(matrix["hair_types"]):
+                for s, style in enumerate(matrix["styles"]):
+                    analysis = self.agent.process(AgentTask(
+                        type="analyze_style_compatibility",
+                        payload={"style_name": style, "face_shape": face_shape, "hair_type": hair_type}
+                    )).data
+                    self.assertEqual(matrix["overall_score"][f][h][s], analysis["overall_score"])
+                    self.assertEqual(face_match["labels"][face_match["codes"][f][s]],
+                                     analysis["face_shape_compatibility"])
+                    self.assertEqual(requirements["labels"][requirements["codes"][h][s]],
+                                     analysis["hair_type_requirements"])
+
+    def test_compatibility_matrix_slice(self):
+        """Test requested slices, weights and invalid payloads"""
+        payload = {"styles": ["pixie_cut", "long_layers"], "face_shapes": ["heart", "unknown_shape"],
+                   "hair_types": ["coily"], "weights": {"face_shape": 1.0}}
+        matrix = self.agent.process(AgentTask(type="get_compatibility_matrix", payload=payload)).data
+        self.assertEqual(matrix["styles"], ["pixie_cut", "long_layers"])
+        self.assertEqual(len(matrix["overall_score"]), 2)
+        self.assertEqual([len(row) for row in matrix["overall_score"]], [1, 1])
+        self.assertEqual(len(matrix["overall_score"][0][0]), 2)
+        self.assertEqual(len(matrix["hair_type_requirements"]["codes"]), 1)
+
+        default = self.agent.process(AgentTask(type="get_compatibility_matrix",
+                                               payload=dict(payload, weights=None))).data
+        self.assertNotEqual(matrix["overall_score"], default["overall_score"])
+
+        for invalid in ({"styles": ["no_such_style"]}, {"face_shapes": "oval"}, {"hair_types": [1]},
+                        {"weights": [1, 2]}):
+            response = self.agent.process(AgentTask(type="get_compatibility_matrix", payload=invalid))
+            self.assertFalse(response.success)
+
+    def test_compatibility_matrix_avoided_styles(self):
+        """Test that styles only named in avoid lists are rated as analyze_style_compatibility rates them"""
+        self.assertNotIn("helmet_hair", self.agent._get_all_possible_styles())
+        payload = {"styles": ["helmet_hair", "pixie_cut"], "face_shapes": ["round", "oval"],
+                   "hair_types": ["fine", "wavy"]}
+        response = self.agent.process(AgentTask(type="get_compatibility_matrix", payload=payload))
+        self.assertTrue(response.success, response.error)
+        matrix = response.data
+        face_match = matrix["face_shape_match"]
+        requirements = matrix["hair_type_requirements"]
+        for f, face_shape in enumerate(payload["face_shapes"]):
+            for h, hair_type in enumerate(payload["hair_types"]):
+                for s, style in enumerate(payload["styles"]):
+                    analysis = self.agent.process(AgentTask(
+                        type="analyze_style_compatibility",
+                        payload={"style_name": style, "face_shape": face_shape, "hair_type": hair_type}
+                    ))
+                    self.assertTrue(analysis.success)
+                    self.assertEqual(matrix["overall_score"][f][h][s], analysis.data["overall_score"])
+                    self.assertEqual(face_match["labels"][face_match["codes"][f][s]],
+                                     analysis.data["face_shape_compatibility"])
+                    self.assertEqual(requirements["labels"][requirements["codes"][h][s]],
+                                     analysis.data["hair_type_requirements"])
+
+    def recommendation_pages(self, payload):
+        pages = []
+        while True:
+            response = self.agent.process(AgentTask(type="get_hairstyle_recommendations", payload=payload))
+            self.assertTrue(response.success, response.error)
+            pages.append(response.data["recommendations"])
+            if response.data["next_cursor"] is None:
+                return pages
+            payload = dict(payload, cursor=response.data["next_cursor"])
+
+    def test_cursor_pagination(self):
+        """Test that following cursors pages through the full ranking"""
+        payload = {"face_shape": "oval", "hair_type": "wavy", "personal_style": "edgy"}
+        full = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                            payload=dict(payload, limit=100))).data["recommendations"]
+        self.assertGreater(len(full), 3)
+
+        pages = self.recommendation_pages(dict(payload, limit=3))
+        self.assertTrue(all(len(page) == 3 for page in pages[:-1]))
+        self.assertEqual([item for page in pages for item in page], full)
+
+        # Pages may change size along the way
+        first = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                             payload=dict(payload, limit=2))).data
+        rest = self.recommendation_pages(dict(payload, limit=100, cursor=first["next_cursor"]))
+        self.assertEqual(first["recommendations"] + rest[0], full)
+
+        # The same cursor is produced in any process
+        self.assertEqual(first["next_cursor"], self.agent.process(AgentTask(
+            type="get_hairstyle_recommendations", payload=dict(payload, limit=2))).data["next_cursor"])
+
+    def test_cursor_validation(self):
+        """Test that cursors only apply to the request that made them"""
+        payload = {"face_shape": "oval", "hair_type": "wavy", "limit": 2}
+        cursor = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                              payload=payload)).data["next_cursor"]
+        for changed in ({"face_shape": "round"}, {"hair_length": "short"}, {"weights": {"hair_type": 1.0}},
+                        {"cursor": "not a cursor"}, {"cursor": 3}, {"cursor": cursor[:-2]}):
+            response = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                                    payload=dict(dict(payload, cursor=cursor), **changed)))
+            self.assertFalse(response.success)
+            self.assertIn("cursor", response.error)
+
+        response = self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                                payload=dict(payload, cursor=cursor, limit=4, include_components=True)))
+        self.assertTrue(response.success, response.error)
+
+    def test_responses_identical_across_processes(self):
+        """Test that equal requests give byte-identical responses whatever the hash seed"""
+        script = (
+            "from agent_core_framework import AgentTask\n"
+            "from hair_recommendation_agent import HairRecommendationAgent\n"
+            "from hair_recommendation_agent.responses import encode_json\n"
+            "agent = HairRecommendationAgent()\n"
+            "payload = {'face_shape': 'square', 'hair_type': 'fine', 'personal_style': 'natural', 'limit': 4}\n"
+            "data = agent.process(AgentTask(type='get_hairstyle_recommendations', payload=payload)).data\n"
+            "payload['cursor'] = data['next_cursor']\n"
+            "page = agent.process(AgentTask(type='get_hairstyle_recommendations', payload=payload)).data\n"
+            "print(encode_json([data, page]).decode('utf-8'))\n"
+        )
+        outputs = set()
+        for seed in ("0", "1", "271828"):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath(os.path.join(
+                os.path.dirname(__file__), "..", "src")), env.get("PYTHONPATH")]))
+            outputs.add(subprocess.run([sys.executable, "-c", script], env=env, check=True,
+                                       capture_output=True).stdout)
+        self.assertEqual(len(outputs), 1)
+
+    def test_analysis_score_components(self):
+        """Test that style analysis derives its ratings from one score breakdown"""
+        task = AgentTask(
+            type="analyze_style_compatibility",
+            payload={"style_name": "long_layers", "face_shape": "oval", "hair_type": "wavy",
+                     "include_components": True}
+        )
+        analysis = self.agent.process(task).data
+        self.assertEqual(analysis["overall_score"], self.agent._calculate_style_score(
+            "long_layers", "oval", "wavy", "versatile", "adult", "unisex"))
+        self.assertEqual(analysis["professional_opinion"],
+                         self.agent._get_professional_opinion("long_layers", "oval", "wavy"))
+        self.assertEqual(analysis["score_components"]["personal_style"], 0.7)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from hair_recommendation_agent import HairRecommendationAgent
+from agent_core_framework import AgentTask
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """Thread pool that counts submitted jobs"""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+class TestAsyncInterface(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the asyncio interface"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.executor = RecordingExecutor()
+        self.agent = HairRecommendationAgent(cache_size=16, executor=self.executor)
+        self.task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "oval", "hair_type": "wavy", "hair_length": "medium"}
+        )
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    async def test_aprocess_matches_process(self):
+        """Test that aprocess returns the same data as process"""
+        response = await self.agent.aprocess(self.task)
+        self.assertTrue(response.success)
+        self.assertEqual(response.data, HairRecommendationAgent().process(self.task).data)
+
+    async def test_small_catalog_and_cache_hits_are_inline(self):
+        """Test that cheap requests do not go through the executor"""
+        await self.agent.aprocess(self.task)
+        await self.agent.aprocess(self.task)
+        await self.agent.aprocess(AgentTask(type="get_trending_styles", payload={}))
+
+        self.assertEqual(self.executor.submitted, 0)
+        self.assertEqual(self.agent.get_info()["cache"]["hits"], 1)
+
+    async def test_heavy_scoring_is_offloaded(self):
+        """Test that scoring large catalogs runs in the executor"""
+        self.agent.inline_max_styles = 0
+
+        first = await self.agent.aprocess(self.task)
+        second = await self.agent.aprocess(self.task)
+
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(self.executor.submitted, 1)
+
+    async def test_similar_styles_and_matrix_are_offloaded(self):
+        """Test that index builds and large catalogs keep similar styles and matrices off the loop"""
+        similar = AgentTask(type="get_similar_styles", payload={"style_name": "beach_waves"})
+        matrix = AgentTask(type="get_compatibility_matrix", payload={"face_shapes": ["oval"]})
+        variants = AgentTask(type="get_hairstyle_recommendations",
+                             payload={"face_shape": "oval", "hair_type": "wavy", "variants": {"a": {}}})
+        reference = HairRecommendationAgent()
+
+        # The first similar styles task builds the neighbour index
+        response = await self.agent.aprocess(similar)
+        self.assertEqual(response.data, reference.process(similar).data)
+        self.assertEqual(self.executor.submitted, 1)
+        await self.agent.aprocess(similar)
+        await self.agent.aprocess(matrix)
+        self.assertEqual(self.executor.submitted, 1)
+
+        self.agent.inline_max_styles = 0
+        responses = await self.agent.aprocess_many([similar, matrix, variants, self.task])
+        for task, response in zip([similar, matrix, variants, self.task], responses):
+            self.assertEqual(response.data, reference.process(task).data)
+        self.assertEqual(self.executor.submitted, 5)
+        self.assertEqual(self.agent.metrics.snapshot()["get_hairstyle_recommendations"]["requests"], 2)
+
+    async def test_aprocess_many(self):
+        """Test ordered results with per-task errors"""
+        tasks = [
+            AgentTask(type="get_hairstyle_recommendations",
+                      payload={"face_shape": shape, "hair_type": "curly"})
+            for shape in ["oval", "round", "square", "heart", "diamond"]
+        ]
+        tasks.insert(2, AgentTask(type="get_hairstyle_recommendations", payload={"hair_type": "curly"}))
+
+        responses = await self.agent.aprocess_many(tasks, concurrency=2, chunk_size=2)
+
+        self.assertEqual(len(responses), len(tasks))
+        self.assertFalse(responses[2].success)
+        self.assertEqual(self.executor.submitted, 3)
+        reference = HairRecommendationAgent()
+        for task, response in zip(tasks, responses):
+            self.assertEqual(response.data, reference.process(task).data)
+
+        with self.assertRaises(ValueError):
+            await self.agent.aprocess_many(tasks, concurrency=0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
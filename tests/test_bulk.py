@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from hair_recommendation_agent import bulk
+
+
+class TestBulkScoring(unittest.TestCase):
+    """Test cases for JSONL bulk scoring"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        profiles = [
+            {"id": "c1", "face_shape": "oval", "hair_type": "wavy"},
+            {"id": "c2", "face_shape": "round", "hair_type": "curly", "hair_length": "short"},
+            {"id": "c3", "hair_type": "fine"},
+            {"face_shape": "heart", "hair_type": "thick", "limit": 2}
+        ]
+        lines = [json.dumps(profile) for profile in profiles]
+        lines.insert(2, "not json")
+        lines.insert(3, "")
+        self.input = "\n".join(lines * 3) + "\n"
+
+    def _run(self, **kwargs):
+        sink = io.StringIO()
+        written = bulk.run(io.StringIO(self.input), sink, **kwargs)
+        results = [json.loads(line) for line in sink.getvalue().splitlines()]
+        self.assertEqual(written, len(results))
+        return results
+
+    def test_in_process_scoring(self):
+        """Test results, line numbers and per-line errors"""
+        results = self._run(chunk_size=4)
+
+        self.assertEqual(len(results), 15)
+        self.assertEqual([result["line"] for result in results[:5]], [1, 2, 3, 5, 6])
+        self.assertEqual(results[0]["id"], "c1")
+        self.assertTrue(results[0]["success"])
+        self.assertIn("recommendations", results[0]["data"])
+        self.assertFalse(results[2]["success"])
+        self.assertIn("Invalid JSON", results[2]["error"])
+        self.assertFalse(results[3]["success"])
+        self.assertIn("Face shape and hair type are required", results[3]["error"])
+        self.assertEqual(len(results[4]["data"]["recommendations"]), 2)
+
+    def test_worker_processes(self):
+        """Test that worker processes produce the same results"""
+        expected = self._run(chunk_size=4)
+
+        self.assertEqual(self._run(workers=2, chunk_size=2), expected)
+        unordered = self._run(workers=2, chunk_size=2, ordered=False)
+        self.assertEqual(sorted(unordered, key=lambda result: result["line"]), expected)
+
+    def test_main_with_files(self):
+        """Test the command line entry point"""
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "profiles.jsonl")
+            output = os.path.join(directory, "results.jsonl")
+            with open(source, "w", encoding="utf-8") as handle:
+                handle.write(self.input)
+
+            self.assertEqual(bulk.main([source, "-o", output, "--workers", "0", "--chunk-size", "3"]), 0)
+
+            with open(output, encoding="utf-8") as handle:
+                self.assertEqual(len(handle.readlines()), 15)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,52 @@
+import time
+import unittest
+from hair_recommendation_agent.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test cases for the LRU result cache"""
+
+    def test_hit_and_miss(self):
+        """Test basic lookups and counters"""
+        cache = LRUCache(2)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses"""
+        cache = LRUCache(2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_arguments(self):
+        """Test argument validation"""
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+        with self.assertRaises(ValueError):
+            LRUCache(1, ttl=0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,53 @@
+import pickle
+import unittest
+from hair_recommendation_agent.data import HAIR_STYLES_DETAILED, StyleCatalog
+from hair_recommendation_agent.data.catalog import MISSING_STYLE
+
+
+class TestStyleCatalog(unittest.TestCase):
+    """Test cases for the compact style catalog"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.catalog = StyleCatalog(HAIR_STYLES_DETAILED)
+
+    def test_mapping_view_matches_source(self):
+        """Test that the dict view reproduces every source entry"""
+        self.assertEqual(list(self.catalog), list(HAIR_STYLES_DETAILED))
+        self.assertEqual(len(self.catalog), len(HAIR_STYLES_DETAILED))
+        for style, info in HAIR_STYLES_DETAILED.items():
+            self.assertIn(style, self.catalog)
+            self.assertEqual(self.catalog[style], info)
+        self.assertNotIn("mullet", self.catalog)
+        self.assertEqual(self.catalog.get("mullet", {}), {})
+
+    def test_records_and_bitmasks(self):
+        """Test integer IDs and bitmask membership"""
+        record = self.catalog.record("long_layers")
+        self.assertEqual(self.catalog.records[record.style_id], record)
+        self.assertEqual(record.hair_lengths, ("long",))
+        self.assertTrue(record.hair_length_mask & self.catalog.bit("hair_lengths", "long"))
+        self.assertFalse(record.hair_length_mask & self.catalog.bit("hair_lengths", "short"))
+        self.assertEqual(self.catalog.bit("hair_lengths", "shoulder"), 0)
+        self.assertIs(self.catalog.record("mullet"), MISSING_STYLE)
+
+    def test_shares_equal_values(self):
+        """Test that equal strings and tuples are stored once"""
+        catalog = StyleCatalog({
+            "a": {"maintenance": "".join(["lo", "w"]), "hair_lengths": ["short", "medium"]},
+            "b": {"maintenance": "".join(["l", "ow"]), "hair_lengths": ["short", "medium"]}
+        })
+        first, second = catalog.records
+        self.assertIs(first.maintenance, second.maintenance)
+        self.assertIs(first.hair_lengths, second.hair_lengths)
+
+    def test_keeps_unknown_fields_and_pickles(self):
+        """Test that extra fields survive the mapping view and pickling"""
+        catalog = StyleCatalog({"a": {"description": "A", "popularity": 3}})
+        restored = pickle.loads(pickle.dumps(catalog))
+        self.assertEqual(restored["a"], {"description": "A", "popularity": 3})
+        self.assertIsNone(restored.record("a").face_shapes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import threading
+import unittest
+from agent_core_framework import AgentTask
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.instrumentation import STAGES, StageRecorder
+
+
+class TestStageHooks(unittest.TestCase):
+    """Test cases for per-stage timing hooks"""
+
+    def setUp(self):
+        self.agent = HairRecommendationAgent()
+        self.task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "oval", "hair_type": "wavy", "hair_length": "medium"}
+        )
+
+    def test_reports_every_recommendation_stage(self):
+        """Test that a recommendation request reports each stage once"""
+        timings = []
+        self.agent.add_stage_hook(timings.append)
+        response = self.agent.process(self.task)
+
+        self.assertTrue(response.success)
+        self.assertEqual(
+            [timing.stage for timing in timings],
+            ["validation", "scoring", "filtering", "selection", "materialization",
+             "style_analysis", "seasonal_trends", "professional_advice", "dispatch"]
+        )
+        for timing in timings:
+            self.assertIn(timing.stage, STAGES)
+            self.assertGreaterEqual(timing.seconds, 0.0)
+
+        by_stage = {timing.stage: timing for timing in timings}
+        self.assertEqual(by_stage["scoring"].styles, len(self.agent._engine))
+        self.assertEqual(by_stage["materialization"].styles, len(response.data["recommendations"]))
+
+    def test_hooks_do_not_change_results(self):
+        """Test that instrumented and plain requests return the same data"""
+        plain = self.agent.process(self.task)
+        self.agent.add_stage_hook(StageRecorder())
+        instrumented = self.agent.process(self.task)
+        self.assertEqual(plain.data, instrumented.data)
+
+    def test_batch_reports_stages(self):
+        """Test that process_batch reports scoring over the whole batch"""
+        recorder = StageRecorder()
+        self.agent.add_stage_hook(recorder)
+        self.agent.process_batch([self.task, self.task])
+
+        summary = recorder.summary()
+        self.assertEqual(summary["scoring"]["calls"], 1)
+        self.assertEqual(summary["scoring"]["styles"], 2 * len(self.agent._engine))
+        self.assertEqual(summary["materialization"]["calls"], 2)
+
+    def test_remove_stage_hook(self):
+        """Test that removed hooks are no longer called"""
+        recorder = StageRecorder()
+        self.agent.add_stage_hook(recorder)
+        self.agent.remove_stage_hook(recorder)
+        self.agent.process(self.task)
+        self.assertEqual(recorder.summary(), {})
+
+    def test_concurrent_registration_keeps_every_hook(self):
+        """Test that hooks added from several threads are all registered"""
+        recorders = [[StageRecorder() for _ in range(200)] for _ in range(4)]
+
+        def register(batch):
+            for recorder in batch:
+                self.agent.add_stage_hook(recorder)
+
+        threads = [threading.Thread(target=register, args=(batch,)) for batch in recorders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.agent.process(self.task)
+        for batch in recorders:
+            for recorder in batch:
+                self.assertIn("dispatch", recorder.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import random
+import unittest
+from agent_core_framework import AgentTask
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.metrics import LatencyHistogram, MetricsRegistry
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Test cases for the log-linear latency histogram"""
+
+    def test_quantiles_within_precision(self):
+        """Test that quantiles stay within the histogram's relative error"""
+        rng = random.Random(7)
+        values = sorted(rng.uniform(0.00001, 2.0) for _ in range(5000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            self.assertAlmostEqual(histogram.quantile(q), exact, delta=exact * 0.02 + 1e-6)
+        self.assertEqual(histogram.count, 5000)
+
+    def test_empty_histogram(self):
+        """Test that an empty histogram reports zero"""
+        self.assertEqual(LatencyHistogram().quantile(0.99), 0.0)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for agent request metrics"""
+
+    def setUp(self):
+        self.agent = HairRecommendationAgent(cache_size=8)
+
+    def test_counts_requests_and_errors(self):
+        """Test that requests and failures are counted per task type"""
+        self.agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                     payload={"face_shape": "oval", "hair_type": "wavy"}))
+        self.agent.process(AgentTask(type="get_hairstyle_recommendations", payload={}))
+        self.agent.process(AgentTask(type="unknown_task", payload={}))
+
+        snapshot = self.agent.get_info()["metrics"]
+        self.assertEqual(snapshot["get_hairstyle_recommendations"]["requests"], 2)
+        self.assertEqual(snapshot["get_hairstyle_recommendations"]["errors"], 1)
+        self.assertEqual(snapshot["other"]["errors"], 1)
+        self.assertNotIn("get_trending_styles", snapshot)
+
+    def test_batch_requests_are_counted_once(self):
+        """Test that process_batch records every task exactly once"""
+        tasks = [
+            AgentTask(type="get_hairstyle_recommendations", payload={"face_shape": "oval", "hair_type": "wavy"}),
+            AgentTask(type="get_trending_styles", payload={"season": "summer"})
+        ]
+        self.agent.process_batch(tasks)
+
+        snapshot = self.agent.metrics.snapshot()
+        self.assertEqual(snapshot["get_hairstyle_recommendations"]["requests"], 1)
+        self.assertEqual(snapshot["get_trending_styles"]["requests"], 1)
+
+    def test_prometheus_rendering(self):
+        """Test the Prometheus text exposition"""
+        self.agent.process(AgentTask(type="get_trending_styles", payload={"season": "summer"}))
+        text = self.agent.render_metrics()
+
+        self.assertIn('hair_recommendation_requests_total{task_type="get_trending_styles"} 1', text)
+        self.assertIn('hair_recommendation_errors_total{task_type="get_trending_styles"} 0', text)
+        self.assertIn('hair_recommendation_request_duration_seconds{task_type="get_trending_styles",quantile="0.99"}',
+                      text)
+        self.assertIn(f"hair_recommendation_catalog_styles {len(self.agent._engine)}", text)
+        self.assertIn("hair_recommendation_cache_entries 0", text)
+        self.assertIn("# TYPE hair_recommendation_request_duration_seconds summary", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_unknown_task_types_share_a_label(self):
+        """Test that unsupported task types do not create new label values"""
+        registry = MetricsRegistry(["a"])
+        registry.observe("b", 0.01, True)
+        registry.observe("c", 0.01, False)
+        self.assertEqual(registry.snapshot()["other"]["requests"], 2)
+        self.assertNotIn('task_type="b"', registry.render_prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
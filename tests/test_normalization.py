@@ -0,0 +1,136 @@
+import unittest
+from agent_core_framework import AgentTask
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data import RuleIndex
+from hair_recommendation_agent.normalization import TextMatch, TextNormalizer, bigrams, words
+
+
+class TestTextNormalizer(unittest.TestCase):
+    """Test cases for free-text input normalization"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.normalizer = TextNormalizer(RuleIndex())
+
+    def test_messy_values(self):
+        """Test case, filler words, separators and typos"""
+        cases = [
+            ("hair_type", "Wavy", "wavy"),
+            ("hair_type", "wavy hair", "wavy"),
+            ("hair_type", "curley", "curly"),
+            ("face_shape", "Heart-shaped face", "heart"),
+            ("age_group", "Young Adult", "young_adult"),
+            ("personal_style", "romantik", "romantic"),
+            ("style", "Curtain Bangs", "curtain_bangs"),
+            ("style", "beachy waves", "beach_waves")
+        ]
+        for field, text, key in cases:
+            match = self.normalizer.match(field, text)
+            self.assertIsNotNone(match, text)
+            self.assertEqual(match.value, key)
+            self.assertGreaterEqual(match.confidence, 0.6)
+        self.assertEqual(self.normalizer.match("hair_type", "Wavy hair").confidence, 1.0)
+        self.assertLess(self.normalizer.match("hair_type", "wavey").confidence, 1.0)
+
+    def test_keys_and_unmatched_text(self):
+        """Test that keys match as given and unrelated text matches nothing"""
+        for field in ("face_shape", "hair_type", "gender", "style"):
+            for key in self.normalizer.keys(field):
+                self.assertEqual(self.normalizer.match(field, key), TextMatch(key, 1.0))
+        self.assertIsNone(self.normalizer.match("hair_type", "purple"))
+        self.assertIsNone(self.normalizer.match("hair_type", ""))
+        with self.assertRaises(ValueError):
+            self.normalizer.match("hair_color", "red")
+
+    def test_pruned_lookup_matches_full_scan(self):
+        """Test that reading the rarest bigrams finds the best key of a full scan"""
+        index = RuleIndex({"oval": {"excellent": [f"style_{i}_cut" for i in range(300)]}}, {}, {}, {}, {}, {})
+        normalizer = TextNormalizer(index, min_confidence=0.3)
+        keys = normalizer.keys("style")
+        for text in ("stile 7 cut", "style 12 cutt", "27 cut", "sty 299", "cut style 1"):
+            grams = bigrams(words(text))
+            scores = [2 * len(grams & bigrams(words(key))) / (len(grams) + len(bigrams(words(key))))
+                      for key in keys]
+            best = max(range(len(keys)), key=lambda i: (scores[i], -i))
+            self.assertEqual(normalizer.match("style", text), TextMatch(keys[best], round(scores[best], 2)))
+
+    def test_memo(self):
+        """Test that repeated texts are served from the memo"""
+        normalizer = TextNormalizer(RuleIndex(), memo_size=2)
+        normalizer.match("hair_type", "wavy hair")
+        normalizer.match("hair_type", "wavy")
+        normalizer.match("hair_type", "wavy hair")
+        stats = normalizer.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_agent_requests(self):
+        """Test that free-text requests answer like the keys they resolve to"""
+        agent = HairRecommendationAgent()
+
+        def process(task_type, payload):
+            response = agent.process(AgentTask(type=task_type, payload=payload))
+            self.assertTrue(response.success, response.error)
+            return response.data
+
+        self.assertEqual(
+            process("get_hairstyle_recommendations",
+                    {"face_shape": "Oval", "hair_type": "Wavy hair", "personal_style": "Bohemian",
+                     "hair_length": "Medium"}),
+            process("get_hairstyle_recommendations",
+                    {"face_shape": "oval", "hair_type": "wavy", "personal_style": "bohemian",
+                     "hair_length": "medium"})
+        )
+        described = process("get_hairstyle_recommendations", {"face_shape": "round", "hair_style": "long curly hair"})
+        self.assertEqual(described.pop("resolved_inputs"),
+                         {"hair_style": {"input": "long curly hair", "value": "curly", "confidence": 0.71}})
+        self.assertEqual(described,
+                         process("get_hairstyle_recommendations", {"face_shape": "round", "hair_type": "curly"}))
+        self.assertEqual(
+            process("analyze_style_compatibility",
+                    {"style_name": "Curtain Bangs", "face_shape": "Oval face", "hair_type": "wavy"}),
+            process("analyze_style_compatibility",
+                    {"style_name": "curtain_bangs", "face_shape": "oval", "hair_type": "wavy"})
+        )
+        self.assertEqual(process("get_similar_styles", {"style_name": "Beach Waves"})["style_name"], "beach_waves")
+        self.assertEqual(process("get_compatibility_matrix", {"styles": ["Pixie Cut"]})["styles"], ["pixie_cut"])
+
+        self.assertNotIn("resolved_inputs", process("get_hairstyle_recommendations",
+                                                    {"face_shape": "Oval face", "hair_type": "Wavy"}))
+
+        response = agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                           payload={"face_shape": "oval", "hair_style": "purple"}))
+        self.assertFalse(response.success)
+        self.assertEqual(agent.normalize_text("gender", "Female"), TextMatch("female", 1.0))
+        self.assertIn("text_normalizer", agent.get_info())
+
+    def test_resolved_inputs(self):
+        """Test that inexact matches are reported and short style names are not guessed"""
+        agent = HairRecommendationAgent()
+
+        def process(task_type, payload):
+            return agent.process(AgentTask(type=task_type, payload=payload))
+
+        data = process("get_hairstyle_recommendations",
+                       {"face_shape": "long", "hair_type": "curley", "gender": "female"}).data
+        self.assertEqual(data["resolved_inputs"], {
+            "face_shape": {"input": "long", "value": "oblong", "confidence": 0.67},
+            "hair_type": {"input": "curley", "value": "curly", "confidence": 0.77}
+        })
+        data = process("analyze_style_compatibility",
+                       {"style_name": "beachy waves", "face_shape": "oval", "hair_type": "wavy"}).data
+        self.assertEqual(data["resolved_inputs"],
+                         {"style_name": {"input": "beachy waves", "value": "beach_waves", "confidence": 0.88}})
+        data = process("get_similar_styles", {"style_name": "beachy waves"}).data
+        self.assertEqual(list(data["resolved_inputs"]), ["style_name"])
+
+        # "bob" and "bangs" are closest to blunt_bob and blunt_bangs, but not close enough
+        self.assertLess(agent.normalize_text("style", "bob").confidence, agent.style_match_threshold)
+        for style in ("bob", "bangs"):
+            data = process("analyze_style_compatibility",
+                           {"style_name": style, "face_shape": "oval", "hair_type": "wavy"}).data
+            self.assertNotIn("resolved_inputs", data)
+            self.assertFalse(process("get_similar_styles", {"style_name": style}).success)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data.sources import export_rules
+from hair_recommendation_agent.data.trend_rules import SEASONAL_TRENDS, TRENDING_STYLES
+from hair_recommendation_agent.responses import _shape_copier, copy_data, encode_json
+from agent_core_framework import AgentTask
+
+
+class TestPrerenderedResponses(unittest.TestCase):
+    """Test cases for trending responses rendered once per rule snapshot"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.agent = HairRecommendationAgent()
+
+    def trending(self, agent, season):
+        task = AgentTask(type="get_trending_styles", payload={"season": season})
+        response = agent.process(task)
+        self.assertTrue(response.success)
+        return response.data
+
+    def test_known_seasons(self):
+        """Test that every season lists its trending styles with details"""
+        for season, styles in TRENDING_STYLES.items():
+            data = self.trending(self.agent, season)
+            self.assertEqual(data["season"], season)
+            self.assertEqual([trend["style_name"] for trend in data["trending_styles"]], styles)
+            self.assertIn("seasonal_advice", data)
+            for trend in data["trending_styles"]:
+                self.assertIn("display_name", trend)
+                self.assertIn("popularity_reason", trend)
+
+    def test_unknown_season(self):
+        """Test that unknown seasons get the all-season trends with their own name"""
+        data = self.trending(self.agent, "monsoon")
+        self.assertEqual(data["season"], "monsoon")
+        self.assertEqual(data["trending_styles"], self.trending(self.agent, "all")["trending_styles"])
+        self.assertEqual(data["seasonal_advice"], "Adapt your style to weather conditions")
+
+    def test_responses_are_rendered_once(self):
+        """Test that repeated requests share the rendered data"""
+        self.assertIs(self.agent._trending(), self.agent._trending())
+        self.assertIs(self.agent.trending_json("summer"), self.agent.trending_json("summer"))
+
+    def test_responses_do_not_share_data(self):
+        """Test that changing one response leaves later responses and the rules unchanged"""
+        before = self.trending(self.agent, "summer")
+        self.trending(self.agent, "summer")["trending_styles"].clear()
+        self.trending(self.agent, "monsoon")["trending_styles"].clear()
+        self.assertEqual(self.trending(self.agent, "summer"), before)
+        self.assertEqual(json.loads(self.agent.trending_json("summer")), before)
+        self.assertTrue(self.trending(self.agent, "monsoon")["trending_styles"])
+
+        task = AgentTask(type="get_hairstyle_recommendations", payload={"face_shape": "oval", "hair_type": "wavy"})
+        trends = self.agent.process(task).data["seasonal_trends"]
+        expected = json.loads(json.dumps(trends))
+        trends["current_trends"].append("mullet")
+        self.assertEqual(self.agent.process(task).data["seasonal_trends"], expected)
+        self.assertEqual(SEASONAL_TRENDS["current_trends"], expected["current_trends"])
+
+    def test_copies(self):
+        """Test that copies share no dict or list with the original"""
+        data = {"name": "a", "flat": [1, 2], "items": [{"x": 1}, {"y": "2"}],
+                "nested": {"deep": [[1], {"z": None}]}, "mixed": [{"x": 1}, [2], 3]}
+        for copied in (copy_data(data), _shape_copier(data)(data)):
+            self.assertEqual(copied, data)
+            pending = [(copied, data)]
+            while pending:
+                copy, original = pending.pop()
+                if isinstance(original, (dict, list)):
+                    self.assertIsNot(copy, original)
+                    pairs = zip(copy.values(), original.values()) if isinstance(original, dict) else zip(copy, original)
+                    pending.extend(pairs)
+
+    def test_trending_json(self):
+        """Test that the pre-serialized bytes match the response data"""
+        for season in list(TRENDING_STYLES) + ["monsoon", 'quote"season']:
+            encoded = self.agent.trending_json(season)
+            data = self.trending(self.agent, season)
+            self.assertEqual(encoded, encode_json(data))
+            self.assertEqual(json.loads(encoded), data)
+
+    def test_reload_renders_again(self):
+        """Test that trending responses follow reloaded rules"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rules.json")
+            export_rules(path)
+            agent = HairRecommendationAgent(rules_source=path)
+            before = agent.trending_json()
+
+            with open(path, encoding="utf-8") as handle:
+                rules = json.load(handle)
+            rules["styles_detailed"]["curtain_bangs"]["description"] = "Soft face-framing fringe"
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(rules, handle)
+            self.assertTrue(agent.reload_rules())
+
+            self.assertNotEqual(agent.trending_json(), before)
+            descriptions = {trend["style_name"]: trend["description"]
+                            for trend in self.trending(agent, "all")["trending_styles"]}
+            self.assertEqual(descriptions["curtain_bangs"], "Soft face-framing fringe")
+
+
+if __name__ == '__main__':
+    unittest.main()
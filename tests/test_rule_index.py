@@ -0,0 +1,63 @@
+import unittest
+from hair_recommendation_agent.data import RuleIndex
+
+
+class TestRuleIndex(unittest.TestCase):
+    """Test cases for the compiled rule index"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.face_shape_rules = {
+            "oval": {"excellent": ["bob"], "good": ["pixie", "bob"], "avoid": ["mullet"]}
+        }
+        self.hair_type_rules = {
+            "wavy": {"perfect": ["bob"], "requires_styling": ["pixie"]}
+        }
+        self.style_profiles = {
+            "edgy": {"recommended_styles": ["pixie", "mullet"]},
+            "classic": {"recommended_styles": ["bob", "pixie"]}
+        }
+        self.styles_detailed = {
+            "bob": {"face_shapes": ["oval"], "hair_types": ["wavy"], "style_profiles": ["classic"]},
+            "pixie": {"face_shapes": ["square"], "hair_types": ["wavy"], "style_profiles": ["edgy"]}
+        }
+
+    def _build(self, **kwargs):
+        return RuleIndex(self.face_shape_rules, self.hair_type_rules, self.style_profiles,
+                         self.styles_detailed, {"adult": ["bob"]}, {"female": ["pixie"]}, **kwargs)
+
+    def test_tier_maps(self):
+        """Test style to tier maps, keeping the best tier"""
+        index = self._build()
+        self.assertEqual(index.face_tiers["oval"], {"bob": "excellent", "pixie": "good", "mullet": "avoid"})
+        self.assertEqual(index.hair_tiers["wavy"], {"bob": "perfect", "pixie": "requires_styling"})
+        self.assertEqual(index.candidate_styles(), ["bob", "pixie"])
+
+    def test_reverse_profile_index(self):
+        """Test style to profiles index"""
+        index = self._build()
+        self.assertEqual(index.style_profiles["pixie"], frozenset(["edgy", "classic"]))
+        self.assertEqual(index.style_profiles["bob"], frozenset(["classic"]))
+        self.assertNotIn("afro", index.style_profiles)
+
+    def test_reports_rule_issues(self):
+        """Test that rule data problems are reported at build time"""
+        issues = self._build().issues
+        self.assertEqual(len(issues), 3)
+        self.assertTrue(any("'mullet'" in issue and "missing from HAIR_STYLES_DETAILED" in issue for issue in issues))
+        self.assertTrue(any("'bob' is listed as both 'excellent' and 'good'" in issue for issue in issues))
+        self.assertTrue(any("unknown face_shapes entry 'square'" in issue for issue in issues))
+
+        with self.assertRaises(ValueError):
+            self._build(strict=True)
+
+    def test_default_rule_data(self):
+        """Test building from the data package"""
+        index = RuleIndex()
+        self.assertIn("oval", index.face_tiers)
+        self.assertEqual(index.face_tiers["oval"]["long_layers"], "excellent")
+        self.assertEqual(len(index.fingerprint), 64)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,108 @@
+import unittest
+from hair_recommendation_agent import HairRecommendationAgent
+import numpy as np
+from hair_recommendation_agent.scoring import ScoringEngine, select_top_k, iter_ranked
+from hair_recommendation_agent.data import FACE_SHAPE_RECOMMENDATIONS, HAIR_TYPE_RECOMMENDATIONS, STYLE_PROFILES
+
+
+class TestScoringEngine(unittest.TestCase):
+    """Test cases for the compiled scoring engine"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.agent = HairRecommendationAgent()
+        self.engine = ScoringEngine()
+
+    def test_matches_scalar_scorer(self):
+        """Test that array scores equal the per-style scorer methods"""
+        weights = self.agent._get_weight_vector()
+        face_shapes = list(FACE_SHAPE_RECOMMENDATIONS) + ["unknown_shape"]
+        hair_types = list(HAIR_TYPE_RECOMMENDATIONS) + ["unknown_type"]
+        personal_styles = list(STYLE_PROFILES) + ["unknown_profile"]
+
+        for face_shape in face_shapes:
+            for hair_type in hair_types:
+                for personal_style in personal_styles:
+                    for age_group, gender in [("teen", "male"), ("adult", "unisex"), ("mature", "other")]:
+                        scores = self.engine.score(face_shape, hair_type, personal_style,
+                                                   age_group, gender, weights)
+                        for index, style in enumerate(self.engine.styles):
+                            expected = self.agent._calculate_style_score(
+                                style, face_shape, hair_type, personal_style, age_group, gender
+                            )
+                            self.assertEqual(scores[index], expected)
+
+    def test_score_batch_per_request_weights(self):
+        """Test that per-request weights score like single requests"""
+        from hair_recommendation_agent.schema import RecommendationRequest
+
+        requests = [RecommendationRequest("oval", "wavy", "bohemian", "adult", "female", None),
+                    RecommendationRequest("round", "curly", "versatile", "teen", "unisex", "short"),
+                    RecommendationRequest("heart", "fine", "classic", "mature", "male", None)]
+        weights = [[0.4, 0.3, 0.2, 0.2, 0.2], [0.9, 0.1, 0.1, 0.1, 0.1], [0.0, 0.5, 0.5, 0.0, 0.3]]
+
+        scores = self.engine.score_batch(requests, weights)
+        for row, request, request_weights in zip(scores, requests, weights):
+            np.testing.assert_array_equal(row, self.engine.score(*request[:5], request_weights))
+
+    def test_score_variants(self):
+        """Test that variant scores equal scoring each weight vector alone"""
+        weights = [[0.4, 0.3, 0.2, 0.2, 0.2], [0.9, 0.1, 0.1, 0.1, 0.1], [0.0, 0.5, 0.5, 0.0, 0.3]]
+        scores = self.engine.score_variants("oval", "wavy", "bohemian", "adult", "female", weights)
+        self.assertEqual(scores.shape, (3, len(self.engine)))
+        for row, variant in zip(scores, weights):
+            np.testing.assert_array_equal(row, self.engine.score("oval", "wavy", "bohemian", "adult", "female", variant))
+
+    def test_length_mask(self):
+        """Test hair length masks against the compatibility check"""
+        for length in ["short", "medium", "long", "buzzed"]:
+            mask = self.engine.length_mask(length)
+            for index, style in enumerate(self.engine.styles):
+                self.assertEqual(bool(mask[index]),
+                                 self.agent._check_hair_length_compatibility(style, length))
+
+    def test_styles_match_catalog(self):
+        """Test that the engine scores every available style once"""
+        self.assertEqual(sorted(self.engine.styles), sorted(self.agent._get_all_possible_styles()))
+        self.assertEqual(len(self.engine), len(set(self.engine.styles)))
+
+    def test_select_top_k(self):
+        """Test bounded top-k selection order and tie-breaking"""
+        scores = np.array([0.5, 0.9, 0.5, 0.7, 0.9, 0.2])
+        candidates = np.array([True, True, True, True, True, False])
+
+        indices, top_scores = select_top_k(scores, candidates, 4)
+
+        self.assertEqual(indices, [1, 4, 3, 0])
+        self.assertEqual(top_scores, [0.9, 0.9, 0.7, 0.5])
+        self.assertEqual(select_top_k(scores, candidates, 10)[0], [1, 4, 3, 0, 2])
+        self.assertEqual(select_top_k(scores, candidates, 2, offset=1), ([4, 3], [0.9, 0.7]))
+        self.assertEqual(select_top_k(scores, candidates, 3, offset=4), ([2], [0.5]))
+
+    def test_select_top_k_matches_full_sort(self):
+        """Test top-k pages against a stable full sort, including ties"""
+        rng = np.random.default_rng(3)
+        scores = rng.integers(0, 20, size=500) / 20
+        candidates = rng.random(500) > 0.2
+        expected = sorted(np.flatnonzero(candidates).tolist(), key=lambda i: -scores[i])
+
+        for k, offset in [(1, 0), (8, 0), (8, 5), (50, 100), (10, 395), (10, 1000)]:
+            indices, top_scores = select_top_k(scores, candidates, k, offset)
+            self.assertEqual(indices, expected[offset:offset + k])
+            self.assertEqual(top_scores, [scores[i] for i in expected[offset:offset + k]])
+
+    def test_iter_ranked_matches_full_sort(self):
+        """Test lazy ranking against a stable full sort, including ties"""
+        rng = np.random.default_rng(7)
+        scores = rng.integers(0, 20, size=500) / 20
+        candidates = rng.random(500) > 0.2
+        expected = sorted(np.flatnonzero(candidates).tolist(), key=lambda i: -scores[i])
+
+        for start in [0, 3, 8, 100, 390, 1000]:
+            ranked = list(iter_ranked(scores, candidates, start=start))
+            self.assertEqual([index for index, _ in ranked], expected[start:])
+            self.assertEqual([score for _, score in ranked], [scores[i] for i in expected[start:]])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
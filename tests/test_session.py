@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import unittest
+from agent_core_framework import AgentTask
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data.sources import export_rules
+
+
+class TestRecommendationSession(unittest.TestCase):
+    """Test cases for incremental recommendation sessions"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.agent = HairRecommendationAgent()
+
+    def recommend(self, payload):
+        task = AgentTask(type="get_hairstyle_recommendations", payload=payload)
+        return self.agent.process(task)
+
+    def test_updates_match_full_requests(self):
+        """Test that every update answers like a fresh request"""
+        session = self.agent.session({"face_shape": "oval", "hair_type": "wavy"})
+        updates = [
+            {},
+            {"hair_length": "medium"},
+            {"face_shape": "round"},
+            {"personal_style": "classic", "limit": 3},
+            {"include_components": True},
+            {"gender": "female", "age_group": "teen"},
+            {"weights": {"face_shape": 1.0}},
+            {"hair_type": "curly", "hair_length": None},
+            {"weights": None, "include_components": False},
+            {"face_shape": "no_such_shape", "limit": 50}
+        ]
+        for fields in updates:
+            response = session.update(**fields)
+            self.assertTrue(response.success, response.error)
+            self.assertEqual(response.data, self.recommend(session.payload).data)
+        self.assertNotIn("hair_length", session.payload)
+
+    def test_stages_skip_unchanged_work(self):
+        """Test that hair length and limit changes reuse the kept scores"""
+        session = self.agent.session({"face_shape": "oval", "hair_type": "wavy"})
+        session.recommend()
+        timings = []
+        self.agent.add_stage_hook(timings.append)
+
+        session.update(hair_length="short")
+        stages = [timing.stage for timing in timings]
+        self.assertNotIn("scoring", stages)
+        self.assertIn("filtering", stages)
+
+        timings.clear()
+        session.update(limit=2)
+        stages = [timing.stage for timing in timings]
+        self.assertNotIn("scoring", stages)
+        self.assertNotIn("filtering", stages)
+        self.assertNotIn("materialization", stages)
+
+        timings.clear()
+        session.update(gender="male")
+        self.assertIn("scoring", [timing.stage for timing in timings])
+
+    def test_responses_do_not_share_records(self):
+        """Test that changing a response leaves later updates unchanged"""
+        session = self.agent.session({"face_shape": "oval", "hair_type": "wavy", "include_components": True})
+        data = session.recommend().data
+        for recommendation in data["recommendations"]:
+            recommendation["style_name"] = "mullet"
+            recommendation["score_components"].clear()
+
+        response = session.update(limit=4)
+        self.assertEqual(response.data, self.recommend(session.payload).data)
+
+    def test_cursor(self):
+        """Test paging in a session and dropping the cursor for a new ranking"""
+        session = self.agent.session({"face_shape": "oval", "hair_type": "wavy", "limit": 2})
+        first = session.recommend()
+        second = session.update(cursor=first.data["next_cursor"])
+        self.assertEqual(second.data, self.recommend(session.payload).data)
+        self.assertEqual(session.update(limit=3).data, self.recommend(session.payload).data)
+        self.assertIn("cursor", session.payload)
+
+        response = session.update(face_shape="round")
+        self.assertTrue(response.success, response.error)
+        self.assertNotIn("cursor", session.payload)
+
+    def test_errors_keep_payload(self):
+        """Test that invalid updates fail without changing the session"""
+        session = self.agent.session({"face_shape": "oval", "hair_type": "wavy"})
+        expected = session.recommend().data
+        for fields in ({"limit": 0}, {"face_shape": None}, {"weights": [1, 2]},
+                       {"variants": {"a": {"face_shape": 1.0}}}):
+            response = session.update(**fields)
+            self.assertFalse(response.success)
+        self.assertEqual(session.payload, {"face_shape": "oval", "hair_type": "wavy"})
+        self.assertEqual(session.recommend().data, expected)
+        self.assertEqual(self.agent.metrics.snapshot()["get_hairstyle_recommendations"]["errors"], 4)
+
+    def test_follows_reloaded_rules(self):
+        """Test that a session rescores after the rules are reloaded"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rules.json")
+            export_rules(path)
+            self.agent = HairRecommendationAgent(rules_source=path)
+            session = self.agent.session({"face_shape": "oval", "hair_type": "wavy"})
+            session.recommend()
+
+            with open(path, encoding="utf-8") as handle:
+                rules = json.load(handle)
+            rules["face_shape_rules"]["oval"]["excellent"] = ["buzz_cut"]
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(rules, handle)
+            self.assertTrue(self.agent.reload_rules())
+
+            response = session.update(limit=20)
+            self.assertEqual(response.data, self.recommend(session.payload).data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data import RuleIndex
+from hair_recommendation_agent.similarity import SimilarityIndex, style_features
+from agent_core_framework import AgentTask
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    """Test cases for the style neighbour index"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.index = RuleIndex()
+        self.styles = self.index.candidate_styles()
+
+    def brute_force(self, style, limit):
+        features = style_features(self.index, self.styles)
+        row = self.styles.index(style)
+        similarities = np.round(features @ features[row], 12)
+        others = [i for i in range(len(self.styles)) if i != row]
+        others.sort(key=lambda i: (-similarities[i], i))
+        return [(self.styles[i], float(similarities[i])) for i in others[:limit]]
+
+    def test_features_are_unit_length(self):
+        """Test that every style vector is normalized"""
+        features = style_features(self.index, self.styles)
+        self.assertEqual(features.shape[0], len(self.styles))
+        np.testing.assert_allclose(np.linalg.norm(features, axis=1), 1.0)
+
+    def test_matches_brute_force(self):
+        """Test neighbour rows and long lookups against pairwise similarities"""
+        eager = SimilarityIndex(self.index, self.styles, neighbours=5, max_cells=4 * len(self.styles))
+        on_demand = SimilarityIndex(self.index, self.styles, neighbours=5, eager_limit=0)
+        for style in self.styles:
+            for limit in (1, 5, 12):
+                result = eager.similar(style, limit)
+                self.assertEqual(on_demand.similar(style, limit), result)
+                self.assertEqual(len(result), limit)
+                self.assertNotIn(style, [name for name, _ in result])
+                self.assertEqual(result, self.brute_force(style, limit))
+
+    def test_small_catalogs(self):
+        """Test lookups longer than the catalog and single-style catalogs"""
+        similarity = SimilarityIndex(self.index, self.styles)
+        self.assertEqual(len(similarity.similar(self.styles[0], 1000)), len(self.styles) - 1)
+        single = SimilarityIndex(self.index, self.styles[:1])
+        self.assertEqual(single.similar(self.styles[0], 3), [])
+        with self.assertRaises(ValueError):
+            similarity.similar("no_such_style", 3)
+
+    def test_similar_styles_task(self):
+        """Test the get_similar_styles task and its per-snapshot index"""
+        agent = HairRecommendationAgent()
+        task = AgentTask(type="get_similar_styles", payload={"style_name": "beach_waves", "limit": 4})
+        response = agent.process(task)
+        self.assertTrue(response.success, response.error)
+        similar = response.data["similar_styles"]
+        self.assertEqual(len(similar), 4)
+        self.assertEqual([item["style_name"] for item in similar],
+                         [name for name, _ in agent._similarity_index().similar("beach_waves", 4)])
+        for item in similar:
+            self.assertIn("display_name", item)
+            self.assertIn("description", item)
+        self.assertIs(agent._similarity_index(), agent._similarity_index())
+
+        for payload in ({}, {"style_name": "no_such_style"}, {"style_name": "beach_waves", "limit": 0}):
+            response = agent.process(AgentTask(type="get_similar_styles", payload=payload))
+            self.assertFalse(response.success)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data.sources import export_rules
+from hair_recommendation_agent import snapshot as snapshot_module
+from hair_recommendation_agent.snapshot import MAGIC, FORMAT_VERSION, _PREAMBLE, load_snapshot, save_snapshot
+from hair_recommendation_agent.table import build_table
+from agent_core_framework import AgentTask
+
+
+class TestRuleSnapshot(unittest.TestCase):
+    """Test cases for precompiled rule snapshots and lazy loading"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "rules.snapshot")
+        self.fingerprint = save_snapshot(self.path)
+        self.task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "heart", "hair_type": "curly", "personal_style": "romantic"}
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_snapshot_round_trip(self):
+        """Test that a loaded snapshot answers like freshly compiled rules"""
+        snapshot = load_snapshot(self.path)
+        self.assertEqual(snapshot.fingerprint, self.fingerprint)
+        self.assertIsNone(snapshot._engine)
+
+        expected = HairRecommendationAgent().process(self.task)
+        response = HairRecommendationAgent(snapshot_path=self.path).process(self.task)
+        self.assertEqual(response.data, expected.data)
+
+    def test_invalid_snapshot(self):
+        """Test that invalid files are rejected and the agent falls back to compiling"""
+        with open(self.path, "wb") as handle:
+            handle.write(b"not a snapshot")
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+
+        with self.assertWarns(RuntimeWarning):
+            agent = HairRecommendationAgent(snapshot_path=self.path)
+        self.assertTrue(agent.process(self.task).success)
+
+        # Well-formed pickles of the wrong shape are rejected too
+        for payload in ([1, 2], {"index": None}, {"index": "x", "engine": b"", "source": None, "stamp": None}):
+            with open(self.path, "wb") as handle:
+                handle.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION) + pickle.dumps(payload))
+            with self.assertRaises(ValueError):
+                load_snapshot(self.path)
+            with self.assertWarns(RuntimeWarning):
+                agent = HairRecommendationAgent(snapshot_path=self.path)
+            self.assertEqual(agent.process(self.task).data, HairRecommendationAgent().process(self.task).data)
+
+    def test_stale_snapshot(self):
+        """Test that snapshots of changed rules or another source are rejected"""
+        # An upgrade replaces the data package modules
+        package = os.path.join(self.directory.name, "package")
+        os.mkdir(package)
+        for name in snapshot_module._PACKAGE_RULE_MODULES:
+            shutil.copy(os.path.join(snapshot_module._PACKAGE_RULES_DIR, f"{name}.py"), package)
+        with mock.patch.object(snapshot_module, "_PACKAGE_RULES_DIR", package):
+            save_snapshot(self.path)
+            self.assertEqual(load_snapshot(self.path).fingerprint, self.fingerprint)
+            with open(os.path.join(package, "face_shape_rules.py"), "a", encoding="utf-8") as handle:
+                handle.write("\n")
+            with self.assertRaises(ValueError):
+                load_snapshot(self.path)
+            with self.assertWarns(RuntimeWarning):
+                agent = HairRecommendationAgent(snapshot_path=self.path)
+            self.assertTrue(agent.process(self.task).success)
+
+        source = os.path.join(self.directory.name, "rules.json")
+        export_rules(source)
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path, source)
+
+        save_snapshot(self.path, source=source)
+        self.assertEqual(load_snapshot(self.path, source).source, source)
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
+        os.utime(source, ns=(0, 0))
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path, source)
+
+    def test_lazy_agent_defers_compilation(self):
+        """Test that a lazy agent compiles nothing until the first request"""
+        agent = HairRecommendationAgent(lazy=True)
+        self.assertIsNone(agent._rules)
+
+        response = agent.process(self.task)
+        self.assertTrue(response.success)
+        self.assertIsNotNone(agent._rules)
+
+    def test_probes_do_not_load_rules(self):
+        """Test that info and metrics of a lazy agent leave the rules unloaded"""
+        agent = HairRecommendationAgent(lazy=True)
+        info = agent.get_info()
+        self.assertFalse(info["rules_loaded"])
+        self.assertIsNone(info["rules_fingerprint"])
+        self.assertIsNone(info["text_normalizer"])
+        self.assertIn("hair_recommendation_catalog_styles 0", agent.render_metrics())
+        self.assertIsNone(agent._rules)
+
+        agent.process(self.task)
+        info = agent.get_info()
+        self.assertTrue(info["rules_loaded"])
+        self.assertEqual(info["rules_fingerprint"], self.fingerprint)
+        self.assertIsNotNone(info["text_normalizer"])
+
+    def test_table_served_agent_skips_engine(self):
+        """Test that requests answered from a table never build the scoring engine"""
+        table_path = os.path.join(self.directory.name, "recommendations.bin")
+        compiled = HairRecommendationAgent()
+        build_table(table_path, compiled._engine, compiled._get_weight_vector())
+
+        agent = HairRecommendationAgent(lazy=True, snapshot_path=self.path, table_path=table_path)
+        response = agent.process(self.task)
+
+        self.assertEqual(response.data, compiled.process(self.task).data)
+        self.assertIsNone(agent._rules._engine)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data import FACE_SHAPE_RECOMMENDATIONS, HAIR_STYLES_DETAILED
+from hair_recommendation_agent.data.sources import export_rules, load_rules
+from agent_core_framework import AgentTask
+
+
+class TestRuleSources(unittest.TestCase):
+    """Test cases for external rule sources and snapshot reloads"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.directory.name, "rules.json")
+        export_rules(self.json_path)
+        self.task = AgentTask(
+            type="get_hairstyle_recommendations",
+            payload={"face_shape": "oval", "hair_type": "wavy"}
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _edit_rules(self, edit):
+        with open(self.json_path, encoding="utf-8") as handle:
+            rules = json.load(handle)
+        edit(rules)
+        with open(self.json_path, "w", encoding="utf-8") as handle:
+            json.dump(rules, handle)
+
+    def test_json_and_sqlite_round_trip(self):
+        """Test that exported sources load back and answer like the package rules"""
+        sqlite_path = os.path.join(self.directory.name, "rules.sqlite")
+        export_rules(sqlite_path)
+        expected = HairRecommendationAgent().process(self.task).data
+
+        for path in (self.json_path, sqlite_path):
+            rules = load_rules(path)
+            self.assertEqual(rules["face_shape_rules"], FACE_SHAPE_RECOMMENDATIONS)
+            self.assertEqual(list(rules["styles_detailed"]), list(HAIR_STYLES_DETAILED))
+
+            agent = HairRecommendationAgent(rules_source=path)
+            self.assertEqual(agent.process(self.task).data, expected)
+            self.assertEqual(agent.get_info()["rules_source"], path)
+
+    def test_sqlite_path_with_uri_characters(self):
+        """Test that SQLite sources load from paths holding URI delimiters"""
+        directory = os.path.join(self.directory.name, "odd?dir#1")
+        os.mkdir(directory)
+        path = os.path.join(directory, "rules 100%.sqlite")
+        export_rules(path)
+        self.assertEqual(load_rules(path)["face_shape_rules"], FACE_SHAPE_RECOMMENDATIONS)
+
+    def test_malformed_sources(self):
+        """Test that malformed sources raise ValueError"""
+        for content in ('[]', '{"colour_rules": {}}', '{"face_shape_rules": []}', '{',
+                        '{"face_shape_rules": {"oval": ["a"]}}',
+                        '{"face_shape_rules": {"oval": {"perfect": "beach_waves"}}}',
+                        '{"hair_type_rules": {"wavy": {"excellent": [1]}}}',
+                        '{"style_profiles": {"x": ["a"]}}',
+                        '{"style_profiles": {"x": {"recommended_styles": "a"}}}',
+                        '{"styles_detailed": {"a": "str"}}',
+                        '{"styles_detailed": {"a": {"face_shapes": "oval"}}}',
+                        '{"gender_rules": {"female": "pixie_cut"}}'):
+            with open(self.json_path, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            with self.assertRaises(ValueError):
+                load_rules(self.json_path)
+
+    def test_reload_rules(self):
+        """Test that reloading swaps in edited rules and invalidates cached results"""
+        agent = HairRecommendationAgent(cache_size=8, rules_source=self.json_path)
+        before = agent.process(self.task).data["recommendations"][0]["style_name"]
+        self.assertEqual(before, "long_layers")
+        self.assertFalse(agent.reload_rules())
+
+        def demote(rules):
+            rules["face_shape_rules"]["oval"]["excellent"].remove("long_layers")
+        self._edit_rules(demote)
+        fingerprint = agent.get_info()["rules_fingerprint"]
+
+        self.assertTrue(agent.reload_rules())
+        self.assertNotEqual(agent.get_info()["rules_fingerprint"], fingerprint)
+        after = agent.process(self.task).data["recommendations"][0]["style_name"]
+        self.assertNotEqual(after, "long_layers")
+
+    def test_reload_builds_indexes_before_swap(self):
+        """Test that indexes built for the old rules are rebuilt before the new rules are published"""
+        agent = HairRecommendationAgent(rules_source=self.json_path)
+        agent.process(AgentTask(type="get_similar_styles", payload={"style_name": "blunt_bob"}))
+        agent.process(AgentTask(type="get_trending_styles", payload={}))
+        agent.process(AgentTask(type="get_hairstyle_recommendations",
+                                payload={"face_shape": "Oval", "hair_type": "wavy"}))
+        built = agent._get_rules().derived_keys()
+        self.assertEqual(set(built), {"similarity", "trending", "normalizer"})
+
+        def demote(rules):
+            rules["face_shape_rules"]["oval"]["excellent"].remove("long_layers")
+        self._edit_rules(demote)
+        self.assertTrue(agent.reload_rules())
+        rules = agent._get_rules()
+        self.assertEqual(set(rules.derived_keys()), set(built))
+        self.assertTrue(rules.engine_loaded)
+        self.assertEqual(agent.process(self.task).data, HairRecommendationAgent(rules_source=self.json_path)
+                         .process(self.task).data)
+
+    def test_failed_reload_keeps_rules(self):
+        """Test that a source that cannot be loaded leaves the current rules in place"""
+        agent = HairRecommendationAgent(rules_source=self.json_path)
+        fingerprint = agent.get_info()["rules_fingerprint"]
+        with self.assertRaises(OSError):
+            agent.reload_rules(os.path.join(self.directory.name, "missing.json"))
+        self.assertEqual(agent.get_info()["rules_fingerprint"], fingerprint)
+
+        def split_tier(rules):
+            rules["face_shape_rules"]["oval"]["excellent"] = "beach_waves"
+        self._edit_rules(split_tier)
+        with self.assertRaises(ValueError):
+            agent.reload_rules()
+        self.assertEqual(agent.get_info()["rules_fingerprint"], fingerprint)
+        self.assertEqual(agent.get_info()["rules_source"], self.json_path)
+
+    def test_in_flight_listing_keeps_its_rules(self):
+        """Test that a request started before a reload finishes on the old rules"""
+        agent = HairRecommendationAgent(rules_source=self.json_path)
+        payload = {"face_shape": "oval", "hair_type": "wavy"}
+        listing = agent.iter_recommendations(payload)
+        expected = list(agent.iter_recommendations(payload))
+
+        def drop_details(rules):
+            rules["styles_detailed"] = {}
+        self._edit_rules(drop_details)
+        self.assertTrue(agent.reload_rules())
+
+        self.assertEqual(list(listing), expected)
+        self.assertNotEqual(list(agent.iter_recommendations(payload)), expected)
+
+    def test_reload_while_processing(self):
+        """Test that requests keep succeeding while rules are swapped concurrently"""
+        agent = HairRecommendationAgent(rules_source=self.json_path)
+        other_path = os.path.join(self.directory.name, "other.json")
+        export_rules(other_path)
+        with open(other_path, encoding="utf-8") as handle:
+            rules = json.load(handle)
+        rules["styles_detailed"].pop("long_layers")
+        with open(other_path, "w", encoding="utf-8") as handle:
+            json.dump(rules, handle)
+
+        failures = []
+        stop = threading.Event()
+
+        def worker():
+            while not stop.is_set():
+                response = agent.process(self.task)
+                if not response.success:
+                    failures.append(response.error)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(20):
+            agent.reload_rules(other_path if i % 2 == 0 else self.json_path)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
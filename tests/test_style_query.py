@@ -0,0 +1,121 @@
+import unittest
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.data import RuleIndex, StyleQuery, style_profiles
+from hair_recommendation_agent.data import (
+    FACE_SHAPE_RECOMMENDATIONS,
+    HAIR_TYPE_RECOMMENDATIONS,
+    STYLE_PROFILES,
+    HAIR_STYLES_DETAILED
+)
+
+
+def set_based_matches(face_shape, hair_type, style_profile=None, hair_length=None):
+    """best_matches as computed before the query engine, with sets and list filters"""
+    excellent_face = set(FACE_SHAPE_RECOMMENDATIONS.get(face_shape, {}).get("excellent", []))
+    perfect_hair = set(HAIR_TYPE_RECOMMENDATIONS.get(hair_type, {}).get("perfect", []))
+    best_matches = excellent_face & perfect_hair
+    if style_profile and style_profile in STYLE_PROFILES:
+        best_matches &= set(STYLE_PROFILES[style_profile]["recommended_styles"])
+    if hair_length:
+        best_matches = {style for style in best_matches
+                        if hair_length in HAIR_STYLES_DETAILED.get(style, {}).get("hair_lengths", [])}
+    return best_matches
+
+
+class TestStyleQuery(unittest.TestCase):
+    """Test cases for the bitmask style query engine"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.query = StyleQuery(RuleIndex())
+
+    def test_personalized_recommendations_unchanged(self):
+        """Test that every combination matches the set-based implementation"""
+        for face_shape in list(FACE_SHAPE_RECOMMENDATIONS) + ["unknown_shape", None, ""]:
+            for hair_type in list(HAIR_TYPE_RECOMMENDATIONS) + ["unknown_type", None, ""]:
+                for style_profile in [None, "unknown_profile"] + list(STYLE_PROFILES):
+                    for hair_length in [None, "", "short", "medium", "long"]:
+                        result = style_profiles.get_personalized_recommendations(
+                            face_shape, hair_type, style_profile, hair_length)
+                        self.assertEqual(len(result["best_matches"]), len(set(result["best_matches"])))
+                        self.assertEqual(set(result["best_matches"]),
+                                         set_based_matches(face_shape, hair_type, style_profile, hair_length))
+
+    def test_in_place_rule_edits(self):
+        """Test that edits to the rule constants are seen after refresh_style_query"""
+        excellent = FACE_SHAPE_RECOMMENDATIONS["oval"]["excellent"]
+        before = style_profiles.get_personalized_recommendations("oval", "wavy")["best_matches"]
+        self.assertTrue(before)
+        saved = list(excellent)
+        try:
+            excellent.clear()
+            style_profiles.refresh_style_query()
+            self.assertEqual(style_profiles.get_personalized_recommendations("oval", "wavy")["best_matches"], [])
+        finally:
+            excellent[:] = saved
+            style_profiles.refresh_style_query()
+        self.assertEqual(style_profiles.get_personalized_recommendations("oval", "wavy")["best_matches"], before)
+
+    def test_extra_constraints(self):
+        """Test catalog field constraints against the style details"""
+        for maintenance in ["low", "medium", "high"]:
+            expected = [style for style, info in HAIR_STYLES_DETAILED.items()
+                        if info.get("maintenance") == maintenance]
+            self.assertEqual(self.query.find(maintenance=maintenance), expected)
+
+        expected = [style for style, info in HAIR_STYLES_DETAILED.items()
+                    if info.get("maintenance") in ("low", "medium") and "oval" in info.get("face_shapes", [])]
+        self.assertEqual(self.query.find(maintenance=["low", "medium"], face_shapes="oval"), expected)
+        self.assertEqual(self.query.find(maintenance="rare"), [])
+
+        with self.assertRaises(ValueError):
+            self.query.find(colour="red")
+
+    def test_tiers_and_counts(self):
+        """Test tier selection, the unconstrained query and popcounts"""
+        good = self.query.find(face_shape="oval", face_tiers=("excellent", "good"))
+        self.assertEqual(set(good), set(FACE_SHAPE_RECOMMENDATIONS["oval"]["excellent"])
+                         | set(FACE_SHAPE_RECOMMENDATIONS["oval"]["good"]))
+        self.assertEqual(self.query.count(self.query.mask(face_shape="oval", face_tiers=("excellent", "good"))),
+                         len(good))
+        self.assertEqual(self.query.find(), self.query.styles)
+        self.assertEqual(self.query.count(self.query.all), len(self.query.styles))
+
+    def test_custom_rules(self):
+        """Test styles referenced by rules but missing from the details"""
+        index = RuleIndex(
+            {"oval": {"excellent": ["bob", "mullet"]}},
+            {"wavy": {"perfect": ["bob", "mullet"]}},
+            {"edgy": {"recommended_styles": ["mullet"]}},
+            {"bob": {"hair_lengths": ["short"], "maintenance": "low", "texture": ["soft", "sleek"]}},
+            {}, {}
+        )
+        query = StyleQuery(index)
+        self.assertEqual(query.styles, ["bob", "mullet"])
+        self.assertEqual(query.find(face_shape="oval", hair_type="wavy"), ["bob", "mullet"])
+        self.assertEqual(query.find(face_shape="oval", style_profile="edgy"), ["mullet"])
+        self.assertEqual(query.find(hair_length="short"), ["bob"])
+        self.assertEqual(query.find(texture="sleek"), ["bob"])
+
+        # Styles only named by profiles keep their rule order whatever the hash seed
+        index = RuleIndex({}, {}, {"edgy": {"recommended_styles": ["zig", "alpha", "mid", "beta"]}}, {}, {}, {})
+        self.assertEqual(StyleQuery(index).styles, ["zig", "alpha", "mid", "beta"])
+
+    def test_decode_large_masks(self):
+        """Test decoding masks spanning many bytes"""
+        index = RuleIndex({"oval": {"excellent": [f"style_{i}" for i in range(1000)]}}, {}, {}, {}, {}, {})
+        query = StyleQuery(index)
+        mask = sum(1 << i for i in range(0, 1000, 7))
+        self.assertEqual(query.decode(mask), [f"style_{i}" for i in range(0, 1000, 7)])
+        self.assertEqual(query.count(mask), len(range(0, 1000, 7)))
+
+    def test_agent_query_styles(self):
+        """Test faceted queries through the agent"""
+        agent = HairRecommendationAgent()
+        self.assertEqual(agent.query_styles(face_shape="oval", hair_type="wavy", maintenance="low"),
+                         self.query.find(face_shape="oval", hair_type="wavy", maintenance="low"))
+        self.assertIsInstance(agent._get_rules().derived("style_query", None), StyleQuery)
+
+
+if __name__ == '__main__':
+    unittest.main()
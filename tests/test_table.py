@@ -0,0 +1,98 @@
+import itertools
+import os
+import tempfile
+import unittest
+from hair_recommendation_agent import HairRecommendationAgent
+from hair_recommendation_agent.scoring import RecommendationRequest
+from hair_recommendation_agent.table import RecommendationTable, build_table
+from agent_core_framework import AgentTask
+
+
+class TestRecommendationTable(unittest.TestCase):
+    """Test cases for the precomputed recommendation table"""
+
+    def setUp(self):
+        """Set up the test fixture"""
+        self.agent = HairRecommendationAgent()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "recommendations.bin")
+        build_table(self.path, self.agent._engine, self.agent._get_weight_vector(), k=10)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_table_matches_live_scoring(self):
+        """Test that table answers equal live scoring"""
+        table_agent = HairRecommendationAgent(table_path=self.path)
+        self.assertEqual(table_agent.get_info()["precomputed_table"], self.path)
+
+        combinations = itertools.product(
+            ["oval", "round", "diamond"],
+            ["wavy", "coily"],
+            ["versatile", "edgy"],
+            ["teen", "mature"],
+            ["female", "unisex"],
+            [None, "short", "long"]
+        )
+        for face_shape, hair_type, personal_style, age_group, gender, hair_length in combinations:
+            payload = {
+                "face_shape": face_shape,
+                "hair_type": hair_type,
+                "personal_style": personal_style,
+                "age_group": age_group,
+                "gender": gender,
+                "hair_length": hair_length
+            }
+            request = table_agent._parse_recommendation_request(payload)
+            self.assertIsNotNone(table_agent._lookup_table(request))
+
+            task = AgentTask(type="get_hairstyle_recommendations", payload=payload)
+            self.assertEqual(table_agent.process(task).data, self.agent.process(task).data)
+
+    def test_uncovered_requests_fall_back(self):
+        """Test that unknown values and large limits are scored live"""
+        table = RecommendationTable(self.path)
+        try:
+            self.assertIsNone(table.lookup(RecommendationRequest("unknown", "wavy", "edgy", "adult", "male", None)))
+            self.assertIsNone(table.lookup(RecommendationRequest("oval", "wavy", "edgy", "adult", "male", None, 11)))
+            self.assertIsNotNone(table.lookup(RecommendationRequest("oval", "wavy", "edgy", "adult", "male", None,
+                                                                    limit=5, offset=5)))
+            self.assertIsNotNone(table.lookup(RecommendationRequest("oval", "wavy", "edgy", "adult", "male", "")))
+            self.assertIsNone(table.lookup(RecommendationRequest("oval", "wavy", "edgy", "adult", "male", None,
+                                                                 offset=3)))
+        finally:
+            table.close()
+
+    def test_pages_match_live_scoring(self):
+        """Test that pages within the stored ranks come from the table"""
+        table_agent = HairRecommendationAgent(table_path=self.path)
+        payload = {"face_shape": "oval", "hair_type": "wavy", "limit": 5}
+        for page in range(3):
+            request = table_agent._parse_recommendation_request(payload)
+            # Two pages of 5 fit the 10 stored ranks; the third is scored live
+            self.assertEqual(table_agent._lookup_table(request) is None, page == 2)
+            task = AgentTask(type="get_hairstyle_recommendations", payload=payload)
+            response = table_agent.process(task)
+            self.assertEqual(response.data, self.agent.process(task).data)
+            if response.data["next_cursor"] is None:
+                break
+            payload = dict(payload, cursor=response.data["next_cursor"])
+
+    def test_stale_or_missing_table_is_ignored(self):
+        """Test fallback to live scoring for stale, missing or invalid tables"""
+        stale = os.path.join(self.directory.name, "stale.bin")
+        build_table(stale, self.agent._engine, [0.5, 0.5, 0.0, 0.0, 0.0])
+        invalid = os.path.join(self.directory.name, "invalid.bin")
+        with open(invalid, "wb") as handle:
+            handle.write(b"not a table")
+
+        for path in [os.path.join(self.directory.name, "missing.bin"), invalid]:
+            self.assertIsNone(HairRecommendationAgent(table_path=path).get_info()["precomputed_table"])
+
+        agent = HairRecommendationAgent(table_path=stale)
+        request = agent._parse_recommendation_request({"face_shape": "oval", "hair_type": "wavy"})
+        self.assertIsNone(agent._lookup_table(request))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)